@@ -0,0 +1,318 @@
+"""Benchmarks dos hot paths de parse/extração CVM (sem rede, sem Supabase).
+
+Cada etapa roda sobre um ZIP DFP sintético (`benchmarks/synthetic_dfp.py`) e mede:
+- throughput (linhas/s, melhor de `--repeat` execuções, sem tracemalloc);
+- pico de memória alocada pela etapa (1 execução extra com tracemalloc).
+
+Etapas: parse_zip (`CVMIntegration.download_dfp` lendo o cache), normalize_frames,
+resolve_metrics (`MetricResolver`), extrair_cvm (`extrair_*`), build_raw_rows (payloads por
+empresa do `sync_fundamentals_cvm_dfp`), extract_statement_rows
+(`compute_cvm_dfp_metrics_daily._extract_from_statement_rows`) e besst_classificar.
+
+Uso:
+  python -m benchmarks.run                          # compara com benchmarks/baseline.json
+  python -m benchmarks.run --stages resolve_metrics,extrair_cvm --repeat 5
+  python -m benchmarks.run --save-baseline          # grava a nova referência
+  python -m benchmarks.run --companies 1000 --json data/bench/result.json
+
+Sai com código 1 se alguma etapa ficar mais lenta que `--tolerance` (linhas/s) ou usar mais
+memória que `--mem-tolerance` em relação à baseline (mesma configuração do gerador).
+A baseline é dependente de máquina: regrave-a ao trocar o runner.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic_dfp import SyntheticConfig, sectors, write_zip
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+STATEMENTS = ("DRE", "BPP", "BPA")
+
+# (nome, preparo(ctx) -> argumento, etapa(argumento) -> linhas processadas)
+Stage = Tuple[str, Callable[[Dict[str, Any]], Any], Callable[[Any], int]]
+
+
+def _prepare_context(cfg: SyntheticConfig, workdir: Path) -> Dict[str, Any]:
+    from integrations.cvm_integration import CVMIntegration
+    from integrations.cvm_metric_resolver import MetricResolver
+    from jobs.sync_fundamentals_cvm_dfp import WORKER_COLUMNS, _build_raw_rows
+
+    write_zip(cfg, cache_dir=workdir)
+    cvm = CVMIntegration(cache_dir=str(workdir))
+    frames = cvm.download_dfp(cfg.year, statements=list(STATEMENTS))
+
+    worker_frames: Dict[str, Any] = {}
+    for statement, df in frames.items():
+        key = df["CNPJ_CIA"].astype(str).str.replace(r"\D+", "", regex=True).str.zfill(14)
+        cols = [c for c in WORKER_COLUMNS if c in df.columns]
+        worker_frames[statement] = df[cols].assign(CNPJ_CIA=key)
+    long = MetricResolver().resolve_frames(worker_frames)
+    result = {
+        "doc_type": cfg.doc_type,
+        "year": cfg.year,
+        "frames": worker_frames,
+        "metrics": long[["cnpj", "dt_refer", "metric", "value"]].to_dict(orient="list"),
+    }
+    cnpjs = sorted({c for df in worker_frames.values() for c in df["CNPJ_CIA"].unique()})
+    tickers = [f"TK{i:04d}3" for i in range(len(cnpjs))]
+    cnpj_by_ticker = dict(zip(tickers, cnpjs))
+    payloads = _build_raw_rows(result, tickers=tickers, cnpj_by_ticker=cnpj_by_ticker, max_rows=100_000)
+
+    return {
+        "cfg": cfg,
+        "cvm": cvm,
+        "frames": frames,
+        "result": result,
+        "tickers": tickers,
+        "cnpj_by_ticker": cnpj_by_ticker,
+        "payloads": payloads,
+        "sectors": sectors(cfg) * 100,
+    }
+
+
+def _stage_parse_zip(ctx: Dict[str, Any]) -> int:
+    frames = ctx["cvm"].download_dfp(ctx["cfg"].year, statements=list(STATEMENTS))
+    return sum(len(df) for df in frames.values())
+
+
+def _stage_normalize(frames: Dict[str, Any]) -> int:
+    from integrations.cvm_statements import normalize_statement_frame
+
+    for df in frames.values():
+        normalize_statement_frame(df)
+    return sum(len(df) for df in frames.values())
+
+
+def _stage_resolve(frames: Dict[str, Any]) -> int:
+    from integrations.cvm_metric_resolver import MetricResolver
+
+    MetricResolver().resolve_frames(frames)
+    return sum(len(df) for df in frames.values())
+
+
+def _stage_extrair(ctx: Dict[str, Any]) -> int:
+    cvm, frames = ctx["cvm"], ctx["frames"]
+    cvm.extrair_patrimonio_liquido(frames["BPP"])
+    cvm.extrair_divida_bruta(frames["BPP"])
+    cvm.extrair_caixa_equivalentes(frames["BPA"])
+    cvm.extrair_dividendos(frames["DRE"])
+    return 2 * len(frames["BPP"]) + len(frames["BPA"]) + len(frames["DRE"])
+
+
+def _stage_build_raw_rows(ctx: Dict[str, Any]) -> int:
+    from jobs.sync_fundamentals_cvm_dfp import _build_raw_rows
+
+    _build_raw_rows(ctx["result"], tickers=ctx["tickers"], cnpj_by_ticker=ctx["cnpj_by_ticker"], max_rows=100_000)
+    return sum(len(df) for df in ctx["result"]["frames"].values())
+
+
+def _stage_extract_rows(payloads: List[Dict[str, Any]]) -> int:
+    from integrations.cvm_statements import STANDARD_ACCOUNT_CODES
+    from jobs.compute_cvm_dfp_metrics_daily import (
+        CAIXA_KEYWORDS,
+        DIVIDA_BRUTA_KEYWORDS,
+        LUCRO_LIQUIDO_KEYWORDS,
+        _extract_from_statement_rows,
+    )
+
+    specs = [
+        ("BPP", DIVIDA_BRUTA_KEYWORDS, "divida_bruta"),
+        ("BPA", CAIXA_KEYWORDS, "caixa_equivalentes"),
+        ("DRE", LUCRO_LIQUIDO_KEYWORDS, "lucro_liquido"),
+        ("BPP", ["patrimonio liquido"], "patrimonio_liquido"),
+    ]
+    rows = 0
+    for raw in payloads:
+        statements = raw["payload"]["statements"]
+        for statement, keywords, metric in specs:
+            lines = statements.get(statement) or []
+            _extract_from_statement_rows(
+                lines,
+                as_of_date=raw["as_of_date"],
+                keywords=keywords,
+                codes=list(STANDARD_ACCOUNT_CODES[metric][1]),
+            )
+            rows += len(lines)
+    return rows
+
+
+def _stage_besst(pairs: List[Tuple[str, str]]) -> int:
+    from database.besst_classifier import BESSTClassifier
+    from integrations.text_normalize import fold
+
+    fold.cache_clear()  # mede a normalização, não só o cache quente
+    for setor, razao in pairs:
+        BESSTClassifier.classificar(setor, razao)
+    return len(pairs)
+
+
+STAGES: List[Stage] = [
+    ("parse_zip", lambda ctx: ctx, _stage_parse_zip),
+    ("normalize_frames", lambda ctx: ctx["frames"], _stage_normalize),
+    ("resolve_metrics", lambda ctx: ctx["result"]["frames"], _stage_resolve),
+    ("extrair_cvm", lambda ctx: ctx, _stage_extrair),
+    ("build_raw_rows", lambda ctx: ctx, _stage_build_raw_rows),
+    ("extract_statement_rows", lambda ctx: ctx["payloads"], _stage_extract_rows),
+    ("besst_classificar", lambda ctx: ctx["sectors"], _stage_besst),
+]
+
+
+def measure(fn: Callable[[Any], int], arg: Any, *, repeat: int) -> Dict[str, Any]:
+    best = float("inf")
+    rows = 0
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        t0 = time.perf_counter()
+        rows = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": int(rows),
+        "seconds": round(best, 4),
+        "rows_per_s": round(rows / best, 1) if best > 0 else None,
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Any],
+    *,
+    tolerance: float,
+    mem_tolerance: float,
+) -> List[str]:
+    """Lista de regressões (vazia se tudo dentro da tolerância)."""
+    problems: List[str] = []
+    for name, cur in results.items():
+        ref = (baseline.get("stages") or {}).get(name)
+        if not ref:
+            continue
+        if ref.get("rows_per_s") and cur.get("rows_per_s") is not None:
+            floor = ref["rows_per_s"] * (1.0 - tolerance)
+            if cur["rows_per_s"] < floor:
+                problems.append(
+                    f"{name}: {cur['rows_per_s']:.0f} linhas/s < {floor:.0f} (baseline {ref['rows_per_s']:.0f})"
+                )
+        if ref.get("peak_mb") is not None:
+            ceiling = ref["peak_mb"] * (1.0 + mem_tolerance) + 1.0  # +1 MB de folga absoluta
+            if cur["peak_mb"] > ceiling:
+                problems.append(f"{name}: pico {cur['peak_mb']:.1f} MB > {ceiling:.1f} MB (baseline {ref['peak_mb']:.1f})")
+    return problems
+
+
+def _environment() -> Dict[str, str]:
+    import numpy
+    import pandas
+
+    return {
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def main(
+    *,
+    cfg: SyntheticConfig,
+    stages: Optional[List[str]] = None,
+    repeat: int = 3,
+    baseline_path: Path = BASELINE_PATH,
+    save_baseline: bool = False,
+    json_out: Optional[Path] = None,
+    tolerance: float = 0.25,
+    mem_tolerance: float = 0.25,
+) -> int:
+    logging.getLogger("integrations").setLevel(logging.ERROR)
+    selected = [s for s in STAGES if not stages or s[0] in stages]
+    unknown = set(stages or []) - {s[0] for s in STAGES}
+    if unknown:
+        print(f"[ERRO] Etapas desconhecidas: {', '.join(sorted(unknown))}")
+        return 2
+
+    print(f"[*] Gerando DFP sintético ({cfg.companies} empresas, profundidade {cfg.depth})...")
+    with tempfile.TemporaryDirectory(prefix="bench_cvm_") as tmp:
+        ctx = _prepare_context(cfg, Path(tmp))
+        print(f"[OK] {sum(len(df) for df in ctx['frames'].values())} linha(s) em DRE/BPP/BPA")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        print(f"  {'etapa':26s} {'linhas':>9s} {'seg':>8s} {'linhas/s':>12s} {'pico MB':>9s}")
+        for name, prepare, fn in selected:
+            results[name] = r = measure(fn, prepare(ctx), repeat=repeat)
+            print(f"  {name:26s} {r['rows']:9d} {r['seconds']:8.3f} {r['rows_per_s'] or 0:12.0f} {r['peak_mb']:9.1f}")
+
+    report = {"config": asdict(cfg), "env": _environment(), "stages": results}
+    if json_out:
+        json_out.parent.mkdir(parents=True, exist_ok=True)
+        json_out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"[OK] Resultado salvo em {json_out}")
+
+    if save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"✅ Baseline gravada em {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"[AVISO] Sem baseline em {baseline_path}; rode com --save-baseline.")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("config") != asdict(cfg):
+        print("[AVISO] Configuração do gerador difere da baseline; comparação ignorada.")
+        return 0
+
+    problems = compare(results, baseline, tolerance=tolerance, mem_tolerance=mem_tolerance)
+    if problems:
+        for p in problems:
+            print(f"[ERRO] Regressão: {p}")
+        return 1
+    print(f"✅ Sem regressões (tolerância {tolerance:.0%} linhas/s, {mem_tolerance:.0%} memória)")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks de parse/extração CVM com DFP sintético")
+    parser.add_argument("--companies", type=int, default=SyntheticConfig.companies)
+    parser.add_argument("--depth", type=int, default=SyntheticConfig.depth)
+    parser.add_argument("--seed", type=int, default=SyntheticConfig.seed)
+    parser.add_argument("--stages", type=str, default=None, help="Etapas (separadas por vírgula)")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por etapa (vale a melhor)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como nova baseline")
+    parser.add_argument("--json", dest="json_out", type=Path, default=None, help="Grava o resultado em JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Queda máxima de linhas/s (default: 0.25)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.25, help="Aumento máximo de pico (default: 0.25)")
+    args = parser.parse_args()
+
+    sys.exit(
+        main(
+            cfg=SyntheticConfig(companies=args.companies, depth=args.depth, seed=args.seed),
+            stages=[s.strip() for s in args.stages.split(",") if s.strip()] if args.stages else None,
+            repeat=args.repeat,
+            baseline_path=args.baseline,
+            save_baseline=bool(args.save_baseline),
+            json_out=args.json_out,
+            tolerance=args.tolerance,
+            mem_tolerance=args.mem_tolerance,
+        )
+    )
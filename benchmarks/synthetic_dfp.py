@@ -0,0 +1,255 @@
+"""Gerador de ZIPs DFP/ITR sintéticos no layout dos arquivos da CVM (dados abertos).
+
+Produz `dfp_cia_aberta_{ano}.zip` com `*_DRE_con_*`, `*_BPP_con_*` e `*_BPA_con_*`:
+- CSV `;`, latin1, decimal `,` (mesmo formato lido por `CVMIntegration.download_demonstracoes`);
+- plano de contas com as contas padrão (1.01.01, 2.01.04, 2.02.01, 2.03, 3.11, ...) e uma
+  árvore de subcontas de profundidade configurável, com descrições acentuadas;
+- ÚLTIMO + PENÚLTIMO por conta, e parte das empresas com reapresentação (VERSAO 2);
+- no ITR, 3 trimestres e a DRE com linha do trimestre + acumulado (DT_INI_EXERC).
+
+Determinístico por `seed`. Uso:
+  python -m benchmarks.synthetic_dfp --companies 400 --depth 4 --out data/bench/dfp_cia_aberta_2024.zip
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+COLUMNS = [
+    "CNPJ_CIA",
+    "DT_REFER",
+    "VERSAO",
+    "DENOM_CIA",
+    "CD_CVM",
+    "GRUPO_DFP",
+    "MOEDA",
+    "ESCALA_MOEDA",
+    "ORDEM_EXERC",
+    "DT_INI_EXERC",
+    "DT_FIM_EXERC",
+    "CD_CONTA",
+    "DS_CONTA",
+    "VL_CONTA",
+    "ST_CONTA_FIXA",
+]
+
+# Contas de 1º/2º nível por demonstrativo (código, descrição). As contas padrão usadas pelo
+# resolver de métricas estão aqui; o restante da árvore é gerado.
+ROOT_ACCOUNTS: Dict[str, List[Tuple[str, str]]] = {
+    "BPA": [
+        ("1", "Ativo Total"),
+        ("1.01", "Ativo Circulante"),
+        ("1.01.01", "Caixa e Equivalentes de Caixa"),
+        ("1.01.02", "Aplicações Financeiras"),
+        ("1.01.03", "Contas a Receber"),
+        ("1.02", "Ativo Não Circulante"),
+        ("1.02.03", "Imobilizado"),
+    ],
+    "BPP": [
+        ("2", "Passivo Total"),
+        ("2.01", "Passivo Circulante"),
+        ("2.01.02", "Fornecedores"),
+        ("2.01.04", "Empréstimos e Financiamentos"),
+        ("2.02", "Passivo Não Circulante"),
+        ("2.02.01", "Empréstimos e Financiamentos"),
+        ("2.03", "Patrimônio Líquido Consolidado"),
+        ("2.03.01", "Capital Social Realizado"),
+    ],
+    "DRE": [
+        ("3.01", "Receita de Venda de Bens e/ou Serviços"),
+        ("3.02", "Custo dos Bens e/ou Serviços Vendidos"),
+        ("3.03", "Resultado Bruto"),
+        ("3.06", "Resultado Financeiro"),
+        ("3.08", "Imposto de Renda e Contribuição Social sobre o Lucro"),
+        ("3.11", "Lucro/Prejuízo Consolidado do Período"),
+        ("3.11.01", "Atribuído a Sócios da Empresa Controladora"),
+    ],
+}
+
+SUBACCOUNT_NAMES = [
+    "Debêntures",
+    "Arrendamento Mercantil",
+    "Dividendos e JCP a Pagar",
+    "Provisões Trabalhistas",
+    "Obrigações Fiscais",
+    "Tributos Diferidos",
+    "Juros sobre Capital Próprio",
+    "Operações Descontinuadas",
+    "Participação de Não Controladores",
+    "Ajustes de Avaliação Patrimonial",
+    "Créditos com Partes Relacionadas",
+    "Depósitos Judiciais",
+]
+
+NAME_PARTS = ["Energia", "Saneamento", "Telecomunicações", "Participações", "Seguridade", "Indústria", "Logística"]
+SECTORS = [
+    "Energia Elétrica",
+    "Saneamento, Serv. Água e Gás",
+    "Telecomunicações",
+    "Bancos",
+    "Seguradoras e Corretoras",
+    "Comércio (Atacado e Varejo)",
+    "Metalurgia e Siderurgia",
+]
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    companies: int = 300
+    depth: int = 4  # profundidade máxima do código (ex.: 4 => "2.01.04.01.02")
+    children: int = 3  # subcontas por nó gerado
+    restated_share: float = 0.15  # fração das empresas com VERSAO 2
+    year: int = 2024
+    doc_type: str = "DFP"
+    seed: int = 42
+
+
+def company_cnpjs(cfg: SyntheticConfig) -> List[str]:
+    """CNPJs (formatados como no CSV da CVM) das empresas geradas."""
+    rng = random.Random(cfg.seed)
+    out = []
+    for i in range(cfg.companies):
+        base = f"{rng.randrange(10**7, 10**8):08d}0001{i % 100:02d}"
+        out.append(f"{base[:2]}.{base[2:5]}.{base[5:8]}/{base[8:12]}-{base[12:14]}")
+    return out
+
+
+def company_names(cfg: SyntheticConfig) -> List[str]:
+    rng = random.Random(cfg.seed + 1)
+    return [
+        f"{rng.choice(NAME_PARTS).upper()} {rng.choice(NAME_PARTS).upper()} S.A. {i:04d}"
+        for i in range(cfg.companies)
+    ]
+
+
+def sectors(cfg: SyntheticConfig) -> List[Tuple[str, str]]:
+    """(setor CVM, razão social) por empresa, para o `BESSTClassifier`."""
+    rng = random.Random(cfg.seed + 2)
+    return [(rng.choice(SECTORS), name) for name in company_names(cfg)]
+
+
+def _accounts(statement: str, cfg: SyntheticConfig, rng: random.Random) -> List[Tuple[str, str]]:
+    accounts = list(ROOT_ACCOUNTS[statement])
+    frontier = [code for code, _ in accounts if code.count(".") >= 2]
+    while frontier:
+        code = frontier.pop()
+        if code.count(".") + 1 > cfg.depth:
+            continue
+        for j in range(1, cfg.children + 1):
+            child = f"{code}.{j:02d}"
+            accounts.append((child, rng.choice(SUBACCOUNT_NAMES)))
+            frontier.append(child)
+    return sorted(accounts, key=lambda a: [int(p) for p in a[0].split(".")])
+
+
+def _periods(cfg: SyntheticConfig) -> List[Tuple[str, str]]:
+    """(DT_REFER, DT_INI_EXERC do trimestre) por documento."""
+    y = cfg.year
+    if cfg.doc_type == "ITR":
+        return [(f"{y}-03-31", f"{y}-01-01"), (f"{y}-06-30", f"{y}-04-01"), (f"{y}-09-30", f"{y}-07-01")]
+    return [(f"{y}-12-31", f"{y}-01-01")]
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.2f}".replace(".", ",")
+
+
+def _rows(statement: str, cfg: SyntheticConfig) -> Iterator[List[str]]:
+    rng = random.Random(f"{cfg.seed}-{statement}")
+    accounts = _accounts(statement, cfg, rng)
+    grupo = {
+        "BPA": "DF Consolidado - Balanço Patrimonial Ativo",
+        "BPP": "DF Consolidado - Balanço Patrimonial Passivo",
+        "DRE": "DF Consolidado - Demonstração do Resultado",
+    }[statement]
+    for i, (cnpj, name) in enumerate(zip(company_cnpjs(cfg), company_names(cfg))):
+        versions = (1, 2) if rng.random() < cfg.restated_share else (1,)
+        for dt_refer, dt_ini_q in _periods(cfg):
+            for versao in versions:
+                for ordem, shift in (("ÚLTIMO", 0), ("PENÚLTIMO", 1)):
+                    fim = f"{int(dt_refer[:4]) - shift}{dt_refer[4:]}"
+                    inicios = [""]
+                    if statement == "DRE":
+                        inicios = [f"{int(dt_ini_q[:4]) - shift}{dt_ini_q[4:]}"]
+                        if cfg.doc_type == "ITR" and dt_ini_q[5:7] != "01":
+                            inicios.append(f"{int(dt_ini_q[:4]) - shift}-01-01")  # acumulado
+                    for ini in inicios:
+                        for code, desc in accounts:
+                            yield [
+                                cnpj,
+                                dt_refer,
+                                str(versao),
+                                name,
+                                str(1000 + i),
+                                grupo,
+                                "REAL",
+                                "MIL",
+                                ordem,
+                                ini,
+                                fim,
+                                code,
+                                desc,
+                                _fmt(rng.uniform(-5e5, 5e6)),
+                                "S" if code.count(".") <= 2 else "N",
+                            ]
+
+
+def build_zip(cfg: SyntheticConfig) -> Tuple[bytes, int]:
+    """(bytes do ZIP, total de linhas de dados)."""
+    prefix = cfg.doc_type.lower()
+    total = 0
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for statement in ("DRE", "BPP", "BPA"):
+            lines = [";".join(COLUMNS if statement == "DRE" else [c for c in COLUMNS if c != "DT_INI_EXERC"])]
+            for row in _rows(statement, cfg):
+                if statement != "DRE":
+                    row = row[:9] + row[10:]
+                lines.append(";".join(row))
+            total += len(lines) - 1
+            data = ("\n".join(lines) + "\n").encode("latin1")
+            z.writestr(f"{prefix}_cia_aberta_{statement}_con_{cfg.year}.csv", data)
+    return buf.getvalue(), total
+
+
+def write_zip(cfg: SyntheticConfig, out: Optional[Path] = None, *, cache_dir: Optional[Path] = None) -> Tuple[Path, int]:
+    """Grava o ZIP. Com `cache_dir`, usa o nome do cache do `CVMIntegration` (`dfp_2024.zip`)."""
+    content, total = build_zip(cfg)
+    if out is None:
+        base = cache_dir or Path("data/bench")
+        out = base / f"{cfg.doc_type.lower()}_{cfg.year}.zip"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_bytes(content)
+    return out, total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera um ZIP DFP/ITR sintético (layout CVM)")
+    parser.add_argument("--companies", type=int, default=SyntheticConfig.companies)
+    parser.add_argument("--depth", type=int, default=SyntheticConfig.depth)
+    parser.add_argument("--children", type=int, default=SyntheticConfig.children)
+    parser.add_argument("--restated-share", type=float, default=SyntheticConfig.restated_share)
+    parser.add_argument("--year", type=int, default=SyntheticConfig.year)
+    parser.add_argument("--doc-type", choices=("DFP", "ITR"), default="DFP")
+    parser.add_argument("--seed", type=int, default=SyntheticConfig.seed)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    cfg = SyntheticConfig(
+        companies=args.companies,
+        depth=args.depth,
+        children=args.children,
+        restated_share=args.restated_share,
+        year=args.year,
+        doc_type=args.doc_type,
+        seed=args.seed,
+    )
+    path, rows = write_zip(cfg, args.out)
+    print(f"[OK] {path}: {rows} linha(s), {path.stat().st_size / 1024 / 1024:.1f} MB")
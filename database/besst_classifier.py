@@ -4,9 +4,12 @@ Sistema de classificação de empresas por setor (BESST) na metodologia
 """
 
 import logging
-from typing import Optional, Dict, List
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 
+from integrations.text_normalize import fold
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,12 +91,12 @@ class BESSTClassifier:
         if not setor:
             return None
         
-        setor_lower = setor.lower().strip()
-        razao_lower = razao_social.lower().strip() if razao_social else ""
+        setor_lower = fold(setor)
+        razao_lower = fold(razao_social) if razao_social else ""
         
-        # Buscar match por keywords
-        for letra, config in cls.SETORES_KEYWORDS.items():
-            keywords = config['keywords']
+        # Buscar match por keywords (já sem acento: "elétrica" e "eletrica" viram uma só)
+        for letra, keywords in cls._keywords_normalizadas():
+            config = cls.SETORES_KEYWORDS[letra]
             
             for keyword in keywords:
                 # Verificar no setor
@@ -114,6 +117,15 @@ class BESSTClassifier:
         
         return None
     
+    @classmethod
+    @lru_cache(maxsize=1)
+    def _keywords_normalizadas(cls) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        """Keywords por setor normalizadas (fold) e sem duplicatas, na ordem original."""
+        return tuple(
+            (letra, tuple(dict.fromkeys(fold(k) for k in config['keywords'])))
+            for letra, config in cls.SETORES_KEYWORDS.items()
+        )
+    
     @classmethod
     def eh_besst(cls, setor: str, razao_social: str = None) -> bool:
         """Verifica se empresa está em setor BESST"""
@@ -0,0 +1,255 @@
+"""Parser da série histórica oficial da B3 (COTAHIST).
+
+Arquivos públicos (ZIP com 1 TXT de registros fixos de 245 bytes):
+- Anual:   https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_A2024.ZIP
+- Mensal:  .../COTAHIST_M012024.ZIP
+- Diário:  .../COTAHIST_D02012024.ZIP
+
+Layout (posições 1-based, ver "SeriesHistoricas_Layout.pdf" da B3):
+- TIPREG 01-02 ("00" header, "01" cotação, "99" trailer)
+- DATA 03-10 (AAAAMMDD), CODBDI 11-12, CODNEG 13-24, TPMERC 25-27
+- PREABE 57-69, PREMAX 70-82, PREMIN 83-95, PREMED 96-108, PREULT 109-121 (11V99)
+- TOTNEG 148-152, QUATOT 153-170, VOLTOT 171-188 (16V99)
+- FATCOT 211-217 (fator de cotação: preço por 1 ou por 1000 ações)
+
+O parse é vetorizado: o TXT é lido do ZIP em blocos de N registros e cada bloco vira
+um array NumPy com dtype estruturado (1 campo `S<n>` por coluna). Filtros (TIPREG,
+CODBDI, TPMERC, tickers) são feitos no array; só as linhas que passam viram dict.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+RECORD_LEN = 245
+
+# (campo, início 1-based, fim 1-based inclusivo)
+COTAHIST_LAYOUT: tuple[tuple[str, int, int], ...] = (
+    ("TIPREG", 1, 2),
+    ("DATA", 3, 10),
+    ("CODBDI", 11, 12),
+    ("CODNEG", 13, 24),
+    ("TPMERC", 25, 27),
+    ("NOMRES", 28, 39),
+    ("ESPECI", 40, 49),
+    ("PRAZOT", 50, 52),
+    ("MODREF", 53, 56),
+    ("PREABE", 57, 69),
+    ("PREMAX", 70, 82),
+    ("PREMIN", 83, 95),
+    ("PREMED", 96, 108),
+    ("PREULT", 109, 121),
+    ("PREOFC", 122, 134),
+    ("PREOFV", 135, 147),
+    ("TOTNEG", 148, 152),
+    ("QUATOT", 153, 170),
+    ("VOLTOT", 171, 188),
+    ("PREEXE", 189, 201),
+    ("INDOPC", 202, 202),
+    ("DATVEN", 203, 210),
+    ("FATCOT", 211, 217),
+    ("PTOEXE", 218, 230),
+    ("CODISI", 231, 242),
+    ("DISMES", 243, 245),
+)
+
+# BDI 02 = lote padrão; TPMERC 010 = mercado à vista.
+DEFAULT_BDI_CODES = ("02",)
+DEFAULT_MARKET_CODES = ("010",)
+
+
+def cotahist_dtype(newline_len: int) -> np.dtype:
+    """dtype estruturado para 1 registro (245 bytes + terminador de linha)."""
+    fields = [(name, f"S{end - start + 1}") for name, start, end in COTAHIST_LAYOUT]
+    if newline_len > 0:
+        fields.append(("_EOL", f"S{newline_len}"))
+    return np.dtype(fields)
+
+
+def _open_member(z: zipfile.ZipFile, member: Optional[str]) -> Any:
+    if member is None:
+        names = [n for n in z.namelist() if not n.endswith("/")]
+        if not names:
+            raise RuntimeError("ZIP COTAHIST vazio")
+        member = names[0]
+    return z.open(member)
+
+
+def _detect_newline_len(head: bytes) -> int:
+    if len(head) > RECORD_LEN and head[RECORD_LEN:RECORD_LEN + 2] == b"\r\n":
+        return 2
+    if len(head) > RECORD_LEN and head[RECORD_LEN:RECORD_LEN + 1] in (b"\n", b"\r"):
+        return 1
+    return 0
+
+
+def _iter_record_blocks(f: Any, *, chunk_records: int) -> Iterator[np.ndarray]:
+    head = f.read(RECORD_LEN + 2)
+    if not head:
+        return
+    newline_len = _detect_newline_len(head)
+    dtype = cotahist_dtype(newline_len)
+    rec_len = dtype.itemsize
+    chunk_records = max(1, int(chunk_records))
+
+    buf = head
+    while True:
+        need = rec_len * chunk_records - len(buf)
+        eof = False
+        if need > 0:
+            # Só é fim de arquivo se uma leitura foi tentada e não trouxe nada
+            data = f.read(need)
+            buf += data
+            eof = not data
+        n_full = len(buf) // rec_len
+        if eof and len(buf) % rec_len:
+            # Último registro sem terminador de linha (geralmente o trailer "99")
+            buf += b" " * (rec_len - len(buf) % rec_len)
+            n_full = len(buf) // rec_len
+        if n_full:
+            yield np.frombuffer(buf, dtype=dtype, count=n_full)
+            buf = buf[n_full * rec_len:]
+        if eof:
+            return
+
+
+def _num(arr: np.ndarray) -> np.ndarray:
+    """Campo numérico `S<n>` (dígitos com zeros à esquerda) -> float64."""
+    return arr.astype(np.int64).astype(np.float64)
+
+
+def iter_cotahist_rows(
+    path: str | Path,
+    *,
+    tickers: Optional[Iterable[str]] = None,
+    bdi_codes: Iterable[str] = DEFAULT_BDI_CODES,
+    market_codes: Iterable[str] = DEFAULT_MARKET_CODES,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    member: Optional[str] = None,
+    chunk_records: int = 100_000,
+    fonte: str = "b3_cotahist",
+) -> Iterator[List[Dict[str, Any]]]:
+    """Lê um ZIP (ou TXT) COTAHIST e produz lotes de linhas no formato da tabela `precos`.
+
+    Preços são escalados (2 casas decimais) e divididos por FATCOT (preço unitário).
+    `start_date`/`end_date` no formato YYYY-MM-DD filtram por pregão.
+    """
+    bdi = np.array([c.encode("ascii") for c in bdi_codes], dtype="S2")
+    mercado = np.array([c.encode("ascii") for c in market_codes], dtype="S3")
+    wanted = None
+    if tickers is not None:
+        wanted = np.array(
+            sorted({str(t).strip().upper().encode("ascii") for t in tickers if str(t).strip()}),
+            dtype="S12",
+        )
+    d0 = start_date.replace("-", "").encode("ascii") if start_date else None
+    d1 = end_date.replace("-", "").encode("ascii") if end_date else None
+
+    path = Path(path)
+    if zipfile.is_zipfile(path):
+        z = zipfile.ZipFile(path)
+        f = _open_member(z, member)
+    else:
+        z = None
+        f = path.open("rb")
+
+    try:
+        for block in _iter_record_blocks(f, chunk_records=chunk_records):
+            mask = block["TIPREG"] == b"01"
+            mask &= np.isin(block["CODBDI"], bdi)
+            mask &= np.isin(block["TPMERC"], mercado)
+            if d0 is not None:
+                mask &= block["DATA"] >= d0
+            if d1 is not None:
+                mask &= block["DATA"] <= d1
+            codneg = np.char.strip(block["CODNEG"])
+            if wanted is not None:
+                mask &= np.isin(codneg, wanted)
+            if not mask.any():
+                continue
+
+            sel = block[mask]
+            codneg = codneg[mask]
+            fator = _num(sel["FATCOT"])
+            fator[fator <= 0] = 1.0
+            scale = 100.0 * fator
+            fechamento = _num(sel["PREULT"]) / scale
+            abertura = _num(sel["PREABE"]) / scale
+            maxima = _num(sel["PREMAX"]) / scale
+            minima = _num(sel["PREMIN"]) / scale
+            volume = sel["QUATOT"].astype(np.int64)
+            datas = sel["DATA"]
+
+            rows: List[Dict[str, Any]] = []
+            for i in range(len(sel)):
+                close = round(float(fechamento[i]), 6)
+                if close <= 0:
+                    continue
+                d = datas[i].decode("ascii")
+                rows.append(
+                    {
+                        "ticker": codneg[i].decode("ascii"),
+                        "data": f"{d[0:4]}-{d[4:6]}-{d[6:8]}",
+                        "fechamento": close,
+                        "abertura": round(float(abertura[i]), 6),
+                        "maxima": round(float(maxima[i]), 6),
+                        "minima": round(float(minima[i]), 6),
+                        "volume": int(volume[i]),
+                        "moeda": "BRL",
+                        "fonte": fonte,
+                    }
+                )
+            if rows:
+                yield rows
+    finally:
+        f.close()
+        if z is not None:
+            z.close()
+
+
+def format_cotahist_record(
+    *,
+    data: str,
+    ticker: str,
+    fechamento: float,
+    abertura: Optional[float] = None,
+    maxima: Optional[float] = None,
+    minima: Optional[float] = None,
+    quantidade: int = 0,
+    codbdi: str = "02",
+    tpmerc: str = "010",
+    fatcot: int = 1,
+) -> bytes:
+    """Gera 1 registro COTAHIST (245 bytes, sem terminador). Útil para arquivos de exemplo."""
+
+    def _price(v: Optional[float]) -> str:
+        return f"{int(round((v if v is not None else fechamento) * 100 * fatcot)):013d}"
+
+    rec = bytearray(b" " * RECORD_LEN)
+
+    def _put(name: str, value: str) -> None:
+        for field, start, end in COTAHIST_LAYOUT:
+            if field == name:
+                width = end - start + 1
+                rec[start - 1:end] = value.encode("ascii")[:width].ljust(width)
+                return
+        raise KeyError(name)
+
+    _put("TIPREG", "01")
+    _put("DATA", data.replace("-", ""))
+    _put("CODBDI", codbdi)
+    _put("CODNEG", ticker.upper())
+    _put("TPMERC", tpmerc)
+    _put("PREABE", _price(abertura))
+    _put("PREMAX", _price(maxima))
+    _put("PREMIN", _price(minima))
+    _put("PREMED", _price(fechamento))
+    _put("PREULT", _price(fechamento))
+    _put("QUATOT", f"{int(quantidade):018d}")
+    _put("FATCOT", f"{int(fatcot):07d}")
+    return bytes(rec)
@@ -18,6 +18,14 @@ import logging
 from pathlib import Path
 import json
 
+from integrations.http_utils import (
+    build_async_client,
+    get_response_cache,
+    is_cacheable,
+    mount_shared_pool,
+    request_json_async,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,12 +52,51 @@ class BrapiIntegration:
             api_key: Token de autenticação (opcional para ações de teste)
         """
         self.api_key = api_key
-        self.session = requests.Session()
+        self.session = mount_shared_pool(requests.Session())
+        self._async_client: Any = None
         
         if api_key:
             self.session.headers.update({
                 'Authorization': f'Bearer {api_key}'
             })
+
+    async def _get_async(self, path: str, params: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+        """GET async (httpx) com retry/429 de `integrations.http_utils.request_json_async`."""
+        if self._async_client is None:
+            self._async_client = build_async_client(headers=dict(self.session.headers))
+        data = await request_json_async(
+            self._async_client,
+            "GET",
+            f"{self.BASE_URL}{path}",
+            params=params,
+            timeout_seconds=timeout,
+            cache=get_response_cache(),
+        )
+        if not isinstance(data, dict):
+            raise RuntimeError(f"Resposta inesperada Brapi: {type(data)}")
+        return data
+
+    def _cached_get(self, path: str, params: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+        """GET síncrono com o cache em disco de `integrations.http_utils` (se ativo)."""
+        url = f"{self.BASE_URL}{path}"
+        cache = get_response_cache()
+        key, ttl, cached = cache.lookup("GET", url, params) if cache else ("", 0, None)
+        if cached is not None:
+            return cached
+        
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        if cache is not None and ttl > 0 and is_cacheable(data):
+            cache.set(key, data, ttl=ttl, url=url)
+        return data
+
+    async def aclose(self) -> None:
+        """Fecha o client async (se criado)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
     
     def test_connection(self) -> Dict[str, Any]:
         """
@@ -109,28 +156,12 @@ class BrapiIntegration:
             >>> print(data['results'][0]['regularMarketPrice'])
             38.50
         """
-        if isinstance(tickers, list):
-            tickers = ','.join(tickers)
-        
-        params = {}
-        if fundamental:
-            params['fundamental'] = 'true'
-        if dividends:
-            params['dividends'] = 'true'
-        if modules:
-            params['modules'] = modules
+        tickers, params = self._quote_request(tickers, fundamental, dividends, modules)
         
         try:
             logger.info(f"Buscando cotação: {tickers}")
             
-            response = self.session.get(
-                f"{self.BASE_URL}/quote/{tickers}",
-                params=params,
-                timeout=15
-            )
-            
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached_get(f"/quote/{tickers}", params, 15)
             
             logger.info(f"✅ {len(data.get('results', []))} cotações recebidas")
             return data
@@ -146,6 +177,36 @@ class BrapiIntegration:
             logger.error(f"❌ Erro ao buscar cotação: {e}")
             raise
     
+    @staticmethod
+    def _quote_request(
+        tickers: str | List[str],
+        fundamental: bool,
+        dividends: bool,
+        modules: Optional[str],
+    ) -> tuple[str, Dict[str, Any]]:
+        if isinstance(tickers, list):
+            tickers = ','.join(tickers)
+        
+        params: Dict[str, Any] = {}
+        if fundamental:
+            params['fundamental'] = 'true'
+        if dividends:
+            params['dividends'] = 'true'
+        if modules:
+            params['modules'] = modules
+        return tickers, params
+
+    async def get_quote_async(
+        self,
+        tickers: str | List[str],
+        fundamental: bool = False,
+        dividends: bool = False,
+        modules: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Versão async de `get_quote` (para fan-out com `gather_bounded`)."""
+        tickers, params = self._quote_request(tickers, fundamental, dividends, modules)
+        return await self._get_async(f"/quote/{tickers}", params, 15)
+    
     def get_quote_list(self, limit: int = 100, sortBy: str = 'name', sortOrder: str = 'asc') -> Dict[str, Any]:
         """
         Lista todas as ações disponíveis
@@ -207,18 +268,15 @@ class BrapiIntegration:
         try:
             logger.info(f"Buscando histórico: {ticker} ({range_period}, {interval})")
             
-            response = self.session.get(
-                f"{self.BASE_URL}/quote/{ticker}",
-                params={
+            data = self._cached_get(
+                f"/quote/{ticker}",
+                {
                     'range': range_period,
                     'interval': interval
                 },
-                timeout=20
+                20,
             )
             
-            response.raise_for_status()
-            data = response.json()
-            
             historical = data['results'][0].get('historicalDataPrice', [])
             logger.info(f"✅ {len(historical)} pontos históricos recebidos")
             
@@ -228,6 +286,19 @@ class BrapiIntegration:
             logger.error(f"❌ Erro ao buscar histórico: {e}")
             raise
     
+    async def get_historical_data_async(
+        self,
+        ticker: str,
+        range_period: str = '1mo',
+        interval: str = '1d'
+    ) -> Dict[str, Any]:
+        """Versão async de `get_historical_data`."""
+        return await self._get_async(
+            f"/quote/{ticker}",
+            {'range': range_period, 'interval': interval},
+            20,
+        )
+    
     def parse_quote_to_dict(self, quote_data: Dict) -> Dict[str, Any]:
         """
         Converte resposta da API para formato do banco de dados
@@ -2,17 +2,24 @@
 Integração CVM - Dados Abertos
 Baixa e processa dados oficiais da Comissão de Valores Mobiliários
 Sem necessidade de API key - dados públicos via HTTP
+
+pandas e requests são importados dentro dos métodos: quem só importa a classe (ex.:
+`MasterIntegrator` em `reconcile_precos`) não paga ~0,5 s de pandas na inicialização.
 """
 
-import requests
+from __future__ import annotations
+
 import zipfile
-import pandas as pd
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 import logging
 from datetime import datetime
-import re
+
+from integrations.http_utils import HttpConfig, build_async_client, request_async
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,7 @@ class CVMIntegration:
     """
     
     BASE_URL = "https://dados.cvm.gov.br/dados"
+    DOC_TYPES = ("DFP", "ITR")
     CADASTRO_URL = "https://dados.cvm.gov.br/dataset/cia_aberta-cad/resource/2391143f-1423-48a5-9f6a-423245aca362/download/cad_cia_aberta.csv"
     
     def __init__(self, cache_dir: str = "data/cvm"):
@@ -44,6 +52,8 @@ class CVMIntegration:
         Returns:
             DataFrame com dados cadastrais (CNPJ, razão social, código CVM, setor)
         """
+        import pandas as pd
+
         logger.info("Baixando cadastro de companhias abertas da CVM...")
         
         try:
@@ -67,13 +77,14 @@ class CVMIntegration:
             logger.error(f"❌ Erro ao baixar cadastro: {e}")
             raise
     
-    def download_dfp(self, year: int) -> Dict[str, pd.DataFrame]:
+    def download_dfp(self, year: int, statements: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
         """
         Baixa Demonstrações Financeiras Padronizadas (DFP) de um ano
         Atualização: Anual (prazo: até 31/03 do ano seguinte)
         
         Args:
             year: Ano fiscal (ex: 2024)
+            statements: Demonstrações a extrair (default: todas abaixo)
             
         Returns:
             Dicionário com DataFrames das demonstrações:
@@ -85,18 +96,53 @@ class CVMIntegration:
             - 'DMPL': Demonstração Mutações PL
             - 'DVA': Demonstração Valor Adicionado
         """
-        logger.info(f"Baixando DFP {year} da CVM...")
+        return self.download_demonstracoes(year, doc_type="DFP", statements=statements)
+    
+    def download_itr(self, year: int, statements: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Baixa Informações Trimestrais (ITR) de um ano (1º ao 3º trimestre)
+        Atualização: Trimestral (o 4º trimestre vem na DFP)
+        
+        Mesmas chaves de `download_dfp`. Na DRE do ITR cada conta aparece para o
+        trimestre e para o acumulado do ano (`DT_INI_EXERC` diferente).
+        """
+        return self.download_demonstracoes(year, doc_type="ITR", statements=statements)
+    
+    def download_demonstracoes(
+        self,
+        year: int,
+        *,
+        doc_type: str = "DFP",
+        statements: Optional[List[str]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Baixa (ou lê do cache) o ZIP anual de DFP/ITR e extrai as demonstrações consolidadas
+        
+        Args:
+            year: Ano fiscal (ex: 2024)
+            doc_type: "DFP" (anual) ou "ITR" (trimestral)
+            statements: Demonstrações a extrair (ex: ["DRE", "BPP", "BPA"]; default: todas)
+        """
+        import pandas as pd
+        import requests
+
+        doc_type = str(doc_type).upper()
+        if doc_type not in self.DOC_TYPES:
+            raise ValueError(f"doc_type inválido: {doc_type} (use DFP|ITR)")
+        prefix = doc_type.lower()
+        
+        logger.info(f"Baixando {doc_type} {year} da CVM...")
         
         # URL do arquivo ZIP
-        url = f"{self.BASE_URL}/CIA_ABERTA/DOC/DFP/DADOS/dfp_cia_aberta_{year}.zip"
+        url = f"{self.BASE_URL}/CIA_ABERTA/DOC/{doc_type}/DADOS/{prefix}_cia_aberta_{year}.zip"
 
         # Cache local (DFP é anual e não muda frequentemente)
-        cache_file = self.cache_dir / f"dfp_{year}.zip"
+        cache_file = self.cache_dir / f"{prefix}_{year}.zip"
         
         try:
             content: bytes
             if cache_file.exists() and cache_file.stat().st_size > 0:
-                logger.info(f"Usando cache local do DFP: {cache_file}")
+                logger.info(f"Usando cache local do {doc_type}: {cache_file}")
                 content = cache_file.read_bytes()
             else:
                 # Download do ZIP
@@ -123,9 +169,11 @@ class CVMIntegration:
                     'DMPL': 'DMPL_con',
                     'DVA': 'DVA_con'
                 }
+                if statements:
+                    docs = {k: v for k, v in docs.items() if k in set(statements)}
                 
                 for doc_name, file_prefix in docs.items():
-                    filename = f'dfp_cia_aberta_{file_prefix}_{year}.csv'
+                    filename = f'{prefix}_cia_aberta_{file_prefix}_{year}.csv'
                     
                     if filename in available_files:
                         try:
@@ -137,7 +185,8 @@ class CVMIntegration:
                                     encoding='latin1',
                                     decimal=',',
                                     thousands='.',
-                                    dtype={'CNPJ_CIA': str}  # CNPJ como string
+                                    # CNPJ e CD_CONTA como string ("3.11" viraria 311 com thousands='.')
+                                    dtype={'CNPJ_CIA': str, 'CD_CONTA': str}
                                 )
                                 demonstracoes[doc_name] = df
                                 logger.info(f"  ✅ {doc_name}: {len(df)} linhas")
@@ -152,16 +201,46 @@ class CVMIntegration:
                 with open(cache_file, 'wb') as f:
                     f.write(content)
             
-            logger.info(f"✅ DFP {year} processado: {len(demonstracoes)} demonstrações")
+            logger.info(f"✅ {doc_type} {year} processado: {len(demonstracoes)} demonstrações")
             return demonstracoes
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"❌ Erro ao baixar DFP {year}: {e}")
+            logger.error(f"❌ Erro ao baixar {doc_type} {year}: {e}")
             raise
         except zipfile.BadZipFile as e:
             logger.error(f"❌ Arquivo ZIP corrompido: {e}")
             raise
     
+    async def download_dfp_async(self, year: int, client=None) -> Dict[str, pd.DataFrame]:
+        """
+        Versão async de `download_dfp`: baixa o ZIP via httpx (com retry) para o cache
+        local e faz o parse em thread (pandas é bloqueante).
+        
+        Args:
+            year: Ano fiscal (ex: 2024)
+            client: `httpx.AsyncClient` compartilhado (opcional)
+        """
+        url = f"{self.BASE_URL}/CIA_ABERTA/DOC/DFP/DADOS/dfp_cia_aberta_{year}.zip"
+        cache_file = self.cache_dir / f"dfp_{year}.zip"
+        
+        if not (cache_file.exists() and cache_file.stat().st_size > 0):
+            cfg = HttpConfig(timeout_seconds=300, retries_total=3)
+            own_client = client is None
+            client = client or build_async_client(config=cfg)
+            try:
+                response = await request_async(client, "GET", url, timeout_seconds=300, config=cfg)
+            finally:
+                if own_client:
+                    await client.aclose()
+            tmp_file = cache_file.with_suffix(".zip.part")
+            tmp_file.write_bytes(response.content)
+            tmp_file.replace(cache_file)
+            logger.info(f"✅ ZIP baixado: {len(response.content) / 1024 / 1024:.1f} MB")
+        
+        import asyncio
+
+        return await asyncio.to_thread(self.download_dfp, year)
+    
     def extrair_dividendos(self, df_dre: pd.DataFrame) -> pd.DataFrame:
         """
         Extrai informações de dividendos da DRE
@@ -178,6 +257,8 @@ class CVMIntegration:
             - JCP (juros sobre capital próprio)
             - PROVENTOS_TOTAL (dividendos + JCP)
         """
+        import pandas as pd
+
         logger.info("Extraindo dividendos da DRE...")
         
         # Filtrar contas relacionadas a dividendos e JCP
@@ -221,6 +302,8 @@ class CVMIntegration:
             - DT_REFER
             - PATRIMONIO_LIQUIDO
         """
+        import pandas as pd
+
         logger.info("Extraindo Patrimônio Líquido do BPP...")
         
         # Procurar conta "Patrimônio Líquido"
@@ -266,14 +349,18 @@ class CVMIntegration:
         - soma os valores desse nível agregado por empresa/data
         """
 
+        import pandas as pd
+
+        from integrations.cvm_metric_resolver import keyword_mask
+
         if df is None or len(df) == 0:
             return pd.DataFrame(columns=["CNPJ_CIA", "DENOM_CIA", "DT_REFER", output_col])
 
-        pattern = "|".join(re.escape(k) for k in keywords if k)
-        if not pattern:
+        if not any(k for k in keywords):
             return pd.DataFrame(columns=["CNPJ_CIA", "DENOM_CIA", "DT_REFER", output_col])
 
-        mask = df["DS_CONTA"].astype(str).str.lower().str.contains(pattern, case=False, na=False)
+        # Normaliza (minúsculas/sem acento) 1x por DS_CONTA distinto; 1 regex por chamada.
+        mask = keyword_mask(df["DS_CONTA"], keywords)
         d = df[mask].copy()
         if len(d) == 0:
             return pd.DataFrame(columns=["CNPJ_CIA", "DENOM_CIA", "DT_REFER", output_col])
@@ -417,6 +504,8 @@ class CVMIntegration:
             Dict com status e informações
         """
         try:
+            import requests
+
             # Testar download do cadastro (arquivo pequeno)
             response = requests.head(self.CADASTRO_URL, timeout=10)
             response.raise_for_status()
@@ -0,0 +1,303 @@
+"""Resolver de métricas dos demonstrativos CVM por código de conta (CD_CONTA).
+
+O plano de contas padronizado da CVM fixa os códigos das contas principais no DFP
+consolidado (ex.: 2.03 = Patrimônio Líquido, 3.11 = Lucro/Prejuízo do Período,
+1.01.01 = Caixa e Equivalentes). Em vez de varrer DS_CONTA com keywords para cada
+empresa e cada métrica, o resolver:
+
+1. normaliza cada demonstrativo UMA vez (todas as empresas; ver `cvm_statements`);
+2. resolve por código: `cd_conta` -> métrica via dicionário pré-compilado (lookup O(1));
+3. só para (empresa, data, métrica) sem conta padrão (ex.: layout de bancos/seguradoras),
+   cai no fallback por keyword: DS_CONTA é normalizado (`text_normalize.fold`) uma vez
+   por texto DISTINTO e testado contra 1 regex pré-compilada por métrica; o nível mais
+   agregado é escolhido pela profundidade do código, calculada uma vez por linha.
+
+`CodeTrie` indexa os códigos por segmento ("2.01.04" -> 2 -> 01 -> 04) para checar
+rapidamente se uma conta é a própria conta padrão ou uma subconta dela.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+import pandas as pd
+
+from integrations.cvm_statements import normalize_statement_frame
+from integrations.text_normalize import fold, map_unique
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    name: str
+    statement: str
+    codes: Tuple[str, ...] = ()
+    keywords: Tuple[str, ...] = ()
+    # "min_depth": soma só o nível mais agregado entre as linhas casadas (evita dupla contagem)
+    # "sum": soma todas as linhas casadas
+    aggregate: str = "min_depth"
+
+
+DEFAULT_METRICS: Tuple[MetricSpec, ...] = (
+    MetricSpec("patrimonio_liquido", "BPP", ("2.03",), ("patrimonio liquido",)),
+    MetricSpec(
+        "lucro_liquido",
+        "DRE",
+        ("3.11",),
+        (
+            "consolidado do periodo",
+            "consolidado do exercicio",
+            "lucro liquido",
+            "resultado liquido",
+            "lucro atribuivel",
+        ),
+    ),
+    MetricSpec("caixa_equivalentes", "BPA", ("1.01.01",), ("caixa", "equival")),
+    MetricSpec(
+        "divida_bruta",
+        "BPP",
+        ("2.01.04", "2.02.01"),
+        ("emprest", "financi", "debent", "arrend", "leasing", "capta"),
+    ),
+    # Sem conta padrão: sempre por keyword (mesma regra de `CVMIntegration.extrair_dividendos`).
+    MetricSpec(
+        "proventos_total_keywords",
+        "DRE",
+        (),
+        ("dividendo", "jcp", "juros sobre capital"),
+        aggregate="sum",
+    ),
+)
+
+
+@lru_cache(maxsize=1024)
+def compile_keywords(keywords: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """1 regex (alternância) para uma lista de keywords, já normalizadas."""
+    folded = sorted({fold(k) for k in keywords if k and str(k).strip()})
+    if not folded:
+        return None
+    return re.compile("|".join(re.escape(k) for k in folded))
+
+
+def keyword_mask(ds_conta: pd.Series, keywords: Sequence[str]) -> pd.Series:
+    """Máscara booleana: DS_CONTA contém alguma keyword (normalização 1x por texto distinto)."""
+    pattern = compile_keywords(tuple(keywords))
+    if pattern is None or len(ds_conta) == 0:
+        return pd.Series(False, index=ds_conta.index)
+    hits = map_unique(ds_conta.astype(str), lambda u: bool(pattern.search(fold(u))), na_value=False)
+    return hits.astype(bool)
+
+
+def code_depth(cd_conta: pd.Series) -> pd.Series:
+    return cd_conta.astype(str).str.count(r"\.")
+
+
+class CodeTrie:
+    """Trie de códigos de conta por segmento -> métrica."""
+
+    def __init__(self) -> None:
+        self._root: Dict[str, Any] = {}
+
+    def add(self, code: str, value: str) -> None:
+        node = self._root
+        for part in code.split("."):
+            node = node.setdefault(part, {})
+        node[""] = value
+
+    def match(self, code: str) -> Optional[str]:
+        """Métrica da conta exata (None se não for uma conta padrão)."""
+        node = self._root
+        for part in str(code).split("."):
+            node = node.get(part)
+            if node is None:
+                return None
+        return node.get("")
+
+    def covering_code(self, code: str) -> Optional[str]:
+        """Conta padrão mais específica que é o próprio código ou um ancestral dele."""
+        node = self._root
+        path: List[str] = []
+        found = None
+        for part in str(code).split("."):
+            node = node.get(part)
+            if node is None:
+                break
+            path.append(part)
+            if "" in node:
+                found = ".".join(path)
+        return found
+
+    def covers(self, code: str) -> Optional[str]:
+        """Métrica da conta padrão que é o próprio código ou um ancestral dele."""
+        node = self._root
+        found = None
+        for part in str(code).split("."):
+            node = node.get(part)
+            if node is None:
+                break
+            found = node.get("", found)
+        return found
+
+
+class MetricResolver:
+    """Resolve todas as métricas, de todas as empresas, em 1 passada por demonstrativo."""
+
+    def __init__(self, metrics: Iterable[MetricSpec] = DEFAULT_METRICS) -> None:
+        self.metrics: Tuple[MetricSpec, ...] = tuple(metrics)
+        self.by_statement: Dict[str, List[MetricSpec]] = {}
+        # statement -> {cd_conta: métrica} (dict pré-compilado para `Series.map`)
+        self.code_maps: Dict[str, Dict[str, str]] = {}
+        self.tries: Dict[str, CodeTrie] = {}
+        for spec in self.metrics:
+            self.by_statement.setdefault(spec.statement, []).append(spec)
+            trie = self.tries.setdefault(spec.statement, CodeTrie())
+            for code in spec.codes:
+                self.code_maps.setdefault(spec.statement, {})[code] = spec.name
+                trie.add(code, spec.name)
+            compile_keywords(spec.keywords)
+
+    def _resolve_statement(self, norm: pd.DataFrame, statement: str) -> pd.DataFrame:
+        """Valores longos: cnpj, dt_refer, metric, value, method."""
+        specs = self.by_statement.get(statement) or []
+        if not specs or len(norm) == 0:
+            return pd.DataFrame(columns=["cnpj", "dt_refer", "metric", "value", "method"])
+
+        # Última versão de cada documento (cnpj, data).
+        last = norm.groupby(["cnpj", "dt_refer"])["versao"].transform("max")
+        norm = norm[norm["versao"] == last]
+
+        parts: List[pd.DataFrame] = []
+
+        code_map = self.code_maps.get(statement) or {}
+        if code_map:
+            # Conta padrão de cada linha: o próprio código ou o ancestral padrão (trie resolvida
+            # 1x por código distinto).
+            trie = self.tries[statement]
+            codes, uniques = pd.factorize(norm["cd_conta"], sort=False)
+            std = pd.Series([trie.covering_code(u) for u in uniques] + [None], dtype=object).to_numpy()[codes]
+            lines = norm.assign(std_code=std)[pd.notna(std)].dropna(subset=["vl_conta"])
+            is_std = (lines["cd_conta"] == lines["std_code"]).to_numpy()
+            direct = lines[is_std].assign(method="codigo")
+
+            # Conta padrão ausente mas com subcontas publicadas: soma o nível mais agregado
+            # das subcontas. Vale por conta padrão, não por métrica: em `divida_bruta`
+            # (2.01.04 + 2.02.01) um pai publicado não esconde as subcontas do outro.
+            sub = lines[~is_std]
+            if len(sub):
+                done = set(zip(direct["cnpj"], direct["dt_refer"], direct["std_code"]))
+                keep = [k not in done for k in zip(sub["cnpj"], sub["dt_refer"], sub["std_code"])]
+                sub = sub[keep]
+            if len(sub):
+                sub = sub.assign(depth=code_depth(sub["cd_conta"]))
+                min_depth = sub.groupby(["cnpj", "dt_refer", "std_code"])["depth"].transform("min")
+                sub = sub[sub["depth"] == min_depth].assign(method="codigo_subcontas")
+
+            picked = pd.concat([direct, sub], ignore_index=True) if len(sub) else direct
+            picked = picked.assign(metric=picked["std_code"].map(code_map))
+            # 1 linha por métrica; "codigo_subcontas" (> "codigo") se alguma parte veio de subcontas
+            by_code = picked.groupby(["cnpj", "dt_refer", "metric"], as_index=False).agg(
+                value=("vl_conta", "sum"), method=("method", "max")
+            )
+            parts.append(by_code)
+        else:
+            by_code = pd.DataFrame(columns=["cnpj", "dt_refer", "metric", "value"])
+
+        resolved = set(zip(by_code["cnpj"], by_code["dt_refer"], by_code["metric"]))
+        depth = code_depth(norm["cd_conta"])
+        for spec in specs:
+            if not spec.keywords:
+                continue
+            mask = keyword_mask(norm["ds_conta"], spec.keywords)
+            cand = norm[mask & norm["vl_conta"].notna()].assign(depth=depth[mask])
+            if resolved and spec.codes:
+                keep = [
+                    (c, d, spec.name) not in resolved for c, d in zip(cand["cnpj"], cand["dt_refer"])
+                ]
+                cand = cand[keep]
+            if len(cand) == 0:
+                continue
+            if spec.aggregate == "min_depth":
+                min_depth = cand.groupby(["cnpj", "dt_refer"])["depth"].transform("min")
+                cand = cand[cand["depth"] == min_depth]
+            by_kw = (
+                cand.groupby(["cnpj", "dt_refer"], as_index=False)["vl_conta"]
+                .sum()
+                .rename(columns={"vl_conta": "value"})
+            )
+            by_kw["metric"] = spec.name
+            by_kw["method"] = "keyword"
+            parts.append(by_kw)
+
+        if not parts:
+            return pd.DataFrame(columns=["cnpj", "dt_refer", "metric", "value", "method"])
+        return pd.concat(parts, ignore_index=True)
+
+    def resolve_frames(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Frames crus da CVM (`download_dfp`) -> tabela longa (cnpj, dt_refer, metric, value, method)."""
+        parts = []
+        for statement in self.by_statement:
+            df = frames.get(statement)
+            if df is None:
+                continue
+            parts.append(self._resolve_statement(normalize_statement_frame(df), statement))
+        if not parts:
+            return pd.DataFrame(columns=["cnpj", "dt_refer", "metric", "value", "method"])
+        return pd.concat(parts, ignore_index=True)
+
+    def resolve_to_dict(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+        """cnpj -> {dt_refer, <métrica>: valor, ...} usando a DT_REFER mais recente de cada empresa."""
+        long = self.resolve_frames(frames)
+        out: Dict[str, Dict[str, Any]] = {}
+        if len(long) == 0:
+            return out
+        latest = long.groupby("cnpj")["dt_refer"].transform("max")
+        long = long[long["dt_refer"] == latest]
+        for cnpj, dt_refer, metric, value in zip(long["cnpj"], long["dt_refer"], long["metric"], long["value"]):
+            entry = out.setdefault(cnpj, {"dt_refer": dt_refer})
+            entry[metric] = float(value)
+        return out
+
+
+def resolve_rows(
+    rows: Sequence[Dict[str, Any]],
+    *,
+    keywords: Sequence[str],
+    codes: Sequence[str] = (),
+) -> Optional[float]:
+    """Versão para listas de dicts (payload JSON): código padrão primeiro, depois keyword/min-depth."""
+    # Comparativo do exercício anterior tem a mesma DT_REFER/CD_CONTA: fica de fora.
+    rows = [r for r in rows if "PEN" not in str(r.get("ORDEM_EXERC") or "").upper()]
+    if codes:
+        wanted = set(codes)
+        hits = [r for r in rows if str(r.get("CD_CONTA") or "").strip() in wanted]
+        values = [_as_float(r.get("VL_CONTA")) for r in hits]
+        values = [v for v in values if v is not None]
+        if values:
+            return float(sum(values))
+
+    pattern = compile_keywords(tuple(keywords))
+    if pattern is None:
+        return None
+    matched: List[Tuple[int, Optional[float]]] = []
+    for r in rows:
+        ds = r.get("DS_CONTA")
+        if not ds or not pattern.search(fold(str(ds))):
+            continue
+        cd = str(r.get("CD_CONTA") or "").strip()
+        matched.append((cd.count(".") if cd else 999, _as_float(r.get("VL_CONTA"))))
+    if not matched:
+        return None
+    min_depth = min(d for d, _ in matched)
+    values = [v for d, v in matched if d == min_depth and v is not None]
+    return float(sum(values)) if values else None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except Exception:
+        return None
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import csv
 import io
+import logging
 import zipfile
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator, Optional, Sequence
 
-import requests
+logger = logging.getLogger(__name__)
 
 
 def _normalize_cnpj(cnpj: str) -> str:
@@ -28,6 +29,40 @@ def _safe_text(value: object) -> str:
     return "" if text in ("nan", "NaN", "None") else text
 
 
+def _fmt_phone(prefix_ddi: object, prefix_ddd: object, number: object) -> str:
+    ddi = _safe_text(prefix_ddi)
+    ddd = _safe_text(prefix_ddd)
+    num = _safe_text(number)
+    parts = []
+    if ddi:
+        parts.append(f"+{ddi}")
+    if ddd:
+        parts.append(f"({ddd})")
+    if num:
+        parts.append(num)
+    return " ".join(parts).strip()
+
+
+# Colunas lidas de cada CSV do FCA (projeção por índice; as demais ~20-30 colunas de cada
+# arquivo nem viram string no dict). Colunas ausentes no cabeçalho são ignoradas.
+_FCA_RANK_COLUMNS = ("CNPJ_Companhia", "Data_Referencia", "Versao", "ID_Documento", "Nome_Companhia")
+_PHONE_COLUMNS = ("DDI_Telefone", "DDD_Telefone", "Telefone")
+
+FCA_FILES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "canal": ("fca_cia_aberta_canal_divulgacao_{year}.csv", _FCA_RANK_COLUMNS + ("Canal_Divulgacao",)),
+    "dept": ("fca_cia_aberta_departamento_acionistas_{year}.csv", _FCA_RANK_COLUMNS + ("Contato", "Email") + _PHONE_COLUMNS),
+    "dri": ("fca_cia_aberta_dri_{year}.csv", _FCA_RANK_COLUMNS + ("Responsavel", "Email") + _PHONE_COLUMNS),
+    "endereco": (
+        "fca_cia_aberta_endereco_{year}.csv",
+        _FCA_RANK_COLUMNS + ("Logradouro", "Complemento", "Bairro", "Cidade", "Sigla_UF", "Pais", "CEP"),
+    ),
+}
+
+# FRE: índice de entregas do ZIP (1 linha por documento/versão), no layout CNPJ_CIA/DT_REFER/VERSAO.
+FRE_INDEX_FILE = "fre_cia_aberta_{year}.csv"
+FRE_INDEX_COLUMNS = ("CNPJ_CIA", "DT_REFER", "VERSAO", "DENOM_CIA", "CD_CVM", "ID_DOC", "DT_RECEB", "LINK_DOC")
+
+
 @dataclass(frozen=True)
 class CvmRiSnapshot:
     cnpj: str
@@ -44,32 +79,65 @@ class CVMRiIntegration:
     - https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FCA/DADOS/
     - https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FRE/DADOS/
 
-    MVP: FCA (dri, departamento_acionistas, endereco, canal_divulgacao).
+    FCA: dri, departamento_acionistas, endereco, canal_divulgacao.
+    FRE: última entrega (data/versão/link do documento) por CNPJ, a partir do índice do ZIP.
+
+    Os CSVs são lidos em streaming (`TextIOWrapper` sobre o membro do ZIP), sem decodificar
+    o arquivo inteiro, e cada linha só carrega as colunas projetadas.
     """
 
     FCA_BASE = "https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FCA/DADOS"
+    FRE_BASE = "https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FRE/DADOS"
 
     def __init__(self, *, timeout_seconds: int = 180) -> None:
         self._timeout_seconds = int(timeout_seconds)
 
-    def download_fca_zip(self, year: int) -> bytes:
-        url = f"{self.FCA_BASE}/fca_cia_aberta_{int(year)}.zip"
+    def _download(self, url: str) -> bytes:
+        import requests
+
         resp = requests.get(url, timeout=self._timeout_seconds)
         resp.raise_for_status()
         return resp.content
 
-    def _iter_csv_rows(self, z: zipfile.ZipFile, filename: str) -> Iterable[dict[str, str]]:
-        with z.open(filename) as f:
-            raw = f.read()
-        # CVM normalmente usa latin1 e separador ;
-        text = raw.decode("latin1", errors="replace")
-        reader = csv.DictReader(io.StringIO(text), delimiter=";")
-        for row in reader:
-            if not isinstance(row, dict):
-                continue
-            yield {str(k).strip(): _safe_text(v) for k, v in row.items() if k is not None}
-
-    def _pick_latest_by_cnpj(self, rows: Iterable[dict[str, str]], *, cnpj_key: str) -> dict[str, dict[str, str]]:
+    def download_fca_zip(self, year: int) -> bytes:
+        return self._download(f"{self.FCA_BASE}/fca_cia_aberta_{int(year)}.zip")
+
+    def download_fre_zip(self, year: int) -> bytes:
+        return self._download(f"{self.FRE_BASE}/fre_cia_aberta_{int(year)}.zip")
+
+    def _iter_csv_rows(
+        self,
+        z: zipfile.ZipFile,
+        filename: str,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[dict[str, str]]:
+        """Itera as linhas do CSV (latin1, `;`) lendo o membro incrementalmente.
+
+        Com `columns`, só essas colunas (se existirem no cabeçalho) entram no dict.
+        """
+        with z.open(filename) as raw, io.TextIOWrapper(raw, encoding="latin1", errors="replace", newline="") as f:
+            reader = csv.reader(f, delimiter=";")
+            header = next(reader, None)
+            if not header:
+                return
+            index = {str(h).strip(): i for i, h in enumerate(header)}
+            names = index if columns is None else [c for c in columns if c in index]
+            picks = [(name, index[name]) for name in names]
+
+            for row in reader:
+                if not row:
+                    continue
+                n = len(row)
+                yield {name: (_safe_text(row[i]) if i < n else "") for name, i in picks}
+
+    def _pick_latest_by_cnpj(
+        self,
+        rows: Iterable[dict[str, str]],
+        *,
+        cnpj_key: str,
+        ref_key: str = "Data_Referencia",
+        ver_key: str = "Versao",
+    ) -> dict[str, dict[str, str]]:
         best: dict[str, dict[str, str]] = {}
         best_rank: dict[str, tuple[str, int]] = {}
 
@@ -77,8 +145,8 @@ class CVMRiIntegration:
             cnpj = _normalize_cnpj(r.get(cnpj_key, ""))
             if not cnpj:
                 continue
-            ref = _safe_text(r.get("Data_Referencia"))
-            ver = _safe_int(r.get("Versao"))
+            ref = _safe_text(r.get(ref_key))
+            ver = _safe_int(r.get(ver_key))
 
             rank = (ref, ver)
             prev = best_rank.get(cnpj)
@@ -88,40 +156,77 @@ class CVMRiIntegration:
 
         return best
 
-    def load_fca_snapshots(self, year: int) -> list[CvmRiSnapshot]:
-        data = self.download_fca_zip(int(year))
-        z = zipfile.ZipFile(io.BytesIO(data))
-
-        files = {
-            "canal": f"fca_cia_aberta_canal_divulgacao_{int(year)}.csv",
-            "dept": f"fca_cia_aberta_departamento_acionistas_{int(year)}.csv",
-            "dri": f"fca_cia_aberta_dri_{int(year)}.csv",
-            "endereco": f"fca_cia_aberta_endereco_{int(year)}.csv",
-        }
+    def _iter_year_zips(self, years: Iterable[int], download: Any) -> Iterator[tuple[int, zipfile.ZipFile]]:
+        """Baixa e abre os ZIPs sob demanda, um ano por vez (sem manter todos em memória).
+
+        Ano sem arquivo publicado (404, ex.: ano corrente em janeiro) é pulado com aviso; quem
+        chama só falha se nenhum ano trouxer os CSVs esperados.
+        """
+        import requests
+
+        for year in sorted({int(y) for y in years}):
+            try:
+                data = download(year)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                logger.warning("CVM RI: ZIP de %s ainda não publicado (404); ano pulado", year)
+                continue
+            yield year, zipfile.ZipFile(io.BytesIO(data))
+
+    def _merge_latest(
+        self,
+        acc: dict[str, dict[str, str]],
+        latest: dict[str, dict[str, str]],
+        *,
+        cnpj_key: str,
+        ref_key: str = "Data_Referencia",
+        ver_key: str = "Versao",
+    ) -> dict[str, dict[str, str]]:
+        """Combina o mais recente por CNPJ de anos diferentes (mesmo ranking de versão)."""
+        if not acc:
+            return latest
+        return self._pick_latest_by_cnpj(
+            [*acc.values(), *latest.values()],
+            cnpj_key=cnpj_key,
+            ref_key=ref_key,
+            ver_key=ver_key,
+        )
 
-        for key, filename in list(files.items()):
-            if filename not in z.namelist():
-                files.pop(key, None)
+    def load_fca_snapshots(self, year: int) -> list[CvmRiSnapshot]:
+        return self.load_fca_snapshots_for_years([int(year)])
+
+    def load_fca_snapshots_for_years(self, years: Sequence[int]) -> list[CvmRiSnapshot]:
+        """Snapshots FCA com a versão mais recente por CNPJ entre todos os `years`.
+
+        Cada ano é lido em streaming e reduzido ao mais recente por CNPJ/arquivo; o resultado
+        é combinado com os anos anteriores pelo mesmo ranking (Data_Referencia, Versao).
+        """
+        years = sorted({int(y) for y in years})
+        latest: dict[str, dict[str, dict[str, str]]] = {key: {} for key in FCA_FILES}
+        files: dict[str, list[str]] = {key: [] for key in FCA_FILES}
+
+        for year, z in self._iter_year_zips(years, self.download_fca_zip):
+            names = set(z.namelist())
+            for key, (template, columns) in FCA_FILES.items():
+                filename = template.format(year=year)
+                if filename not in names:
+                    continue
+                files[key].append(filename)
+                year_latest = self._pick_latest_by_cnpj(
+                    self._iter_csv_rows(z, filename, columns),
+                    cnpj_key="CNPJ_Companhia",
+                )
+                latest[key] = self._merge_latest(latest[key], year_latest, cnpj_key="CNPJ_Companhia")
 
+        files = {key: names for key, names in files.items() if names}
         if not files:
-            raise RuntimeError(f"Nenhum CSV esperado encontrado no ZIP FCA {year}.")
+            raise RuntimeError(f"Nenhum CSV esperado encontrado nos ZIPs FCA {', '.join(map(str, years))}.")
 
-        canal_by_cnpj = self._pick_latest_by_cnpj(
-            self._iter_csv_rows(z, files["canal"]),
-            cnpj_key="CNPJ_Companhia",
-        )
-        dept_by_cnpj = self._pick_latest_by_cnpj(
-            self._iter_csv_rows(z, files["dept"]),
-            cnpj_key="CNPJ_Companhia",
-        )
-        dri_by_cnpj = self._pick_latest_by_cnpj(
-            self._iter_csv_rows(z, files["dri"]),
-            cnpj_key="CNPJ_Companhia",
-        )
-        end_by_cnpj = self._pick_latest_by_cnpj(
-            self._iter_csv_rows(z, files["endereco"]),
-            cnpj_key="CNPJ_Companhia",
-        )
+        canal_by_cnpj = latest["canal"]
+        dept_by_cnpj = latest["dept"]
+        dri_by_cnpj = latest["dri"]
+        end_by_cnpj = latest["endereco"]
 
         all_cnpjs = set(canal_by_cnpj) | set(dept_by_cnpj) | set(dri_by_cnpj) | set(end_by_cnpj)
 
@@ -141,20 +246,7 @@ class CVMRiIntegration:
                 _safe_text(end.get("Data_Referencia")),
                 _safe_text(canal.get("Data_Referencia")),
             ]
-            as_of_date = max([d for d in dates if d] or [f"{int(year)}-01-01"])
-
-            def _fmt_phone(prefix_ddi: str, prefix_ddd: str, number: str) -> str:
-                ddi = _safe_text(prefix_ddi)
-                ddd = _safe_text(prefix_ddd)
-                num = _safe_text(number)
-                parts = []
-                if ddi:
-                    parts.append(f"+{ddi}")
-                if ddd:
-                    parts.append(f"({ddd})")
-                if num:
-                    parts.append(num)
-                return " ".join(parts).strip()
+            as_of_date = max([d for d in dates if d] or [f"{years[-1]}-01-01"])
 
             extracted = {
                 "canal_divulgacao": _safe_text(canal.get("Canal_Divulgacao")),
@@ -175,7 +267,8 @@ class CVMRiIntegration:
 
             payload = {
                 "cnpj": cnpj,
-                "year": int(year),
+                "year": int(as_of_date[:4]) if as_of_date[:4].isdigit() else years[-1],
+                "years": years,
                 "source": "cvm_fca",
                 "files": files,
                 "dri": dri,
@@ -197,3 +290,62 @@ class CVMRiIntegration:
             )
 
         return out
+
+    def load_fre_snapshots(self, year: int) -> list[CvmRiSnapshot]:
+        return self.load_fre_snapshots_for_years([int(year)])
+
+    def load_fre_snapshots_for_years(self, years: Sequence[int]) -> list[CvmRiSnapshot]:
+        """Última entrega do FRE por CNPJ (data de referência, versão e link do documento).
+
+        O FRE não tem CSV próprio de contatos de RI: os campos de contato ficam vazios e o
+        registro aponta para o formulário (`LINK_DOC`), que traz a seção de RI.
+        """
+        years = sorted({int(y) for y in years})
+        rank_keys = {"cnpj_key": "CNPJ_CIA", "ref_key": "DT_REFER", "ver_key": "VERSAO"}
+        latest: dict[str, dict[str, str]] = {}
+        files: list[str] = []
+
+        for year, z in self._iter_year_zips(years, self.download_fre_zip):
+            filename = FRE_INDEX_FILE.format(year=year)
+            if filename not in z.namelist():
+                continue
+            files.append(filename)
+            year_latest = self._pick_latest_by_cnpj(self._iter_csv_rows(z, filename, FRE_INDEX_COLUMNS), **rank_keys)
+            latest = self._merge_latest(latest, year_latest, **rank_keys)
+
+        if not files:
+            raise RuntimeError(f"Índice do FRE não encontrado nos ZIPs {', '.join(map(str, years))}.")
+
+        out: list[CvmRiSnapshot] = []
+        fetched_at = datetime.utcnow().isoformat() + "Z"
+
+        for cnpj in sorted(latest):
+            doc = latest[cnpj]
+            as_of_date = _safe_text(doc.get("DT_REFER")) or f"{years[-1]}-01-01"
+            extracted = {
+                "fre_versao": _safe_int(doc.get("VERSAO")),
+                "fre_id_documento": _safe_text(doc.get("ID_DOC")),
+                "fre_data_recebimento": _safe_text(doc.get("DT_RECEB")),
+                "fre_link": _safe_text(doc.get("LINK_DOC")),
+            }
+            payload = {
+                "cnpj": cnpj,
+                "year": int(as_of_date[:4]) if as_of_date[:4].isdigit() else years[-1],
+                "years": years,
+                "source": "cvm_fre",
+                "files": {"index": files},
+                "documento": doc,
+                "extracted": extracted,
+                "fetched_at": fetched_at,
+            }
+            out.append(
+                CvmRiSnapshot(
+                    cnpj=cnpj,
+                    as_of_date=as_of_date,
+                    source="cvm_fre",
+                    payload=payload,
+                    extracted=extracted,
+                )
+            )
+
+        return out
@@ -0,0 +1,147 @@
+"""Demonstrativos CVM (DFP/ITR) em formato longo: DataFrame -> `cvm_statement_lines`.
+
+Cada CSV da CVM (ex.: `dfp_cia_aberta_BPP_con_2024.csv`) já é "longo" (1 linha por
+empresa/conta). Aqui o frame é normalizado de forma vetorizada (CNPJ com 14 dígitos,
+DT_REFER ISO, VERSAO int, só o exercício corrente `ORDEM_EXERC=ÚLTIMO`) e convertido
+em lotes de linhas para a tabela `cvm_statement_lines`
+(chave: cnpj, dt_refer, statement, cd_conta, versao).
+
+A leitura (`fetch_account_values`) consulta por código de conta (CD_CONTA) com índice,
+sem varrer texto de DS_CONTA.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+TABLE = "cvm_statement_lines"
+ON_CONFLICT = "cnpj,dt_refer,statement,cd_conta,versao"
+
+DEFAULT_STATEMENTS = ("DRE", "BPP", "BPA")
+
+# Códigos padrão do plano de contas CVM (DFP consolidado, empresas não financeiras).
+# métrica -> (demonstrativo, [códigos somados])
+STANDARD_ACCOUNT_CODES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "caixa_equivalentes": ("BPA", ("1.01.01",)),
+    "patrimonio_liquido": ("BPP", ("2.03",)),
+    "divida_bruta": ("BPP", ("2.01.04", "2.02.01")),
+    "lucro_liquido": ("DRE", ("3.11",)),
+}
+
+
+def normalize_statement_frame(df: pd.DataFrame, *, current_only: bool = True) -> pd.DataFrame:
+    """Colunas normalizadas: cnpj, dt_refer, cd_conta, versao, ds_conta, vl_conta, escala_moeda, denom_cia."""
+    if df is None or len(df) == 0:
+        return pd.DataFrame(
+            columns=["cnpj", "dt_refer", "cd_conta", "versao", "ds_conta", "vl_conta", "escala_moeda", "denom_cia"]
+        )
+
+    d = df
+    if current_only and "ORDEM_EXERC" in d.columns:
+        # "ÚLTIMO" (exercício do documento) vs "PENÚLTIMO" (comparativo do ano anterior).
+        d = d[~d["ORDEM_EXERC"].astype(str).str.upper().str.contains("PEN", na=False)]
+    if "DT_INI_EXERC" in d.columns:
+        # ITR: a DRE traz o trimestre e o acumulado do ano com a mesma chave; ordena para
+        # que o `keep="last"` abaixo fique com o acumulado (DT_INI_EXERC mais antigo).
+        d = d.sort_values("DT_INI_EXERC", ascending=False, kind="stable", na_position="first")
+
+    out = pd.DataFrame(
+        {
+            "cnpj": d["CNPJ_CIA"].astype(str).str.replace(r"\D+", "", regex=True).str.zfill(14),
+            "dt_refer": pd.to_datetime(d["DT_REFER"], errors="coerce").dt.strftime("%Y-%m-%d"),
+            "cd_conta": d["CD_CONTA"].astype(str).str.strip(),
+            "versao": (
+                pd.to_numeric(d["VERSAO"], errors="coerce").fillna(1).astype("int64")
+                if "VERSAO" in d.columns
+                else 1
+            ),
+            "ds_conta": d["DS_CONTA"].astype(str).str.strip() if "DS_CONTA" in d.columns else None,
+            "vl_conta": pd.to_numeric(d["VL_CONTA"], errors="coerce"),
+            "escala_moeda": d["ESCALA_MOEDA"].astype(str).str.strip() if "ESCALA_MOEDA" in d.columns else None,
+            "denom_cia": d["DENOM_CIA"].astype(str).str.strip() if "DENOM_CIA" in d.columns else None,
+        }
+    )
+    out = out.dropna(subset=["dt_refer"])
+    out = out[(out["cnpj"] != "0" * 14) & (out["cd_conta"] != "")]
+    # Mesma chave repetida no CSV (raro): mantém a última ocorrência.
+    return out.drop_duplicates(subset=["cnpj", "dt_refer", "cd_conta", "versao"], keep="last")
+
+
+def iter_statement_line_rows(
+    df: pd.DataFrame,
+    statement: str,
+    *,
+    fiscal_year: Optional[int] = None,
+    doc_type: str = "DFP",
+    cnpjs: Optional[Iterable[str]] = None,
+    batch_size: int = 5000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Lotes de linhas prontas para upsert em `cvm_statement_lines`."""
+    norm = normalize_statement_frame(df)
+    if cnpjs is not None:
+        wanted = {"".join(c for c in str(x) if c.isdigit()).zfill(14) for x in cnpjs if x}
+        norm = norm[norm["cnpj"].isin(wanted)]
+    if len(norm) == 0:
+        return
+
+    norm = norm.assign(statement=statement, fiscal_year=fiscal_year, doc_type=doc_type)
+    # NaN -> None (JSON)
+    norm = norm.astype(object).where(pd.notna(norm), None)
+    for i in range(0, len(norm), batch_size):
+        yield norm.iloc[i : i + batch_size].to_dict(orient="records")
+
+
+def fetch_account_values(
+    sb: Any,
+    keys: Iterable[Tuple[str, str]],
+    *,
+    metrics: Optional[Iterable[str]] = None,
+) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """(cnpj, dt_refer) -> {métrica: valor} via códigos padrão (`STANDARD_ACCOUNT_CODES`).
+
+    Usa a última VERSAO de cada conta. Métricas sem nenhuma conta encontrada ficam de fora.
+    """
+    metrics = list(metrics) if metrics is not None else list(STANDARD_ACCOUNT_CODES)
+    codes = sorted({code for m in metrics for code in STANDARD_ACCOUNT_CODES[m][1]})
+    by_cnpj: Dict[str, set] = {}
+    for cnpj, dt in keys:
+        if cnpj and dt:
+            by_cnpj.setdefault(cnpj, set()).add(dt)
+    if not by_cnpj or not codes:
+        return {}
+
+    # (cnpj, dt, statement, code) -> (versao, valor)
+    latest: Dict[Tuple[str, str, str, str], Tuple[int, Optional[float]]] = {}
+    cnpjs = sorted(by_cnpj)
+    dates = sorted({d for ds in by_cnpj.values() for d in ds})
+    for i in range(0, len(cnpjs), 100):
+        chunk = cnpjs[i : i + 100]
+        rows = sb.select_all(
+            TABLE,
+            "select=cnpj,dt_refer,statement,cd_conta,versao,vl_conta"
+            f"&cnpj=in.({','.join(chunk)})&dt_refer=in.({','.join(dates)})"
+            "&cd_conta=in.(" + ",".join(f'"{c}"' for c in codes) + ")",
+        )
+        for r in rows:
+            key = (str(r.get("cnpj")), str(r.get("dt_refer"))[:10], str(r.get("statement")), str(r.get("cd_conta")))
+            versao = int(r.get("versao") or 0)
+            value = r.get("vl_conta")
+            if key not in latest or versao > latest[key][0]:
+                latest[key] = (versao, float(value) if value is not None else None)
+
+    out: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for cnpj, dts in by_cnpj.items():
+        for dt in dts:
+            values: Dict[str, float] = {}
+            for m in metrics:
+                statement, m_codes = STANDARD_ACCOUNT_CODES[m]
+                found = [latest.get((cnpj, dt, statement, c)) for c in m_codes]
+                nums = [v for _, v in (f for f in found if f is not None) if v is not None]
+                if nums:
+                    values[m] = float(sum(nums))
+            if values:
+                out[(cnpj, dt)] = values
+    return out
@@ -13,7 +13,14 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 
-from integrations.http_utils import HttpConfig, build_retry_session, request_json
+from integrations.http_utils import (
+    HttpConfig,
+    build_async_client,
+    build_retry_session,
+    get_response_cache,
+    request_json,
+    request_json_async,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +37,35 @@ class FintzIntegration:
             headers["X-API-Key"] = api_key
         self._http_cfg = HttpConfig(timeout_seconds=20)
         self.session = build_retry_session(headers=headers, config=self._http_cfg)
+        self._headers = headers
+        self._async_client: Any = None
 
     def _get(self, path: str, *, params: Optional[dict[str, Any]] = None, timeout: int = 20) -> Any:
         url = f"{self.base_url}{path}"
         # Do not include URL in errors (may include auth headers in logs elsewhere).
-        return request_json(self.session, "GET", url, params=params or {}, timeout_seconds=timeout)
+        return request_json(
+            self.session, "GET", url, params=params or {}, timeout_seconds=timeout, cache=get_response_cache()
+        )
+
+    async def _get_async(self, path: str, *, params: Optional[dict[str, Any]] = None, timeout: int = 20) -> Any:
+        if self._async_client is None:
+            self._async_client = build_async_client(headers=self._headers, config=self._http_cfg)
+        url = f"{self.base_url}{path}"
+        return await request_json_async(
+            self._async_client,
+            "GET",
+            url,
+            params=params or {},
+            timeout_seconds=timeout,
+            config=self._http_cfg,
+            cache=get_response_cache(),
+        )
+
+    async def aclose(self) -> None:
+        """Fecha o client async (se criado)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
 
     def test_connection(self) -> Dict[str, Any]:
         # Probe simples em endpoint público da própria API (exige key; sem key retornará 401/403).
@@ -65,6 +96,32 @@ class FintzIntegration:
         data = self._get("/bolsa/b3/avista/busca", params=params)
         return data if isinstance(data, list) else []
 
+    @staticmethod
+    def _ticker_range_params(ticker: str, data_inicio: str, data_fim: Optional[str]) -> Optional[dict[str, Any]]:
+        ticker = str(ticker or "").strip().upper()
+        if not ticker or not data_inicio:
+            return None
+
+        params: dict[str, Any] = {"ticker": ticker, "dataInicio": data_inicio}
+        if data_fim:
+            params["dataFim"] = data_fim
+        return params
+
+    @staticmethod
+    def _accounting_params(
+        ticker: str, tipo_periodo: Optional[str], tipo_demonstracao: Optional[str]
+    ) -> Optional[dict[str, Any]]:
+        ticker = str(ticker or "").strip().upper()
+        if not ticker:
+            return None
+
+        params: dict[str, Any] = {"ticker": ticker}
+        if tipo_periodo:
+            params["tipoPeriodo"] = tipo_periodo
+        if tipo_demonstracao:
+            params["tipoDemonstracao"] = tipo_demonstracao
+        return params
+
     def get_indicators_by_ticker(self, ticker: str) -> List[Dict[str, Any]]:
         """Retorna todos os indicadores mais recentes por ticker."""
         ticker = str(ticker or "").strip().upper()
@@ -73,6 +130,13 @@ class FintzIntegration:
         data = self._get("/bolsa/b3/avista/indicadores/por-ticker", params={"ticker": ticker})
         return data if isinstance(data, list) else []
 
+    async def get_indicators_by_ticker_async(self, ticker: str) -> List[Dict[str, Any]]:
+        ticker = str(ticker or "").strip().upper()
+        if not ticker:
+            return []
+        data = await self._get_async("/bolsa/b3/avista/indicadores/por-ticker", params={"ticker": ticker})
+        return data if isinstance(data, list) else []
+
     def get_accounting_items_by_ticker(
         self,
         ticker: str,
@@ -81,19 +145,27 @@ class FintzIntegration:
         tipo_demonstracao: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Retorna os itens contábeis mais recentes por ticker."""
-        ticker = str(ticker or "").strip().upper()
-        if not ticker:
+        params = self._accounting_params(ticker, tipo_periodo, tipo_demonstracao)
+        if params is None:
             return []
 
-        params: dict[str, Any] = {"ticker": ticker}
-        if tipo_periodo:
-            params["tipoPeriodo"] = tipo_periodo
-        if tipo_demonstracao:
-            params["tipoDemonstracao"] = tipo_demonstracao
-
         data = self._get("/bolsa/b3/avista/itens-contabeis/por-ticker", params=params)
         return data if isinstance(data, list) else []
 
+    async def get_accounting_items_by_ticker_async(
+        self,
+        ticker: str,
+        *,
+        tipo_periodo: Optional[str] = None,
+        tipo_demonstracao: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params = self._accounting_params(ticker, tipo_periodo, tipo_demonstracao)
+        if params is None:
+            return []
+
+        data = await self._get_async("/bolsa/b3/avista/itens-contabeis/por-ticker", params=params)
+        return data if isinstance(data, list) else []
+
     def get_proventos(
         self,
         ticker: str,
@@ -105,17 +177,27 @@ class FintzIntegration:
 
         Endpoint: GET /bolsa/b3/avista/proventos?ticker=...&dataInicio=...&dataFim=...
         """
-        ticker = str(ticker or "").strip().upper()
-        if not ticker or not data_inicio:
+        params = self._ticker_range_params(ticker, data_inicio, data_fim)
+        if params is None:
             return []
 
-        params: dict[str, Any] = {"ticker": ticker, "dataInicio": data_inicio}
-        if data_fim:
-            params["dataFim"] = data_fim
-
         data = self._get("/bolsa/b3/avista/proventos", params=params)
         return data if isinstance(data, list) else []
 
+    async def get_proventos_async(
+        self,
+        ticker: str,
+        *,
+        data_inicio: str,
+        data_fim: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params = self._ticker_range_params(ticker, data_inicio, data_fim)
+        if params is None:
+            return []
+
+        data = await self._get_async("/bolsa/b3/avista/proventos", params=params)
+        return data if isinstance(data, list) else []
+
     def get_ohlc_history(
         self,
         ticker: str,
@@ -127,13 +209,23 @@ class FintzIntegration:
 
         Endpoint: GET /bolsa/b3/avista/cotacoes/historico
         """
-        ticker = str(ticker or "").strip().upper()
-        if not ticker or not data_inicio:
+        params = self._ticker_range_params(ticker, data_inicio, data_fim)
+        if params is None:
             return []
 
-        params: dict[str, Any] = {"ticker": ticker, "dataInicio": data_inicio}
-        if data_fim:
-            params["dataFim"] = data_fim
-
         data = self._get("/bolsa/b3/avista/cotacoes/historico", params=params)
         return data if isinstance(data, list) else []
+
+    async def get_ohlc_history_async(
+        self,
+        ticker: str,
+        *,
+        data_inicio: str,
+        data_fim: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        params = self._ticker_range_params(ticker, data_inicio, data_fim)
+        if params is None:
+            return []
+
+        data = await self._get_async("/bolsa/b3/avista/cotacoes/historico", params=params)
+        return data if isinstance(data, list) else []
@@ -13,7 +13,14 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, Optional
 
-from integrations.http_utils import HttpConfig, build_retry_session, request_json
+from integrations.http_utils import (
+    HttpConfig,
+    build_async_client,
+    build_retry_session,
+    get_response_cache,
+    request_json,
+    request_json_async,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,39 +48,128 @@ class HGBrasilIntegration:
 
         self._http_cfg = HttpConfig(timeout_seconds=20)
         self.session = build_retry_session(headers={"User-Agent": "Mozilla/5.0"}, config=self._http_cfg)
+        self._async_client: Any = None
 
     def _get(self, url: str, *, params: Dict[str, Any], timeout: int = 20) -> Dict[str, Any]:
-        data = request_json(self.session, "GET", url, params=params, timeout_seconds=timeout)
+        data = request_json(
+            self.session, "GET", url, params=params, timeout_seconds=timeout, cache=get_response_cache()
+        )
         if not isinstance(data, dict):
             raise RuntimeError(f"Resposta inesperada HG Brasil: {type(data)}")
         return data
 
-    def get_stock_price(self, symbol: str) -> Dict[str, Any]:
-        """Consulta dados de uma ação/FII via HG Brasil.
+    async def _get_async(self, url: str, *, params: Dict[str, Any], timeout: int = 20) -> Dict[str, Any]:
+        if self._async_client is None:
+            self._async_client = build_async_client(headers={"User-Agent": "Mozilla/5.0"}, config=self._http_cfg)
+        data = await request_json_async(
+            self._async_client,
+            "GET",
+            url,
+            params=params,
+            timeout_seconds=timeout,
+            config=self._http_cfg,
+            cache=get_response_cache(),
+        )
+        if not isinstance(data, dict):
+            raise RuntimeError(f"Resposta inesperada HG Brasil: {type(data)}")
+        return data
 
-        Doc: GET https://api.hgbrasil.com/finance/stock_price?symbol=petr4&key=suachave
-        """
+    async def aclose(self) -> None:
+        """Fecha o client async (se criado)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _require_key(self) -> None:
+        if not self.api_key:
+            raise RuntimeError("HG Brasil api_key não configurada")
+
+    def _stock_price_request(self, symbol: str) -> tuple[str, Dict[str, Any]]:
         symbol = (symbol or "").strip()
         if not symbol:
             raise ValueError("symbol é obrigatório")
-        if not self.api_key:
-            raise RuntimeError("HG Brasil api_key não configurada")
+        self._require_key()
 
         url = f"{self.base_url}{self.STOCK_PRICE_PATH}"
         params = {
             "symbol": symbol,
             "key": self.api_key,
         }
+        return url, params
+
+    def _v2_request(
+        self,
+        path: str,
+        tickers: str,
+        *,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        date: Optional[str] = None,
+        days_ago: Optional[int] = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        self._require_key()
+        tickers = (tickers or "").strip()
+        if not tickers:
+            raise ValueError("tickers é obrigatório")
+
+        url = f"{self.root_url}{path}"
+        params: Dict[str, Any] = {"tickers": tickers, "key": self.api_key}
+        if start_date:
+            params["start_date"] = start_date
+        if end_date:
+            params["end_date"] = end_date
+        if date:
+            params["date"] = date
+        if days_ago is not None:
+            params["days_ago"] = int(days_ago)
+        return url, params
 
+    def _historical_request(
+        self,
+        symbols: str,
+        *,
+        sample_by: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        date: Optional[str] = None,
+        days_ago: Optional[int] = None,
+    ) -> tuple[str, Dict[str, Any]]:
+        self._require_key()
+        symbols = (symbols or "").strip()
+        if not symbols:
+            raise ValueError("symbols é obrigatório")
+
+        url = f"{self.root_url}{self.V2_HISTORICAL_PATH}"
+        params: Dict[str, Any] = {"symbols": symbols, "sample_by": sample_by, "key": self.api_key}
+
+        # A API documenta que apenas UM filtro deve ser usado.
+        if start_date and end_date:
+            params["start_date"] = start_date
+            params["end_date"] = end_date
+        elif date:
+            params["date"] = date
+        elif days_ago is not None:
+            params["days_ago"] = int(days_ago)
+        return url, params
+
+    def get_stock_price(self, symbol: str) -> Dict[str, Any]:
+        """Consulta dados de uma ação/FII via HG Brasil.
+
+        Doc: GET https://api.hgbrasil.com/finance/stock_price?symbol=petr4&key=suachave
+        """
+        url, params = self._stock_price_request(symbol)
         return self._get(url, params=params, timeout=20)
 
+    async def get_stock_price_async(self, symbol: str) -> Dict[str, Any]:
+        url, params = self._stock_price_request(symbol)
+        return await self._get_async(url, params=params, timeout=20)
+
     def get_taxes(self) -> Dict[str, Any]:
         """Consulta taxas (CDI/SELIC etc.).
 
         Doc: GET https://api.hgbrasil.com/finance/taxes?key=SUACHAVE
         """
-        if not self.api_key:
-            raise RuntimeError("HG Brasil api_key não configurada")
+        self._require_key()
 
         url = f"{self.base_url}{self.TAXES_PATH}"
         params = {"key": self.api_key}
@@ -92,24 +188,25 @@ class HGBrasilIntegration:
 
         Endpoint: GET /v2/finance/dividends?tickers=B3:PETR4&key=...
         """
-        if not self.api_key:
-            raise RuntimeError("HG Brasil api_key não configurada")
-        tickers = (tickers or "").strip()
-        if not tickers:
-            raise ValueError("tickers é obrigatório")
-
-        url = f"{self.root_url}{self.V2_DIVIDENDS_PATH}"
-        params: Dict[str, Any] = {"tickers": tickers, "key": self.api_key}
-        if start_date:
-            params["start_date"] = start_date
-        if end_date:
-            params["end_date"] = end_date
-        if date:
-            params["date"] = date
-        if days_ago is not None:
-            params["days_ago"] = int(days_ago)
+        url, params = self._v2_request(
+            self.V2_DIVIDENDS_PATH, tickers, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
         return self._get(url, params=params, timeout=30)
 
+    async def get_dividends_v2_async(
+        self,
+        tickers: str,
+        *,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        date: Optional[str] = None,
+        days_ago: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        url, params = self._v2_request(
+            self.V2_DIVIDENDS_PATH, tickers, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
+        return await self._get_async(url, params=params, timeout=30)
+
     def get_indicators_v2(
         self,
         tickers: str,
@@ -120,24 +217,25 @@ class HGBrasilIntegration:
         days_ago: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Consulta indicadores econômicos (v2)."""
-        if not self.api_key:
-            raise RuntimeError("HG Brasil api_key não configurada")
-        tickers = (tickers or "").strip()
-        if not tickers:
-            raise ValueError("tickers é obrigatório")
-
-        url = f"{self.root_url}{self.V2_INDICATORS_PATH}"
-        params: Dict[str, Any] = {"tickers": tickers, "key": self.api_key}
-        if start_date:
-            params["start_date"] = start_date
-        if end_date:
-            params["end_date"] = end_date
-        if date:
-            params["date"] = date
-        if days_ago is not None:
-            params["days_ago"] = int(days_ago)
+        url, params = self._v2_request(
+            self.V2_INDICATORS_PATH, tickers, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
         return self._get(url, params=params, timeout=30)
 
+    async def get_indicators_v2_async(
+        self,
+        tickers: str,
+        *,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        date: Optional[str] = None,
+        days_ago: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        url, params = self._v2_request(
+            self.V2_INDICATORS_PATH, tickers, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
+        return await self._get_async(url, params=params, timeout=30)
+
     def get_historical_v2(
         self,
         symbols: str,
@@ -149,26 +247,26 @@ class HGBrasilIntegration:
         days_ago: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Consulta histórico (v2)."""
-        if not self.api_key:
-            raise RuntimeError("HG Brasil api_key não configurada")
-        symbols = (symbols or "").strip()
-        if not symbols:
-            raise ValueError("symbols é obrigatório")
-
-        url = f"{self.root_url}{self.V2_HISTORICAL_PATH}"
-        params: Dict[str, Any] = {"symbols": symbols, "sample_by": sample_by, "key": self.api_key}
-
-        # A API documenta que apenas UM filtro deve ser usado.
-        if start_date and end_date:
-            params["start_date"] = start_date
-            params["end_date"] = end_date
-        elif date:
-            params["date"] = date
-        elif days_ago is not None:
-            params["days_ago"] = int(days_ago)
-
+        url, params = self._historical_request(
+            symbols, sample_by=sample_by, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
         return self._get(url, params=params, timeout=30)
 
+    async def get_historical_v2_async(
+        self,
+        symbols: str,
+        *,
+        sample_by: str = "1d",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        date: Optional[str] = None,
+        days_ago: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        url, params = self._historical_request(
+            symbols, sample_by=sample_by, start_date=start_date, end_date=end_date, date=date, days_ago=days_ago
+        )
+        return await self._get_async(url, params=params, timeout=30)
+
     def test_connection(self) -> Dict[str, Any]:
         try:
             params = {"format": "json"}
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import sqlite3
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlsplit
 
-import requests
-from requests.adapters import HTTPAdapter
+# requests/urllib3 (~100 ms) e asyncio são importados sob demanda: jobs curtos, `--help`/
+# `--dry-run` e o servidor web não pagam por eles na importação (ver scripts/check_import_time.py).
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    from requests.adapters import HTTPAdapter
 
-try:
-    # requests bundles urllib3; this import is stable in practice
-    from urllib3.util.retry import Retry
-except Exception:  # pragma: no cover
-    Retry = None  # type: ignore
+
+def _retry_class() -> Any:
+    try:
+        # requests bundles urllib3; this import is stable in practice
+        from urllib3.util.retry import Retry
+    except Exception:  # pragma: no cover
+        return None
+    return Retry
 
 
 @dataclass(frozen=True)
@@ -24,16 +36,391 @@ class HttpConfig:
     pool_maxsize: int = 10
 
 
-def build_retry_session(*, headers: Optional[dict[str, str]] = None, config: Optional[HttpConfig] = None) -> requests.Session:
-    cfg = config or HttpConfig()
+class TokenBucket:
+    """Rate limiter (token bucket) thread-safe, por provedor.
 
-    session = requests.Session()
-    if headers:
-        session.headers.update(headers)
+    `rate_per_minute` tokens são repostos continuamente; `capacity` limita a rajada
+    (default: 1/6 do limite por minuto, no mínimo 1). `acquire()` bloqueia até haver token.
+    """
+
+    def __init__(self, rate_per_minute: float, *, capacity: Optional[float] = None) -> None:
+        self.rate_per_second = max(float(rate_per_minute), 0.001) / 60.0
+        self.capacity = float(capacity) if capacity else max(1.0, float(rate_per_minute) / 6.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Consome `tokens` se disponíveis e retorna 0; senão retorna quantos segundos esperar."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate_per_second
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            wait_s = self.try_acquire(tokens)
+            if wait_s <= 0:
+                return
+            time.sleep(wait_s)
+
+
+# ---------------------------------------------------------------------------
+# Cache persistente de respostas (SQLite), compartilhado entre jobs do mesmo run.
+# ---------------------------------------------------------------------------
+
+# Parâmetros que nunca entram na chave (credenciais).
+CACHE_EXCLUDED_PARAMS = frozenset({"key", "token", "apikey", "api_key", "x-api-key"})
+
+# TTL (segundos) por família de endpoint: (host, prefixo do path). A primeira regra que
+# casar vence; endpoints sem regra não são cacheados.
+DEFAULT_CACHE_TTLS: tuple[tuple[str, str, int], ...] = (
+    ("brapi.dev", "/api/quote/list", 6 * 3600),
+    ("brapi.dev", "/api/quote/", 3600),
+    ("api.hgbrasil.com", "/finance/stock_price", 3600),
+    ("api.hgbrasil.com", "/finance/taxes", 12 * 3600),
+    ("api.hgbrasil.com", "/v2/finance/historical", 12 * 3600),
+    ("api.hgbrasil.com", "/v2/finance/dividends", 12 * 3600),
+    ("api.hgbrasil.com", "/v2/finance/indicators", 12 * 3600),
+    ("api.fintz.com.br", "/bolsa/b3/avista/indicadores", 12 * 3600),
+    ("api.fintz.com.br", "/bolsa/b3/avista/itens-contabeis", 24 * 3600),
+    ("api.fintz.com.br", "/bolsa/b3/avista/proventos", 12 * 3600),
+    ("api.fintz.com.br", "/bolsa/b3/avista/cotacoes", 3600),
+)
+
+
+class ResponseCache:
+    """Cache em disco (SQLite) de respostas JSON de GET.
+
+    - Chave: método + URL (sem querystring de credencial) + params ordenados, sem a API key
+    - TTL por família de endpoint (`DEFAULT_CACHE_TTLS`)
+    - Limite de tamanho: ao passar de `max_bytes`, remove as entradas menos acessadas
+      recentemente até ~90% do limite
+    - Contadores `hits` / `misses` / `stores` / `evictions` (por processo)
+
+    Thread-safe (uma conexão + lock) e seguro entre processos (WAL).
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/cache/http_cache.sqlite3",
+        *,
+        max_bytes: int = 200 * 1024 * 1024,
+        ttls: Optional[tuple[tuple[str, str, int], ...]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.ttls = ttls if ttls is not None else DEFAULT_CACHE_TTLS
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, url TEXT, body BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[dict[str, Any]] = None) -> str:
+        parts = urlsplit(url)
+        clean: list[tuple[str, str]] = []
+        for k, v in sorted((params or {}).items()):
+            if str(k).lower() in CACHE_EXCLUDED_PARAMS or v is None:
+                continue
+            clean.append((str(k), str(v)))
+        raw = json.dumps([method.upper(), f"{parts.scheme}://{parts.netloc}{parts.path}", parts.query, clean])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url: str) -> int:
+        parts = urlsplit(url)
+        for host, prefix, ttl in self.ttls:
+            if parts.netloc.endswith(host) and parts.path.startswith(prefix):
+                return int(ttl)
+        return 0
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, *, ttl: int, url: str = "") -> None:
+        if ttl <= 0:
+            return
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        now = time.time()
+        # Não guardar a querystring (pode conter a API key)
+        url_no_query = url.split("?", 1)[0]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, body, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url_no_query, body, len(body), now + ttl, now),
+            )
+            self.stores += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def lookup(self, method: str, url: str, params: Optional[dict[str, Any]] = None) -> tuple[str, int, Any]:
+        """Retorna (key, ttl, valor|None). ttl=0 significa endpoint não cacheável."""
+        ttl = self.ttl_for(url) if method.upper() == "GET" else 0
+        key = self.make_key(method, url, params)
+        if ttl <= 0:
+            return key, 0, None
+        return key, ttl, self.get(key)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+
+def _error_flag(obj: Any) -> bool:
+    return isinstance(obj, dict) and (obj.get("error") is True or obj.get("erro") is True)
+
+
+def is_cacheable(data: Any) -> bool:
+    """False para payloads de erro devolvidos com HTTP 200 (não podem ir para o cache).
+
+    Ex.: HG Brasil com chave inválida/limite do plano/símbolo desconhecido
+    (`valid_key: false`, `results.error: true`, `results.<SYMBOL>.error: true`, `errors: [...]`)
+    e Brapi com `{"error": true, "message": ...}`. Como a chave do cache não inclui a API key,
+    um erro cacheado continuaria sendo servido depois de a chave/plano ser corrigido.
+    """
+    if not isinstance(data, dict):
+        return True
+    if data.get("error") or data.get("erro") or data.get("errors") or data.get("valid_key") is False:
+        return False
+    results = data.get("results")
+    if _error_flag(results):
+        return False
+    if isinstance(results, dict) and any(_error_flag(v) for v in results.values()):
+        return False
+    if isinstance(results, list) and any(_error_flag(v) for v in results):
+        return False
+    return True
+
+
+_RESPONSE_CACHE: Optional[ResponseCache] = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Cache compartilhado do processo (ou None se desativado).
+
+    Env:
+      HTTP_CACHE_DISABLED=1   desativa
+      HTTP_CACHE_PATH         caminho do SQLite (default: data/cache/http_cache.sqlite3)
+      HTTP_CACHE_MAX_MB       limite de tamanho (default: 200)
+    """
+    global _RESPONSE_CACHE
+    if (os.getenv("HTTP_CACHE_DISABLED") or "").strip().lower() in ("1", "true", "yes"):
+        return None
+    with _RESPONSE_CACHE_LOCK:
+        if _RESPONSE_CACHE is None:
+            try:
+                max_mb = int(os.getenv("HTTP_CACHE_MAX_MB") or 200)
+            except ValueError:
+                max_mb = 200
+            try:
+                _RESPONSE_CACHE = ResponseCache(
+                    os.getenv("HTTP_CACHE_PATH") or "data/cache/http_cache.sqlite3",
+                    max_bytes=max_mb * 1024 * 1024,
+                )
+            except Exception:
+                # Cache é otimização: se o disco/SQLite falhar, segue sem cache.
+                return None
+        return _RESPONSE_CACHE
+
+
+# ---------------------------------------------------------------------------
+# Telemetria HTTP (por host, por processo): lida por `jobs/telemetry.py` no fim do job.
+# ---------------------------------------------------------------------------
+
+# Limites (ms) dos buckets do histograma de latência; o último bucket é "> 10000".
+LATENCY_BUCKETS_MS: tuple[int, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class HttpStats:
+    """Contadores thread-safe de requests por host: volume, erros, retries, 429, bytes e latência."""
+
+    _FIELDS = ("requests", "errors", "retries", "status_429", "bytes_in", "bytes_out", "latency_ms_total")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hosts: dict[str, dict[str, Any]] = {}
+
+    def record(
+        self,
+        host: str,
+        *,
+        status: int,
+        elapsed_s: float,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        retries: int = 0,
+        retried_429: int = 0,
+    ) -> None:
+        latency_ms = max(0.0, float(elapsed_s)) * 1000.0
+        bucket = next((i for i, le in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= le), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            h = self._hosts.get(host)
+            if h is None:
+                h = self._hosts[host] = {f: 0 for f in self._FIELDS}
+                h["latency_ms_max"] = 0.0
+                h["latency_hist"] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            h["requests"] += 1
+            h["errors"] += 1 if int(status) >= 400 else 0
+            h["retries"] += int(retries)
+            h["status_429"] += (1 if int(status) == 429 else 0) + int(retried_429)
+            h["bytes_in"] += int(bytes_in)
+            h["bytes_out"] += int(bytes_out)
+            h["latency_ms_total"] += latency_ms
+            h["latency_ms_max"] = max(h["latency_ms_max"], latency_ms)
+            h["latency_hist"][bucket] += 1
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {host: {**h, "latency_hist": list(h["latency_hist"])} for host, h in self._hosts.items()}
+
+
+def diff_http_stats(after: dict[str, dict[str, Any]], before: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """`after - before` por host (hosts sem requests no intervalo ficam de fora)."""
+    out: dict[str, dict[str, Any]] = {}
+    for host, a in after.items():
+        b = before.get(host) or {}
+        d = {f: a[f] - b.get(f, 0) for f in HttpStats._FIELDS}
+        if d["requests"] <= 0:
+            continue
+        d["latency_ms_max"] = a["latency_ms_max"]  # máximo não é subtraível: é o do processo
+        hist_b = b.get("latency_hist") or [0] * len(a["latency_hist"])
+        d["latency_hist"] = [x - y for x, y in zip(a["latency_hist"], hist_b)]
+        out[host] = d
+    return out
+
+
+_HTTP_STATS = HttpStats()
+
+
+def get_http_stats() -> HttpStats:
+    return _HTTP_STATS
+
+
+def _record_response(resp: requests.Response, *args: Any, **kwargs: Any) -> requests.Response:
+    """Hook `response` do requests: 1 registro por resposta final (retries do urllib3 inclusos)."""
+    try:
+        history = getattr(getattr(resp.raw, "retries", None), "history", None) or ()
+        if kwargs.get("stream"):
+            bytes_in = int(resp.headers.get("Content-Length") or 0)
+        else:
+            bytes_in = len(resp.content or b"")
+        body = resp.request.body if resp.request is not None else None
+        _HTTP_STATS.record(
+            urlsplit(resp.url).netloc,
+            status=resp.status_code,
+            elapsed_s=resp.elapsed.total_seconds(),
+            bytes_in=bytes_in,
+            bytes_out=len(body) if body else 0,
+            retries=len(history),
+            retried_429=sum(1 for h in history if getattr(h, "status", None) == 429),
+        )
+    except Exception:
+        # Telemetria nunca pode quebrar a request
+        pass
+    return resp
+
+
+def instrument_session(session: requests.Session) -> requests.Session:
+    """Registra o hook de telemetria na sessão (idempotente)."""
+    hooks = session.hooks.setdefault("response", [])
+    if _record_response not in hooks:
+        hooks.append(_record_response)
+    return session
+
+
+# Pool de conexões compartilhado entre sessões do mesmo processo (ver `enable_shared_pool`).
+# Um adapter por política de retry, para não mudar o comportamento de quem usa config própria.
+_SHARED_POOL_MAXSIZE: Optional[int] = None
+_SHARED_ADAPTERS: dict[tuple[int, float], HTTPAdapter] = {}
+_SHARED_POOL_LOCK = threading.Lock()
+
+
+def enable_shared_pool(*, pool_maxsize: int = 32) -> None:
+    """Faz as sessões `requests` das integrações reutilizarem o mesmo pool (TLS/keep-alive).
+
+    Útil quando vários jobs rodam no mesmo processo (ex.: `jobs/orchestrator.py`).
+    """
+    global _SHARED_POOL_MAXSIZE
+    with _SHARED_POOL_LOCK:
+        _SHARED_POOL_MAXSIZE = max(1, int(pool_maxsize))
+        _SHARED_ADAPTERS.clear()
+
+
+def _shared_adapter(cfg: HttpConfig) -> Optional[HTTPAdapter]:
+    if _SHARED_POOL_MAXSIZE is None:
+        return None
+    key = (cfg.retries_total, cfg.backoff_factor)
+    with _SHARED_POOL_LOCK:
+        adapter = _SHARED_ADAPTERS.get(key)
+        if adapter is None:
+            adapter = _SHARED_ADAPTERS[key] = _build_adapter(
+                cfg, pool_connections=_SHARED_POOL_MAXSIZE, pool_maxsize=_SHARED_POOL_MAXSIZE
+            )
+        return adapter
+
+
+def mount_shared_pool(session: requests.Session, *, config: Optional[HttpConfig] = None) -> requests.Session:
+    """Monta o adapter compartilhado na sessão (no-op se `enable_shared_pool` não foi chamado)."""
+    instrument_session(session)
+    adapter = _shared_adapter(config or HttpConfig())
+    if adapter is not None:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    return session
 
-    if Retry is None:
-        return session
 
+def _build_adapter(cfg: HttpConfig, *, pool_connections: int, pool_maxsize: int) -> HTTPAdapter:
+    from requests.adapters import HTTPAdapter
+
+    Retry = _retry_class()
+    if Retry is None:
+        return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
     retry = Retry(
         total=cfg.retries_total,
         connect=cfg.retries_total,
@@ -45,12 +432,25 @@ def build_retry_session(*, headers: Optional[dict[str, str]] = None, config: Opt
         raise_on_status=False,
         respect_retry_after_header=True,
     )
+    return HTTPAdapter(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
 
-    adapter = HTTPAdapter(
-        max_retries=retry,
-        pool_connections=cfg.pool_connections,
-        pool_maxsize=cfg.pool_maxsize,
-    )
+
+def build_retry_session(*, headers: Optional[dict[str, str]] = None, config: Optional[HttpConfig] = None) -> requests.Session:
+    import requests
+
+    cfg = config or HttpConfig()
+
+    session = instrument_session(requests.Session())
+    if headers:
+        session.headers.update(headers)
+
+    if _SHARED_POOL_MAXSIZE is not None:
+        return mount_shared_pool(session, config=cfg)
+
+    if _retry_class() is None:
+        return session
+
+    adapter = _build_adapter(cfg, pool_connections=cfg.pool_connections, pool_maxsize=cfg.pool_maxsize)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
@@ -64,14 +464,23 @@ def request_json(
     params: Optional[dict[str, Any]] = None,
     headers: Optional[dict[str, str]] = None,
     timeout_seconds: int = 20,
+    cache: Optional[ResponseCache] = None,
 ) -> Any:
     """HTTP request returning parsed JSON.
 
     Notes:
     - Adds a small manual sleep for 429 when Retry isn't available, or server ignores Retry-After.
     - Avoids echoing full URL (which may contain secrets) in error messages.
+    - With `cache`, GETs to endpoint families with a TTL are served from / stored in it
+      (error payloads returned with HTTP 200 are never stored; see `is_cacheable`).
     """
 
+    cache_key, cache_ttl = "", 0
+    if cache is not None:
+        cache_key, cache_ttl, cached = cache.lookup(method, url, params)
+        if cached is not None:
+            return cached
+
     resp = session.request(method, url, params=params or {}, headers=headers, timeout=timeout_seconds)
 
     if resp.status_code == 429:
@@ -90,7 +499,165 @@ def request_json(
         raise RuntimeError(f"HTTP {resp.status_code} {method} (response: {body_preview})")
 
     try:
-        return resp.json()
+        data = resp.json()
+    except json.JSONDecodeError as e:
+        body_preview = (resp.text or "").strip()[:500]
+        raise RuntimeError(f"Invalid JSON response ({e}): {body_preview}") from e
+
+    if cache is not None and cache_ttl > 0 and is_cacheable(data):
+        cache.set(cache_key, data, ttl=cache_ttl, url=url)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Async (httpx): mesmas regras de retry / 429 / redaction do `request_json`.
+# httpx é importado sob demanda para não pesar nos jobs síncronos.
+# ---------------------------------------------------------------------------
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def build_async_client(*, headers: Optional[dict[str, str]] = None, config: Optional[HttpConfig] = None) -> Any:
+    """Cria um `httpx.AsyncClient` com pool dimensionado por `HttpConfig`."""
+    import httpx
+
+    cfg = config or HttpConfig()
+    limits = httpx.Limits(
+        max_connections=cfg.pool_maxsize,
+        max_keepalive_connections=cfg.pool_connections,
+    )
+    return httpx.AsyncClient(headers=headers or {}, limits=limits, timeout=cfg.timeout_seconds)
+
+
+def _retry_wait_seconds(resp: Any, attempt: int, backoff_factor: float) -> float:
+    if resp is not None and resp.status_code == 429:
+        retry_after = resp.headers.get("Retry-After")
+        try:
+            wait_s = int(retry_after) if retry_after else 0
+        except Exception:
+            wait_s = 0
+        if wait_s > 0:
+            return float(min(wait_s, 10))
+    return backoff_factor * (2 ** attempt)
+
+
+async def request_async(
+    client: Any,
+    method: str,
+    url: str,
+    *,
+    params: Optional[dict[str, Any]] = None,
+    headers: Optional[dict[str, str]] = None,
+    timeout_seconds: int = 20,
+    config: Optional[HttpConfig] = None,
+) -> Any:
+    """Request async com retry (erros de conexão e status 429/5xx), retornando a resposta OK.
+
+    Erros não incluem a URL (pode conter chaves de API na querystring).
+    """
+    import asyncio
+
+    import httpx
+
+    cfg = config or HttpConfig()
+    attempts = max(0, int(cfg.retries_total)) + 1
+
+    resp = None
+    host = urlsplit(url).netloc
+    for attempt in range(attempts):
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, params=params or {}, headers=headers, timeout=timeout_seconds)
+        except httpx.TransportError as e:
+            if attempt + 1 >= attempts:
+                raise RuntimeError(f"HTTP {method} falhou após {attempts} tentativa(s): {type(e).__name__}") from None
+            await asyncio.sleep(cfg.backoff_factor * (2 ** attempt))
+            continue
+
+        _HTTP_STATS.record(
+            host,
+            status=resp.status_code,
+            elapsed_s=time.perf_counter() - t0,
+            bytes_in=len(resp.content or b""),
+            bytes_out=len(resp.request.content or b"") if resp.request is not None else 0,
+            retries=1 if attempt else 0,
+        )
+        if resp.status_code in RETRY_STATUS and attempt + 1 < attempts:
+            await asyncio.sleep(_retry_wait_seconds(resp, attempt, cfg.backoff_factor))
+            continue
+        break
+
+    if resp is None or resp.status_code >= 400:
+        body_preview = (resp.text if resp is not None else "").strip()[:500]
+        status = resp.status_code if resp is not None else "?"
+        raise RuntimeError(f"HTTP {status} {method} (response: {body_preview})")
+    return resp
+
+
+async def request_json_async(
+    client: Any,
+    method: str,
+    url: str,
+    *,
+    params: Optional[dict[str, Any]] = None,
+    headers: Optional[dict[str, str]] = None,
+    timeout_seconds: int = 20,
+    config: Optional[HttpConfig] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Any:
+    """Versão async de `request_json` (httpx), com o mesmo `cache` opcional."""
+    cache_key, cache_ttl = "", 0
+    if cache is not None:
+        cache_key, cache_ttl, cached = cache.lookup(method, url, params)
+        if cached is not None:
+            return cached
+
+    resp = await request_async(
+        client,
+        method,
+        url,
+        params=params,
+        headers=headers,
+        timeout_seconds=timeout_seconds,
+        config=config,
+    )
+    try:
+        data = resp.json()
     except json.JSONDecodeError as e:
         body_preview = (resp.text or "").strip()[:500]
         raise RuntimeError(f"Invalid JSON response ({e}): {body_preview}") from e
+
+    if cache is not None and cache_ttl > 0 and is_cacheable(data):
+        cache.set(cache_key, data, ttl=cache_ttl, url=url)
+    return data
+
+
+async def gather_bounded(
+    factories: Iterable[Callable[[], Awaitable[Any]]],
+    *,
+    limit: int = 10,
+    limiter: Optional[TokenBucket] = None,
+) -> list[Any]:
+    """Executa coroutines com no máximo `limit` em voo (e token bucket opcional).
+
+    Recebe *fábricas* (ex.: `lambda: hg.get_stock_price_async(t)`) para não criar
+    centenas de coroutines pendentes. Retorna na ordem de entrada; exceções são
+    devolvidas como valores (como `return_exceptions=True`).
+    """
+    import asyncio
+
+    sem = asyncio.Semaphore(max(1, int(limit)))
+
+    async def _run(factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with sem:
+            if limiter is not None:
+                wait_s = limiter.try_acquire()
+                while wait_s > 0:
+                    await asyncio.sleep(wait_s)
+                    wait_s = limiter.try_acquire()
+            try:
+                return await factory()
+            except Exception as e:
+                return e
+
+    return await asyncio.gather(*[_run(f) for f in factories])
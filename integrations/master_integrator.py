@@ -32,6 +32,15 @@ class MasterIntegrator:
     - HG Brasil: cotações/mercado (health-check)
     """
     
+    # Prioridade de fontes por tipo de dado (usada por jobs/reconcile_precos.py)
+    DATA_PRIORITIES: Dict[str, List[str]] = {
+        'prices': ['brapi', 'hgbrasil', 'fintz', 'yahoo', 'b3'],
+        'dividends': ['brapi', 'cvm', 'b3'],
+        'fundamentals': ['cvm', 'brapi'],
+        'corporate': ['b3', 'cvm'],
+        'indicators': ['brapi', 'cvm']
+    }
+    
     def __init__(
         self,
         brapi_key: Optional[str] = None,
@@ -129,7 +138,8 @@ class MasterIntegrator:
             if status['status'] == 'online'
         ]
     
-    def get_data_priority(self, data_type: str) -> List[str]:
+    @classmethod
+    def get_data_priority(cls, data_type: str) -> List[str]:
         """
         Define prioridade de fontes por tipo de dado
         
@@ -139,15 +149,7 @@ class MasterIntegrator:
         Returns:
             Lista ordenada de fontes (prioridade decrescente)
         """
-        priorities = {
-            'prices': ['brapi', 'yahoo', 'b3'],
-            'dividends': ['brapi', 'cvm', 'b3'],
-            'fundamentals': ['cvm', 'brapi'],
-            'corporate': ['b3', 'cvm'],
-            'indicators': ['brapi', 'cvm']
-        }
-        
-        return priorities.get(data_type, ['brapi'])
+        return list(cls.DATA_PRIORITIES.get(data_type, ['brapi']))
 
 
 def main():
@@ -0,0 +1,177 @@
+"""Matching aproximado de nomes de empresas: índice TF-IDF de trigramas de caracteres.
+
+Usado no mapeamento CNPJ -> ticker (`jobs/map_cnpj_to_ticker.py`): cada razão social de
+`companies_cvm` vira um vetor esparso de trigramas ("  pe", " pet", "pet", ...) com peso
+TF (sublinear) x IDF, normalizado (L2). O índice é invertido (trigrama -> empresas/pesos
+em arrays NumPy), então a similaridade de cosseno de um LOTE de consultas contra todas as
+empresas é um produto esparso feito com operações vetorizadas (`np.repeat`/`np.bincount`),
+seguido de top-k por linha (`np.argpartition`) — sem laço Python por par (consulta, empresa).
+
+`similarity()` é o re-score fino dos poucos candidatos do top-k: usa `rapidfuzz` quando
+instalado (opcional; `pip install rapidfuzz`) e `difflib.SequenceMatcher` caso contrário
+(mesma escala 0..1).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:  # opcional: re-score ~10-100x mais rápido que difflib
+    from rapidfuzz import fuzz as _rf_fuzz
+except ImportError:  # pragma: no cover - depende do ambiente
+    _rf_fuzz = None
+
+
+def trigrams(text: str) -> List[str]:
+    """Trigramas de caracteres com borda ("  a", " ab", "abc", ...)."""
+    s = f"  {text} "
+    return [s[i : i + 3] for i in range(len(s) - 2)]
+
+
+def similarity(a: str, b: str) -> float:
+    """Similaridade de edição 0..1 (rapidfuzz `ratio` se disponível; senão difflib)."""
+    if not a or not b:
+        return 0.0
+    if _rf_fuzz is not None:
+        return float(_rf_fuzz.ratio(a, b)) / 100.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class TrigramIndex:
+    """Índice invertido TF-IDF de trigramas sobre uma lista de textos (já normalizados).
+
+    Uso:
+        index = TrigramIndex([c.name_norm for c in companies])
+        for hits in index.top_k(query_names, k=10):
+            for doc_idx, cosine in hits: ...
+    """
+
+    def __init__(self, texts: Sequence[str], *, analyzer: Callable[[str], List[str]] = trigrams) -> None:
+        self.analyzer = analyzer
+        self.n_docs = len(texts)
+        self.vocab: Dict[str, int] = {}
+
+        doc_ids: List[int] = []
+        cols: List[int] = []
+        tfs: List[float] = []
+        for i, text in enumerate(texts):
+            for gram, count in Counter(analyzer(text or "")).items():
+                col = self.vocab.setdefault(gram, len(self.vocab))
+                doc_ids.append(i)
+                cols.append(col)
+                tfs.append(1.0 + math.log(count))
+
+        docs = np.asarray(doc_ids, dtype=np.int64)
+        col_arr = np.asarray(cols, dtype=np.int64)
+        df = np.bincount(col_arr, minlength=len(self.vocab)).astype(np.float64)
+        self.idf = np.log((self.n_docs + 1.0) / (df + 1.0)) + 1.0
+        # IDF de trigramas que não aparecem em nenhum documento (contam na norma da consulta)
+        self.idf_unseen = math.log(self.n_docs + 1.0) + 1.0
+
+        weights = np.asarray(tfs, dtype=np.float64) * self.idf[col_arr]
+        norms = np.sqrt(np.bincount(docs, weights=weights * weights, minlength=self.n_docs))
+        weights = weights / np.where(norms > 0, norms, 1.0)[docs]
+
+        # Postings ordenados por trigrama (formato CSC): ptr[col]..ptr[col+1]
+        order = np.argsort(col_arr, kind="stable")
+        self.post_docs = docs[order]
+        self.post_weights = weights[order]
+        self.post_ptr = np.concatenate(([0], np.cumsum(np.bincount(col_arr, minlength=len(self.vocab)))))
+
+    def _vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(colunas, pesos L2-normalizados) da consulta; trigramas desconhecidos só entram na norma."""
+        cols: List[int] = []
+        weights: List[float] = []
+        norm2 = 0.0
+        for gram, count in Counter(self.analyzer(text or "")).items():
+            col = self.vocab.get(gram)
+            w = (1.0 + math.log(count)) * (self.idf[col] if col is not None else self.idf_unseen)
+            norm2 += w * w
+            if col is not None:
+                cols.append(col)
+                weights.append(w)
+        norm = math.sqrt(norm2) or 1.0
+        return np.asarray(cols, dtype=np.int64), np.asarray(weights, dtype=np.float64) / norm
+
+    def scores(self, queries: Sequence[str]) -> np.ndarray:
+        """Matriz densa (len(queries) x n_docs) de cossenos."""
+        out = np.zeros((len(queries), self.n_docs), dtype=np.float64)
+        if not queries or self.n_docs == 0:
+            return out
+
+        vecs = [self._vectorize(q) for q in queries]
+        q_rows = np.concatenate([np.full(len(c), i, dtype=np.int64) for i, (c, _) in enumerate(vecs)])
+        q_cols = np.concatenate([c for c, _ in vecs])
+        q_weights = np.concatenate([w for _, w in vecs])
+        if len(q_cols) == 0:
+            return out
+
+        # Expande cada (consulta, trigrama) nos postings do trigrama, sem laço Python.
+        starts = self.post_ptr[q_cols]
+        lengths = self.post_ptr[q_cols + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return out
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        pos = offsets + np.arange(total, dtype=np.int64)
+
+        rows = np.repeat(q_rows, lengths)
+        values = np.repeat(q_weights, lengths) * self.post_weights[pos]
+        flat = rows * self.n_docs + self.post_docs[pos]
+        out += np.bincount(flat, weights=values, minlength=out.size).reshape(out.shape)
+        return out
+
+    def top_k(
+        self,
+        queries: Sequence[str],
+        *,
+        k: int = 10,
+        batch_size: int = 256,
+        min_score: float = 0.0,
+    ) -> List[List[Tuple[int, float]]]:
+        """Top-k (índice do documento, cosseno) por consulta, em lotes de `batch_size` consultas."""
+        results: List[List[Tuple[int, float]]] = []
+        k = max(1, min(int(k), self.n_docs)) if self.n_docs else 0
+        for i in range(0, len(queries), batch_size):
+            batch = list(queries[i : i + batch_size])
+            if k == 0:
+                results.extend([] for _ in batch)
+                continue
+            sc = self.scores(batch)
+            top = np.argpartition(-sc, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(sc, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for idxs, vals in zip(top, top_scores):
+                results.append([(int(j), float(v)) for j, v in zip(idxs, vals) if v > min_score])
+        return results
+
+
+def best_of(
+    index: TrigramIndex,
+    queries: Sequence[str],
+    *,
+    k: int = 10,
+    rescore: Optional[Callable[[int, int], float]] = None,
+) -> List[Tuple[Optional[int], float, float]]:
+    """(melhor documento, score, segundo melhor score) por consulta.
+
+    Sem `rescore`, o score é o cosseno; com `rescore(i_consulta, i_documento)`, os k
+    candidatos do TF-IDF são re-pontuados e reordenados por ele.
+    """
+    out: List[Tuple[Optional[int], float, float]] = []
+    for qi, hits in enumerate(index.top_k(queries, k=k)):
+        if not hits:
+            out.append((None, 0.0, 0.0))
+            continue
+        scored = [(j, rescore(qi, j) if rescore else s) for j, s in hits]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        second = scored[1][1] if len(scored) > 1 else 0.0
+        out.append((scored[0][0], scored[0][1], second))
+    return out
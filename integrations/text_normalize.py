@@ -0,0 +1,65 @@
+"""Normalização de texto compartilhada pelos matchers (keywords CVM, nomes de empresas, BESST).
+
+`fold()` = reparo de mojibake + minúsculas + sem acentos (NFKD sem combinantes) + sem o
+caractere de substituição (�). É memoizada (LRU): DS_CONTA e razões sociais se repetem
+muito entre empresas/anos, então cada texto distinto é normalizado 1x por processo.
+
+Para colunas inteiras (pandas), `fold_series()` normaliza só os valores distintos
+(`pd.factorize`) e remonta a coluna por índice — sem `.apply` linha a linha.
+
+Mojibake: CSVs da CVM em UTF-8 lidos como latin1/cp1252 viram "PatrimÃ´nio LÃ­quido";
+`repair_mojibake()` desfaz a decodificação errada quando o texto tem esses marcadores.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable
+
+# Bytes líderes de UTF-8 (0xC2/0xC3/0xE2) vistos como latin1/cp1252.
+_MOJIBAKE_MARKERS = ("Ã", "Â", "â€")
+
+
+def repair_mojibake(text: str) -> str:
+    """Desfaz UTF-8 decodificado como latin1/cp1252 (retorna o texto original se não for o caso)."""
+    if not text or not any(m in text for m in _MOJIBAKE_MARKERS):
+        return text
+    for encoding in ("cp1252", "latin-1"):
+        try:
+            return text.encode(encoding).decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+    return text
+
+
+def strip_accents(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=200_000)
+def fold(value: Any) -> str:
+    """Minúsculas, sem acentos, sem mojibake e sem o caractere de substituição (�)."""
+    if value is None:
+        return ""
+    s = repair_mojibake(str(value).strip())
+    return strip_accents(s).lower().replace("�", "")
+
+
+def map_unique(series: Any, func: Callable[[str], Any], *, na_value: Any = None) -> Any:
+    """Aplica `func` 1x por valor distinto da Series (pandas) e remonta a coluna."""
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, sort=False)
+    values = [func(u) for u in uniques]
+    mapped = np.empty(len(values) + 1, dtype=object)
+    mapped[: len(values)] = values
+    mapped[-1] = na_value  # código -1 (NaN/None)
+    return pd.Series(mapped[codes], index=series.index)
+
+
+def fold_series(series: Any) -> Any:
+    """`fold()` vetorizado para uma coluna inteira (NaN -> "")."""
+    return map_unique(series, fold, na_value="")
@@ -0,0 +1,447 @@
+"""Job: Backfill de preços históricos em `precos` (só as lacunas, ao menor custo de API).
+
+Fluxo:
+1) Cobertura atual: 1 consulta agregada (`rpc/precos_cobertura`, migração 015) com as
+   datas que já têm preço por ticker (qualquer fonte). Sem a RPC, cai para paginação.
+2) Lacunas: dias úteis (seg-sex) do intervalo sem preço, descontando as datas do
+   índice local de lacunas conhecidas (feriados / dias sem negociação já consultados).
+   Só entram no índice datas que ficaram dentro do período efetivamente devolvido por
+   uma fonte (entre o primeiro e o último pregão da resposta): uma resposta cortada pelo
+   plano/range não marca como vazios dias que a fonte nem cobriu.
+3) Lacunas próximas são unidas (`--bridge`) para minimizar requests.
+4) Busca por ticker: Brapi (1 request com o menor `range` que cobre a lacuna mais
+   antiga), depois HG Brasil (v2/historical por intervalo) e Fintz (OHLC por intervalo)
+   apenas para o que continuar faltando.
+5) Upsert em lote somente das datas que eram lacuna.
+
+Uso:
+  python -m jobs.backfill_precos_historico [--years 5] [--tickers PETR4,VALE3] [--sources brapi,hgbrasil,fintz]
+  python -m jobs.backfill_precos_historico --dry-run
+
+Env:
+  BRAPI_API_KEY, HGBRASIL_KEY, FINTZ_API_KEY (as fontes sem chave são puladas)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from integrations.brapi_integration import BrapiIntegration
+from integrations.fintz_integration import FintzIntegration
+from integrations.hgbrasil_integration import HGBrasilIntegration
+from integrations.http_utils import TokenBucket
+from jobs.common import BatchUpsertWriter, SupabaseRestClient, get_supabase_admin_client, list_active_tickers, log_job_run
+from jobs.sync_precos_brapi import fintz_ohlc_to_rows
+from jobs.sync_precos_hgbrasil import _extract_hg_error, parse_historical_series
+from web.admin_integrations import get_rate_limit_per_minute
+
+
+GAP_INDEX_PATH = Path("data/backfill/precos_gap_index.json")
+
+# Ranges aceitos pela Brapi (relativos a hoje) e quantos dias cobrem.
+BRAPI_RANGES: tuple[tuple[str, int], ...] = (
+    ("5d", 5),
+    ("1mo", 31),
+    ("3mo", 92),
+    ("6mo", 183),
+    ("1y", 366),
+    ("2y", 731),
+    ("5y", 1827),
+    ("10y", 3653),
+    ("max", 10**6),
+)
+
+DEFAULT_SOURCES = ("brapi", "hgbrasil", "fintz")
+
+
+@dataclass(frozen=True)
+class GapRange:
+    start: date
+    end: date
+
+
+def business_days(start: date, end: date) -> List[date]:
+    out: List[date] = []
+    d = start
+    while d <= end:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def merge_gaps(missing: Iterable[date], calendar: List[date], *, bridge: int = 5) -> List[GapRange]:
+    """Agrupa dias faltantes em intervalos; une intervalos separados por <= `bridge` dias úteis."""
+    pos = {d: i for i, d in enumerate(calendar)}
+    days = sorted(d for d in missing if d in pos)
+    ranges: List[GapRange] = []
+    for d in days:
+        if ranges and pos[d] - pos[ranges[-1].end] <= bridge + 1:
+            ranges[-1] = GapRange(ranges[-1].start, d)
+        else:
+            ranges.append(GapRange(d, d))
+    return ranges
+
+
+class GapIndex:
+    """Índice local (JSON) de datas já consultadas sem preço em nenhuma fonte, por ticker."""
+
+    def __init__(self, path: Path = GAP_INDEX_PATH) -> None:
+        self.path = path
+        self.data: Dict[str, Set[str]] = {}
+        if path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                self.data = {str(k): set(v or []) for k, v in (raw.get("tickers") or {}).items()}
+            except Exception:
+                self.data = {}
+
+    def known_empty(self, ticker: str) -> Set[str]:
+        return self.data.get(ticker, set())
+
+    def add(self, ticker: str, days: Iterable[str]) -> None:
+        self.data.setdefault(ticker, set()).update(days)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "tickers": {k: sorted(v) for k, v in sorted(self.data.items()) if v},
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def load_coverage(sb: SupabaseRestClient, tickers: List[str], start: date, end: date) -> Dict[str, Set[str]]:
+    """Datas com preço por ticker no intervalo (1 RPC; fallback: paginação por lotes de tickers)."""
+    coverage: Dict[str, Set[str]] = {t: set() for t in tickers}
+    try:
+        rows = sb.rpc(
+            "precos_cobertura",
+            {"p_inicio": start.isoformat(), "p_fim": end.isoformat(), "p_tickers": tickers},
+        )
+        for r in rows or []:
+            t = str(r.get("ticker") or "").strip().upper()
+            if t in coverage:
+                coverage[t].update(str(d)[:10] for d in (r.get("datas") or []))
+        return coverage
+    except Exception as e:
+        print(f"[AVISO] rpc/precos_cobertura indisponível ({e}); usando paginação em precos.")
+        print("[DICA] Rode a migração no Supabase: sql/015_add_precos_cobertura_rpc.sql")
+
+    for i in range(0, len(tickers), 50):
+        chunk = tickers[i : i + 50]
+        rows = sb.select_all(
+            "precos",
+            f"select=ticker,data&ticker=in.({','.join(chunk)})"
+            f"&data=gte.{start.isoformat()}&data=lte.{end.isoformat()}&order=ticker.asc,data.asc",
+        )
+        for r in rows:
+            t = str(r.get("ticker") or "").strip().upper()
+            if t in coverage:
+                coverage[t].add(str(r.get("data"))[:10])
+    return coverage
+
+
+def brapi_history_to_rows(ticker: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    results = (data or {}).get("results") or []
+    if not results:
+        return []
+    rows: List[Dict[str, Any]] = []
+    for p in results[0].get("historicalDataPrice") or []:
+        try:
+            day = datetime.fromtimestamp(int(p.get("date")), tz=timezone.utc).date().isoformat()
+            close = float(p.get("close"))
+        except Exception:
+            continue
+        if close <= 0:
+            continue
+        rows.append(
+            {
+                "ticker": ticker,
+                "data": day,
+                "fechamento": close,
+                "abertura": float(p["open"]) if p.get("open") is not None else None,
+                "maxima": float(p["high"]) if p.get("high") is not None else None,
+                "minima": float(p["low"]) if p.get("low") is not None else None,
+                "volume": int(p["volume"]) if p.get("volume") is not None else None,
+                "moeda": "BRL",
+                "fonte": "brapi",
+            }
+        )
+    return rows
+
+
+def _brapi_range_for(oldest: date, today: date) -> str:
+    days = (today - oldest).days
+    for name, span in BRAPI_RANGES:
+        if span >= days:
+            return name
+    return "max"
+
+
+class _Providers:
+    def __init__(self, sources: Iterable[str]) -> None:
+        self.order: List[str] = []
+        self.clients: Dict[str, Any] = {}
+        self.limiters: Dict[str, TokenBucket] = {}
+        self.blocked: Dict[str, str] = {}
+
+        keys = {
+            "brapi": (os.getenv("BRAPI_API_KEY") or "").strip(),
+            "hgbrasil": (os.getenv("HGBRASIL_KEY") or os.getenv("HG_BRASIL_KEY") or "").strip(),
+            "fintz": (os.getenv("FINTZ_API_KEY") or os.getenv("FINTZ_KEY") or "").strip(),
+        }
+        factories = {"brapi": BrapiIntegration, "hgbrasil": HGBrasilIntegration, "fintz": FintzIntegration}
+        for name in sources:
+            if name not in factories:
+                print(f"[AVISO] Fonte desconhecida ignorada: {name}")
+                continue
+            if not keys[name]:
+                print(f"[AVISO] Sem chave para {name}; fonte pulada.")
+                continue
+            self.order.append(name)
+            self.clients[name] = factories[name](api_key=keys[name])
+            self.limiters[name] = TokenBucket(get_rate_limit_per_minute(name))
+
+    def fetch(
+        self, name: str, ticker: str, ranges: List[GapRange], today: date
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """(linhas do ticker, períodos devolvidos: 1o e último pregão de cada resposta)."""
+        client = self.clients[name]
+        limiter = self.limiters[name]
+        rows: List[Dict[str, Any]] = []
+        spans: List[Tuple[str, str]] = []
+
+        if name == "brapi":
+            # Range relativo a hoje: 1 request cobre todas as lacunas do ticker.
+            limiter.acquire()
+            period = _brapi_range_for(ranges[0].start, today)
+            got = brapi_history_to_rows(ticker, client.get_historical_data(ticker, range_period=period))
+            rows.extend(got)
+            spans.extend(_returned_span(ticker, got))
+        elif name == "hgbrasil":
+            for r in ranges:
+                limiter.acquire()
+                resp = client.get_historical_v2(
+                    symbols=f"B3:{ticker}",
+                    sample_by="1d",
+                    start_date=r.start.isoformat(),
+                    end_date=r.end.isoformat(),
+                )
+                err = _extract_hg_error(resp)
+                if err:
+                    self.blocked[name] = err
+                    raise RuntimeError(err)
+                got = parse_historical_series(resp)
+                rows.extend(got)
+                spans.extend(_returned_span(ticker, got))
+        elif name == "fintz":
+            for r in ranges:
+                limiter.acquire()
+                points = client.get_ohlc_history(ticker, data_inicio=r.start.isoformat(), data_fim=r.end.isoformat())
+                got = fintz_ohlc_to_rows(ticker, points)
+                rows.extend(got)
+                spans.extend(_returned_span(ticker, got))
+        return rows, spans
+
+
+def _returned_span(ticker: str, rows: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """[(primeiro, último)] pregão do ticker numa resposta; [] se ela veio vazia."""
+    days = [str(r["data"]) for r in rows if r.get("ticker") == ticker and r.get("data")]
+    return [(min(days), max(days))] if days else []
+
+
+def backfill_ticker(
+    ticker: str,
+    missing: Set[str],
+    calendar: List[date],
+    providers: _Providers,
+    *,
+    today: date,
+    bridge: int,
+) -> Tuple[List[Dict[str, Any]], Set[str], bool, Set[str]]:
+    """Busca as lacunas de 1 ticker nas fontes, em ordem.
+
+    Retorna (linhas das datas faltantes, datas ainda sem preço, todas as fontes responderam,
+    datas sem negócio). `all_ok` é False se alguma fonte da ordem falhou ou foi pulada
+    (bloqueada): nesse caso nenhuma data restante é tratada como "sem negócio". Com `all_ok`,
+    só contam como sem negócio as restantes dentro de um período devolvido por alguma fonte.
+    """
+    rows_out: List[Dict[str, Any]] = []
+    remaining = set(missing)
+    all_ok = bool(providers.order)
+    spans: List[Tuple[str, str]] = []
+
+    for name in providers.order:
+        if not remaining:
+            break
+        if name in providers.blocked:
+            all_ok = False
+            continue
+        ranges = merge_gaps((date.fromisoformat(d) for d in remaining), calendar, bridge=bridge)
+        try:
+            fetched, returned = providers.fetch(name, ticker, ranges, today)
+        except Exception as e:
+            print(f"[AVISO] {ticker}: {name} falhou: {e}")
+            all_ok = False
+            continue
+        spans.extend(returned)
+        for row in fetched:
+            if row["ticker"] == ticker and row["data"] in remaining:
+                rows_out.append(row)
+                remaining.discard(row["data"])
+
+    no_trading = {d for d in remaining if any(a <= d <= b for a, b in spans)} if all_ok else set()
+    return rows_out, remaining, all_ok, no_trading
+
+
+def main(
+    *,
+    years: int = 5,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    tickers: Optional[List[str]] = None,
+    sources: Iterable[str] = DEFAULT_SOURCES,
+    bridge: int = 5,
+    workers: int = 4,
+    dry_run: bool = False,
+    reset_gap_index: bool = False,
+) -> None:
+    started_at = datetime.now(timezone.utc)
+    sb = get_supabase_admin_client()
+
+    today = date.today()
+    end_d = date.fromisoformat(end) if end else today - timedelta(days=1)
+    start_d = date.fromisoformat(start) if start else end_d - timedelta(days=int(365.25 * years))
+
+    status = "success"
+    message: Optional[str] = None
+    rows_written = 0
+
+    try:
+        if not tickers:
+            tickers = list_active_tickers(sb)
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        if not tickers:
+            print("[AVISO] Nenhum ticker para backfill.")
+            return
+
+        calendar = business_days(start_d, end_d)
+        cal_iso = [d.isoformat() for d in calendar]
+        gap_index = GapIndex()
+        if reset_gap_index:
+            gap_index.data = {}
+
+        coverage = load_coverage(sb, tickers, start_d, end_d)
+        gaps: Dict[str, Set[str]] = {}
+        for t in tickers:
+            missing = set(cal_iso) - coverage.get(t, set()) - gap_index.known_empty(t)
+            if missing:
+                gaps[t] = missing
+
+        total_missing = sum(len(v) for v in gaps.values())
+        total_ranges = sum(
+            len(merge_gaps((date.fromisoformat(d) for d in v), calendar, bridge=bridge)) for v in gaps.values()
+        )
+        print(
+            f"[INFO] {start_d} a {end_d}: {len(calendar)} dia(s) útil(eis), {len(gaps)}/{len(tickers)} ticker(s) "
+            f"com lacunas, {total_missing} data(s) faltantes em {total_ranges} intervalo(s)"
+        )
+        if dry_run or not gaps:
+            return
+
+        providers = _Providers(sources)
+        if not providers.order:
+            raise RuntimeError("Nenhuma fonte disponível (configure BRAPI_API_KEY / HGBRASIL_KEY / FINTZ_API_KEY)")
+
+        still_missing = 0
+        with BatchUpsertWriter(sb, "precos", on_conflict="ticker,data,fonte", batch_size=1000) as writer:
+            with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+                futures = {
+                    pool.submit(backfill_ticker, t, missing, calendar, providers, today=today, bridge=bridge): t
+                    for t, missing in gaps.items()
+                }
+                for n, fut in enumerate(as_completed(futures), start=1):
+                    ticker = futures[fut]
+                    rows, remaining, all_ok, no_trading = fut.result()
+                    writer.put(rows)
+                    if all_ok and no_trading:
+                        # Todas as fontes responderam e a data, coberta pela resposta, segue vazia.
+                        gap_index.add(ticker, no_trading)
+                    still_missing += len(remaining)
+                    if n % 25 == 0 or n == len(futures):
+                        print(f"[*] {n}/{len(futures)} ticker(s) processados")
+
+        gap_index.save()
+        rows_written = writer.rows_written
+        if providers.blocked:
+            for name, err in providers.blocked.items():
+                print(f"[AVISO] {name} bloqueado durante o backfill: {err}")
+        if writer.errors:
+            raise RuntimeError(f"{writer.rows_failed} linha(s) não gravadas: {writer.last_error}")
+
+        print(f"✅ {rows_written} preço(s) históricos gravados em precos; {still_missing} data(s) seguem sem preço")
+
+    except Exception as e:
+        status = "error"
+        message = str(e)
+        print(f"[ERRO] Falha no backfill de preços: {e}")
+        raise
+
+    finally:
+        finished_at = datetime.now(timezone.utc)
+        log_job_run(
+            sb,
+            job_name="backfill_precos_historico",
+            status=status,
+            rows_processed=rows_written,
+            message=message,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill de preços históricos (só lacunas) -> precos")
+    parser.add_argument("--years", type=int, default=5, help="Anos de histórico (default: 5)")
+    parser.add_argument("--start", type=str, default=None, help="Data inicial YYYY-MM-DD (sobrepõe --years)")
+    parser.add_argument("--end", type=str, default=None, help="Data final YYYY-MM-DD (default: ontem)")
+    parser.add_argument("--tickers", type=str, default=None, help="Tickers separados por vírgula (default: ativos)")
+    parser.add_argument(
+        "--sources",
+        type=str,
+        default=",".join(DEFAULT_SOURCES),
+        help="Ordem das fontes (default: brapi,hgbrasil,fintz)",
+    )
+    parser.add_argument(
+        "--bridge",
+        type=int,
+        default=5,
+        help="Une lacunas separadas por até N dias úteis com preço num só request (default: 5)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Tickers em paralelo (default: 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Só calcula e mostra as lacunas")
+    parser.add_argument("--reset-gap-index", action="store_true", help="Ignora o índice local de lacunas conhecidas")
+    args = parser.parse_args()
+
+    main(
+        years=int(args.years),
+        start=args.start,
+        end=args.end,
+        tickers=[t for t in str(args.tickers).split(",") if t.strip()] if args.tickers else None,
+        sources=[s.strip() for s in str(args.sources).split(",") if s.strip()],
+        bridge=int(args.bridge),
+        workers=int(args.workers),
+        dry_run=bool(args.dry_run),
+        reset_gap_index=bool(args.reset_gap_index),
+    )
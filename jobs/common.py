@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import json
 import os
+import queue
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, Iterable
 from pathlib import Path
 import csv
 
-from dotenv import load_dotenv
-import requests
+from integrations.http_utils import instrument_session
+from jobs import telemetry
+
+# `requests` e `dotenv` são importados sob demanda (ver scripts/check_import_time.py):
+# `--help`, `--dry-run` e o servidor web em modo mock não pagam ~150 ms na importação.
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
 
 
 @dataclass(frozen=True)
@@ -44,6 +53,8 @@ def _url_from_project_ref(project_ref: str) -> str:
 
 
 def load_settings() -> Settings:
+    from dotenv import load_dotenv
+
     # Local dev: allow .env.local; CI: environment variables take precedence
     load_dotenv(dotenv_path=".env.local", override=False)
 
@@ -98,11 +109,18 @@ def load_settings() -> Settings:
 
 
 class SupabaseRestClient:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, *, pool_maxsize: int | None = None) -> None:
+        import requests
+
         self._base_rest = settings.supabase_url.rstrip("/") + "/rest/v1"
 
         # Reuse HTTP session (important on Windows to avoid repeated TLS/CA overhead)
-        self._session = requests.Session()
+        self._session = instrument_session(requests.Session())
+        if pool_maxsize:
+            # Vários jobs/threads no mesmo client (orquestrador): pool maior que o default (10)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
 
         # Prefer service role for writes; fall back to anon (works if RLS is disabled
         # or policies allow the operation).
@@ -126,6 +144,32 @@ class SupabaseRestClient:
             raise RuntimeError(f"Unexpected response type from {table}: {type(data)}")
         return data
 
+    def select_all(self, table: str, query: str, *, page_size: int = 1000) -> list[dict[str, Any]]:
+        """Como `select`, mas pagina com limit/offset até esgotar o resultado.
+
+        O PostgREST corta respostas em `max-rows` (1000 por padrão no Supabase);
+        a `query` deve ter `order=` determinístico para a paginação ser estável.
+        """
+        rows: list[dict[str, Any]] = []
+        offset = 0
+        while True:
+            batch = self.select(table, f"{query}&limit={int(page_size)}&offset={offset}")
+            rows.extend(batch)
+            if len(batch) < page_size:
+                break
+            offset += page_size
+        return rows
+
+    def rpc(self, function: str, params: dict[str, Any] | None = None) -> Any:
+        """Chama uma função SQL exposta pelo PostgREST (`POST /rpc/<function>`)."""
+        url = f"{self._base_rest}/rpc/{function}"
+        resp = self._session.post(url, headers=self._headers, json=params or {}, timeout=60)
+        if not resp.ok:
+            raise RuntimeError(
+                f"Supabase rpc failed ({resp.status_code}) {function}: {resp.text}"
+            )
+        return resp.json()
+
     def count(self, table: str, filters: str = "") -> int:
         """Retorna contagem exata de linhas via PostgREST.
 
@@ -178,7 +222,22 @@ class SupabaseRestClient:
             )
 
 
+_SHARED_CLIENT: SupabaseRestClient | None = None
+
+
+def set_shared_supabase_client(sb: SupabaseRestClient | None) -> None:
+    """Faz `get_supabase_admin_client()` devolver sempre `sb` (None desfaz).
+
+    Usado pelo orquestrador (`jobs/orchestrator.py`) para que todos os jobs do mesmo
+    processo compartilhem settings e sessão HTTP.
+    """
+    global _SHARED_CLIENT
+    _SHARED_CLIENT = sb
+
+
 def get_supabase_admin_client() -> SupabaseRestClient:
+    if _SHARED_CLIENT is not None:
+        return _SHARED_CLIENT
     settings = load_settings()
     return SupabaseRestClient(settings)
 
@@ -228,6 +287,187 @@ def list_active_tickers(sb: SupabaseRestClient) -> list[str]:
     return universo or list(TICKERS)
 
 
+def load_precos_diarios(sb: SupabaseRestClient, day: str) -> dict[str, dict[str, Any]]:
+    """Lê o fechamento canônico do dia (tabela `precos_diarios`, ver jobs/reconcile_precos.py).
+
+    Retorna {ticker: {"fechamento": float, "fonte": str}}. Se a tabela não existir
+    (migração 014 não aplicada) ou não houver reconciliação para o dia, retorna {}.
+    """
+    try:
+        rows = sb.select_all(
+            "precos_diarios",
+            f"select=ticker,fechamento,fonte&data=eq.{day}&order=ticker.asc",
+        )
+    except Exception:
+        return {}
+
+    out: dict[str, dict[str, Any]] = {}
+    for r in rows:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        try:
+            close = float(r.get("fechamento"))
+        except Exception:
+            continue
+        if not ticker or close <= 0:
+            continue
+        out[ticker] = {"fechamento": close, "fonte": str(r.get("fonte") or "precos_diarios")}
+    return out
+
+
+
+class BatchUpsertWriter:
+    """Upsert em background: uma thread consome uma fila e grava em lotes de `batch_size`.
+
+    Permite sobrepor fetch (rede) e escrita no Supabase. Uso:
+
+        with BatchUpsertWriter(sb, "precos", on_conflict="ticker,data,fonte") as writer:
+            writer.put(rows)
+        print(writer.rows_written, writer.errors)
+
+    Falhas de upsert não derrubam a thread: o lote é contado em `rows_failed` e o
+    erro mais recente fica em `last_error`. `on_flush(chunk)` é chamado (na thread
+    do writer) após cada lote gravado com sucesso — ex.: para avançar um `JobCheckpoint`.
+
+    `writers=N` usa N threads consumindo a mesma fila (N lotes gravados em paralelo);
+    nesse caso `on_flush` pode ser chamado de threads diferentes ao mesmo tempo.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        sb: SupabaseRestClient,
+        table: str,
+        *,
+        on_conflict: str | None = None,
+        batch_size: int = 500,
+        max_pending: int = 50,
+        on_flush: Callable[[list[dict[str, Any]]], None] | None = None,
+        writers: int = 1,
+    ) -> None:
+        self.sb = sb
+        self.on_flush = on_flush
+        self.table = table
+        self.on_conflict = on_conflict
+        self.batch_size = max(1, int(batch_size))
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._lock = threading.Lock()
+        n = max(1, int(writers))
+        self._threads = [
+            threading.Thread(target=self._run, name=f"upsert-{table}" + (f"-{i}" if n > 1 else ""), daemon=True)
+            for i in range(n)
+        ]
+        self._started = False
+        # A thread do writer registra o tempo de upsert na telemetria de quem o criou
+        self._telemetry = telemetry.current()
+
+    def start(self) -> "BatchUpsertWriter":
+        if not self._started:
+            for thread in self._threads:
+                thread.start()
+            self._started = True
+        return self
+
+    def put(self, rows: list[dict[str, Any]]) -> None:
+        if rows:
+            self._queue.put(list(rows))
+
+    def close(self) -> None:
+        if self._started:
+            for _ in self._threads:
+                self._queue.put(self._STOP)
+            for thread in self._threads:
+                thread.join()
+            self._started = False
+
+    def __enter__(self) -> "BatchUpsertWriter":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _flush(self, pending: list[dict[str, Any]]) -> None:
+        for i in range(0, len(pending), self.batch_size):
+            chunk = pending[i : i + self.batch_size]
+            t0 = time.perf_counter()
+            try:
+                self.sb.upsert(self.table, chunk, on_conflict=self.on_conflict)
+                self._telemetry.add_phase(f"upsert_{self.table}", time.perf_counter() - t0)
+                with self._lock:
+                    self.rows_written += len(chunk)
+                    self.batches += 1
+                if self.on_flush is not None:
+                    self.on_flush(chunk)
+            except Exception as e:
+                with self._lock:
+                    self.rows_failed += len(chunk)
+                    self.errors += 1
+                    self.last_error = str(e)
+                print(f"[ERRO] Upsert em {self.table} falhou ({len(chunk)} linha(s)): {e}")
+
+    def _run(self) -> None:
+        pending: list[dict[str, Any]] = []
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            pending.extend(item)
+            if len(pending) >= self.batch_size:
+                full = len(pending) - (len(pending) % self.batch_size)
+                self._flush(pending[:full])
+                pending = pending[full:]
+        if pending:
+            self._flush(pending)
+
+
+
+class JobCheckpoint:
+    """Checkpoint local (JSON) com os itens já concluídos de um job, para retomar execuções.
+
+    Arquivo: data/checkpoints/<job>_<key>.json (ex.: key = data de referência).
+    Thread-safe; cada `mark()` regrava o arquivo de forma atômica.
+    """
+
+    def __init__(self, job_name: str, key: str, *, base_dir: str | Path = "data/checkpoints") -> None:
+        safe_key = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(key))
+        self.path = Path(base_dir) / f"{job_name}_{safe_key}.json"
+        self._lock = threading.Lock()
+        self.done: set[str] = set()
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.done = {str(x) for x in (data.get("done") or [])}
+            except Exception:
+                self.done = set()
+
+    def mark(self, items: Iterable[str]) -> None:
+        with self._lock:
+            self.done.update(str(x) for x in items)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps(
+                    {"done": sorted(self.done), "updated_at": datetime.now(timezone.utc).isoformat()},
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            )
+            tmp.replace(self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.done = set()
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
 def log_job_run(
     sb: SupabaseRestClient,
     *,
@@ -241,7 +481,18 @@ def log_job_run(
     """Registra uma execução em job_runs.
 
     Observação: usamos insert via POST (upsert sem on_conflict) para manter simples.
+    Inclui `metrics` (fases, HTTP, pico de RSS, linhas/s; ver `jobs/telemetry.py`) e
+    imprime o resumo; sem a coluna (migração 019 não aplicada), grava sem ela.
     """
+    metrics: dict[str, Any] | None = None
+    try:
+        metrics = telemetry.collect(rows_processed)
+        telemetry.print_summary(job_name, metrics)
+    except Exception:
+        metrics = None
+    finally:
+        telemetry.reset()
+
     payload = {
         "job_name": job_name,
         "status": status,
@@ -250,8 +501,17 @@ def log_job_run(
         "started_at": started_at.astimezone(timezone.utc).isoformat(),
         "finished_at": finished_at.astimezone(timezone.utc).isoformat(),
     }
+    if metrics is not None:
+        payload["metrics"] = metrics
     try:
-        sb.upsert("job_runs", [payload])
+        try:
+            sb.upsert("job_runs", [payload])
+        except RuntimeError as e:
+            msg = str(e)
+            if "metrics" not in payload or not ("metrics" in msg or "PGRST204" in msg or "42703" in msg):
+                raise
+            payload.pop("metrics")
+            sb.upsert("job_runs", [payload])
     except BaseException:
         # Logging de jobs não pode quebrar o job principal
         return
@@ -283,3 +543,18 @@ def load_universo_mvp_tickers(path: str | None = None) -> list[str]:
         seen.add(t)
         tickers.append(t)
     return tickers
+
+
+def parse_years(text: str) -> list[int]:
+    """"2015-2024" / "2019,2021,2023-2024" -> lista ordenada de anos."""
+    years: set[int] = set()
+    for part in str(text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+            years.update(range(min(start, end), max(start, end) + 1))
+        else:
+            years.add(int(part))
+    return sorted(years)
@@ -3,6 +3,12 @@
 Esse job transforma o payload DFP (CVM) em colunas normalizadas para consumo
 fácil (API/UI/ranking) sem precisar ler JSON gigante.
 
+Leitura com projeção (ver `jobs/fundamentals_raw_reader.py`): primeiro só
+`cnpj/year/extracted/statement_counts`. Métricas ausentes em `extracted` são buscadas por
+código de conta em `cvm_statement_lines` (sql/018; lookup indexado, sem limite de linhas);
+só o que ainda faltar cai na heurística por keyword sobre `payload->statements->DRE`...
+(apenas o demonstrativo necessário).
+
 Requer (Supabase): executar `sql/011_add_cvm_dfp_metrics_daily.sql`.
 """
 
@@ -10,9 +16,30 @@ from __future__ import annotations
 
 from datetime import date, datetime, timezone
 from typing import Any, Dict, List, Optional
-import unicodedata
 
-from jobs.common import get_supabase_admin_client, log_job_run
+from integrations.cvm_metric_resolver import resolve_rows
+from integrations.cvm_statements import STANDARD_ACCOUNT_CODES, TABLE as STATEMENT_LINES_TABLE, fetch_account_values
+from jobs.common import SupabaseRestClient, get_supabase_admin_client, log_job_run
+from jobs.fundamentals_raw_reader import PAYLOAD_PROJECTIONS, fetch_payloads_by_id, select_projected
+
+
+DIVIDA_BRUTA_KEYWORDS = ["emprest", "financi", "debent", "debênt", "arrend", "leasing", "capta"]
+CAIXA_KEYWORDS = ["caixa", "equival"]
+# Nota: keywords com encoding ASCII para pegar mojibake de CSVs CVM
+LUCRO_LIQUIDO_KEYWORDS = [
+    "consolidado do periodo",  # pega "Lucro/Prejuízo Consolidado do Período"
+    "consolidado do exercicio",
+    "lucro liquido",
+    "resultado liquido",
+    "lucro atribuivel",
+]
+
+# Métrica de `extracted` -> demonstrativo usado pela heurística quando ela está ausente.
+STATEMENT_FOR_METRIC = {
+    "divida_bruta": "BPP",
+    "caixa_equivalentes": "BPA",
+    "lucro_liquido": "DRE",
+}
 
 
 def _to_float(value: Any) -> Optional[float]:
@@ -56,70 +83,26 @@ def _extract_from_statement_rows(
     *,
     as_of_date: str,
     keywords: List[str],
+    codes: Optional[List[str]] = None,
 ) -> Optional[float]:
-    """Extrai um valor (heurístico) a partir de uma lista de linhas do demonstrativo.
+    """Extrai um valor a partir de uma lista de linhas do demonstrativo.
 
     Estratégia:
     - filtra por DT_REFER == as_of_date (se possível)
-    - filtra DS_CONTA contendo qualquer keyword
-    - evita dupla contagem mantendo o nível mais agregado (menor profundidade de CD_CONTA)
-    - soma VL_CONTA nesse nível
+    - usa os códigos padrão de conta (`codes`), quando presentes
+    - senão, filtra DS_CONTA contendo qualquer keyword e mantém o nível mais agregado
+      (menor profundidade de CD_CONTA), somando VL_CONTA nesse nível
     """
     if not isinstance(rows, list) or not rows:
         return None
 
-    def _norm_text(v: Any) -> str:
-        s = str(v or "").strip().lower()
-        # Remove acentos e normaliza para facilitar matching por keyword.
-        s = unicodedata.normalize("NFKD", s)
-        s = "".join(ch for ch in s if not unicodedata.combining(ch))
-        # Remove caracteres de substituição comuns em textos com encoding ruim.
-        s = s.replace("�", "")
-        return s
-
     target = str(as_of_date or "").strip()
     same_date = [r for r in rows if isinstance(r, dict) and str(r.get("DT_REFER") or "").strip() == target]
     candidates = same_date if same_date else [r for r in rows if isinstance(r, dict)]
     if not candidates:
         return None
 
-    keys = [_norm_text(k) for k in keywords if k and str(k).strip()]
-    if not keys:
-        return None
-
-    matched: List[dict] = []
-    for r in candidates:
-        ds = _norm_text(r.get("DS_CONTA"))
-        if not ds:
-            continue
-        if any(k in ds for k in keys):
-            matched.append(r)
-
-    if not matched:
-        return None
-
-    # Profundidade (menor = mais agregado)
-    depths: List[tuple[int, Optional[float]]] = []
-    for r in matched:
-        cd = _norm_text(r.get("CD_CONTA"))
-        depth = cd.count(".") if cd else 999
-        depths.append((depth, _as_float(r.get("VL_CONTA"))))
-
-    min_depth = min(d for d, _ in depths)
-    total = 0.0
-    has_any = False
-    for r in matched:
-        cd = _norm_text(r.get("CD_CONTA"))
-        depth = cd.count(".") if cd else 999
-        if depth != min_depth:
-            continue
-        v = _as_float(r.get("VL_CONTA"))
-        if v is None:
-            continue
-        total += float(v)
-        has_any = True
-
-    return total if has_any else None
+    return resolve_rows(candidates, keywords=keywords, codes=codes or ())
 
 
 def _strip_keys(rows: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
@@ -134,6 +117,118 @@ def _strip_keys(rows: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, A
     return out
 
 
+def _fill_from_statement_lines(sb: SupabaseRestClient, raws: List[Dict[str, Any]]) -> int:
+    """Preenche métricas ausentes de `extracted` por código de conta; retorna quantas foram preenchidas."""
+    missing: Dict[tuple, List[Dict[str, Any]]] = {}
+    for r in raws:
+        payload = r.get("payload")
+        if not isinstance(payload, dict):
+            continue
+        extracted = payload.setdefault("extracted", {})
+        if not isinstance(extracted, dict):
+            extracted = payload["extracted"] = {}
+        if all(_to_float(extracted.get(m)) is not None for m in STANDARD_ACCOUNT_CODES):
+            continue
+        cnpj = "".join(c for c in str(payload.get("cnpj") or "") if c.isdigit()).zfill(14)
+        as_of_date = str(r.get("as_of_date") or "").strip()
+        if cnpj.strip("0") and as_of_date:
+            missing.setdefault((cnpj, as_of_date), []).append(extracted)
+    if not missing:
+        return 0
+
+    try:
+        values = fetch_account_values(sb, missing.keys())
+    except Exception as e:
+        if "PGRST205" in str(e) or STATEMENT_LINES_TABLE in str(e):
+            print(f"[AVISO] {STATEMENT_LINES_TABLE} indisponível; usando só a heurística dos statements.")
+            return 0
+        raise
+
+    filled = 0
+    for key, targets in missing.items():
+        found = values.get(key) or {}
+        for extracted in targets:
+            for metric, value in found.items():
+                if _to_float(extracted.get(metric)) is None:
+                    extracted[metric] = value
+                    filled += 1
+    return filled
+
+
+def _load_statements(
+    sb: SupabaseRestClient,
+    raws: List[Dict[str, Any]],
+) -> int:
+    """Completa `payload.statements` só onde a heurística precisa; retorna quantas linhas buscaram."""
+    needed_by_id: Dict[int, tuple] = {}
+    for r in raws:
+        payload = r.get("payload")
+        if not isinstance(payload, dict) or r.get("id") is None:
+            continue
+        extracted = payload.get("extracted") if isinstance(payload.get("extracted"), dict) else {}
+        needed = {st for metric, st in STATEMENT_FOR_METRIC.items() if _to_float(extracted.get(metric)) is None}
+        if needed:
+            needed_by_id[int(r["id"])] = tuple(sorted(needed))
+
+    # Agrupa por conjunto de demonstrativos para montar 1 select por grupo.
+    groups: Dict[tuple, List[int]] = {}
+    for rid, needed in needed_by_id.items():
+        groups.setdefault(needed, []).append(rid)
+
+    fetched: Dict[int, Dict[str, Any]] = {}
+    for needed, ids in groups.items():
+        fetched.update(fetch_payloads_by_id(sb, ids, keys=[("statements", st) for st in needed]))
+
+    for r in raws:
+        extra = fetched.get(int(r["id"])) if r.get("id") is not None else None
+        if extra and isinstance(r.get("payload"), dict):
+            r["payload"]["statements"] = extra.get("statements") or {}
+    return len(needed_by_id)
+
+
+def _statement_count(payload: Dict[str, Any], statements: Any, name: str) -> Optional[int]:
+    counts = payload.get("statement_counts")
+    if isinstance(counts, dict) and counts.get(name) is not None:
+        return _safe_int(counts.get(name))
+    rows = statements.get(name) if isinstance(statements, dict) else None
+    return len(rows) if isinstance(rows, list) else None
+
+
+def _upsert_metrics(sb: SupabaseRestClient, out: List[Dict[str, Any]]) -> None:
+    # PostgREST exige as mesmas chaves em todas as linhas de um upsert: agrupa por conjunto de chaves
+    # (contagens de linhas ficam de fora quando não foram lidas, para não sobrescrever com NULL).
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in out:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+    for rows in groups.values():
+        _upsert_metrics_compat(sb, rows)
+
+
+def _upsert_metrics_compat(sb: SupabaseRestClient, out: List[Dict[str, Any]]) -> None:
+    try:
+        sb.upsert("cvm_dfp_metrics_daily", out, on_conflict="ticker,as_of_date,source")
+    except Exception as e:
+        # Compatibilidade: se a migration 012 (colunas de alavancagem) não foi aplicada,
+        # tenta re-upsert sem as colunas novas.
+        msg = str(e)
+        if any(k in msg for k in ["divida_bruta", "caixa_equivalentes", "divida_liquida", "lucro_liquido", "roe_percent", "payout_percent_keywords", "divida_liquida_pl", "PGRST", "column"]):
+            stripped = _strip_keys(
+                out,
+                [
+                    "divida_bruta",
+                    "caixa_equivalentes",
+                    "divida_liquida",
+                    "lucro_liquido",
+                    "roe_percent",
+                    "payout_percent_keywords",
+                    "divida_liquida_pl",
+                ],
+            )
+            sb.upsert("cvm_dfp_metrics_daily", stripped, on_conflict="ticker,as_of_date,source")
+        else:
+            raise
+
+
 def main(*, year: int, max_rows: int = 5000) -> None:
     sb = get_supabase_admin_client()
     started_at = datetime.now(timezone.utc)
@@ -146,17 +241,25 @@ def main(*, year: int, max_rows: int = 5000) -> None:
         start = date(int(year), 1, 1).isoformat()
         end = date(int(year), 12, 31).isoformat()
 
-        raws = sb.select(
-            "fundamentals_raw",
-            "select=id,ticker,as_of_date,source,payload"
+        raws = select_projected(
+            sb,
             f"&source=eq.cvm&as_of_date=gte.{start}&as_of_date=lte.{end}"
             f"&order=as_of_date.desc&limit={int(max_rows)}",
+            keys=PAYLOAD_PROJECTIONS["cvm"],
+            paged=False,
         )
 
         if not raws:
             print(f"[AVISO] Nenhum payload CVM (DFP) em fundamentals_raw para {year}.")
             return
 
+        filled = _fill_from_statement_lines(sb, raws)
+        if filled:
+            print(f"[INFO] {filled} métrica(s) preenchidas por código de conta ({STATEMENT_LINES_TABLE})")
+
+        with_statements = _load_statements(sb, raws)
+        print(f"[INFO] Demonstrativos lidos para {with_statements}/{len(raws)} payload(s) (fallback heurístico)")
+
         out: List[Dict[str, Any]] = []
         for r in raws:
             payload = r.get("payload") if isinstance(r, dict) else None
@@ -189,33 +292,29 @@ def main(*, year: int, max_rows: int = 5000) -> None:
                 divida_bruta = _extract_from_statement_rows(
                     bpp,
                     as_of_date=as_of_date,
-                    keywords=["emprest", "financi", "debent", "debênt", "arrend", "leasing", "capta"],
+                    keywords=DIVIDA_BRUTA_KEYWORDS,
+                    codes=list(STANDARD_ACCOUNT_CODES["divida_bruta"][1]),
                 )
 
             if caixa_equivalentes is None:
                 caixa_equivalentes = _extract_from_statement_rows(
                     bpa,
                     as_of_date=as_of_date,
-                    keywords=["caixa", "equival"],
+                    keywords=CAIXA_KEYWORDS,
+                    codes=list(STANDARD_ACCOUNT_CODES["caixa_equivalentes"][1]),
                 )
 
             if divida_liquida is None and divida_bruta is not None and caixa_equivalentes is not None:
                 divida_liquida = float(divida_bruta) - float(caixa_equivalentes)
 
             # Lucro líquido (heurística) pela DRE
-            # Nota: keywords com encoding ASCII para pegar mojibake de CSVs CVM
             lucro_liquido = _to_float(extracted_dict.get("lucro_liquido"))
             if lucro_liquido is None:
                 lucro_liquido = _extract_from_statement_rows(
                     dre,
                     as_of_date=as_of_date,
-                    keywords=[
-                        "consolidado do periodo",  # pega "Lucro/Prejuízo Consolidado do Período"
-                        "consolidado do exercicio",
-                        "lucro liquido",
-                        "resultado liquido",
-                        "lucro atribuivel",
-                    ],
+                    keywords=LUCRO_LIQUIDO_KEYWORDS,
+                    codes=list(STANDARD_ACCOUNT_CODES["lucro_liquido"][1]),
                 )
 
             # Derivados
@@ -259,38 +358,19 @@ def main(*, year: int, max_rows: int = 5000) -> None:
                 "roe_percent": roe_percent,
                 "payout_percent_keywords": payout_percent_keywords,
                 "divida_liquida_pl": divida_liquida_pl,
-                "dre_rows_count": len(dre) if isinstance(dre, list) else None,
-                "bpp_rows_count": len(bpp) if isinstance(bpp, list) else None,
                 "fundamentals_raw_id": r.get("id"),
             }
+            for col, name in (("dre_rows_count", "DRE"), ("bpp_rows_count", "BPP")):
+                count = _statement_count(payload, statements, name)
+                if count is not None:
+                    row[col] = count
             out.append(row)
 
         if not out:
             print(f"[AVISO] Nada para materializar em cvm_dfp_metrics_daily para {year}.")
             return
 
-        try:
-            sb.upsert("cvm_dfp_metrics_daily", out, on_conflict="ticker,as_of_date,source")
-        except Exception as e:
-            # Compatibilidade: se a migration 012 (colunas de alavancagem) não foi aplicada,
-            # tenta re-upsert sem as colunas novas.
-            msg = str(e)
-            if any(k in msg for k in ["divida_bruta", "caixa_equivalentes", "divida_liquida", "lucro_liquido", "roe_percent", "payout_percent_keywords", "divida_liquida_pl", "PGRST", "column"]):
-                stripped = _strip_keys(
-                    out,
-                    [
-                        "divida_bruta",
-                        "caixa_equivalentes",
-                        "divida_liquida",
-                        "lucro_liquido",
-                        "roe_percent",
-                        "payout_percent_keywords",
-                        "divida_liquida_pl",
-                    ],
-                )
-                sb.upsert("cvm_dfp_metrics_daily", stripped, on_conflict="ticker,as_of_date,source")
-            else:
-                raise
+        _upsert_metrics(sb, out)
 
         rows_written = len(out)
         print(f"✅ {rows_written} linha(s) materializadas em cvm_dfp_metrics_daily para {year}")
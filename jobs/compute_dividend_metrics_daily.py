@@ -4,7 +4,13 @@ from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 
-from jobs.common import SupabaseRestClient, get_supabase_admin_client, log_job_run, load_universo_mvp_tickers
+from jobs.common import (
+    SupabaseRestClient,
+    get_supabase_admin_client,
+    load_precos_diarios,
+    load_universo_mvp_tickers,
+    log_job_run,
+)
 
 
 @dataclass(frozen=True)
@@ -57,9 +63,15 @@ def _apply_universe_filter(tickers: list[str]) -> list[str]:
 
 
 def _load_prices_for_day(sb: SupabaseRestClient, day: str) -> dict[str, PricePoint]:
-    # Prefer tabela precos (brapi)
-    prices: dict[str, PricePoint] = {}
+    # Prefer preço canônico reconciliado (jobs/reconcile_precos.py)
+    prices: dict[str, PricePoint] = {
+        ticker: PricePoint(ticker=ticker, date=day, close=p["fechamento"], source=p["fonte"])
+        for ticker, p in load_precos_diarios(sb, day).items()
+    }
+    if prices:
+        return prices
 
+    # Fallback: tabela precos (brapi)
     try:
         rows = sb.select(
             "precos",
@@ -2,15 +2,28 @@
 
 Passo seguinte após `jobs/sync_fundamentals_brapi.py`.
 
+Linhas ponteiro (payload inalterado; ver `jobs/fundamentals_raw_dedupe.py`) não são
+re-extraídas: se o último `fundamentals_daily` do ticker já veio do mesmo payload, a
+linha é copiada para o dia; senão o payload referenciado é buscado uma vez.
+
+Payloads são lidos com projeção (`payload->chave`, ver `jobs/fundamentals_raw_reader.py`):
+só as chaves de `PAYLOAD_PROJECTIONS[source]` trafegam (payload completo para fontes
+sem projeção definida).
+
 Requer (Supabase): executar `sql/008_add_fundamentals_daily.sql`.
 """
 
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
-from jobs.common import get_supabase_admin_client, log_job_run
+from jobs.common import SupabaseRestClient, get_supabase_admin_client, log_job_run
+from jobs.fundamentals_raw_dedupe import resolve_pointer_payloads
+from jobs.fundamentals_raw_reader import PAYLOAD_PROJECTIONS, select_projected
+
+
+DAILY_FIELDS = ("currency", "price_current", "market_cap", "eps", "pe")
 
 
 def _to_float(value: Any) -> Optional[float]:
@@ -86,6 +99,57 @@ def _extract_daily_fields(payload: Dict[str, Any], source: str) -> Dict[str, Any
     }
 
 
+def _load_raw_rows(sb: SupabaseRestClient, day: str, source: str) -> List[Dict[str, Any]]:
+    """Linhas do dia com payload (ponteiros resolvidos só quando precisam ser extraídos)."""
+    base = f"&as_of_date=eq.{day}&source=eq.{source}&order=created_at.desc"
+    keys = PAYLOAD_PROJECTIONS.get(source)
+    try:
+        heads = sb.select_all("fundamentals_raw", "select=id,ticker,payload_hash,payload_ref_id" + base)
+    except Exception as e:
+        if "payload_hash" not in str(e) and "payload_ref_id" not in str(e):
+            raise
+        # Schema sem sql/017: sem ponteiros, todas as linhas têm payload.
+        return select_projected(sb, base, columns=("id", "ticker", "as_of_date", "source"), keys=keys)
+
+    pointers = [r for r in heads if r.get("payload_ref_id")]
+    full_ids = [int(r["id"]) for r in heads if not r.get("payload_ref_id") and r.get("id") is not None]
+
+    # Último daily anterior por ticker: se veio do mesmo payload, só copia.
+    previous: Dict[str, Dict[str, Any]] = {}
+    if pointers:
+        start = (date.fromisoformat(day) - timedelta(days=45)).isoformat()
+        prev_rows = sb.select_all(
+            "fundamentals_daily",
+            "select=ticker,date,fundamentals_raw_id," + ",".join(DAILY_FIELDS)
+            + f"&source=eq.{source}&date=gte.{start}&date=lt.{day}&order=date.desc",
+        )
+        for r in prev_rows:
+            ticker = str(r.get("ticker") or "").strip().upper()
+            if ticker and ticker not in previous:
+                previous[ticker] = r
+
+    out: List[Dict[str, Any]] = []
+    to_resolve: List[Dict[str, Any]] = []
+    for r in pointers:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        ref = int(r["payload_ref_id"])
+        prev = previous.get(ticker)
+        if prev is not None and prev.get("fundamentals_raw_id") == ref:
+            out.append({**r, "carry": prev})
+        else:
+            to_resolve.append(r)
+
+    payloads = resolve_pointer_payloads(sb, full_ids + [int(r["payload_ref_id"]) for r in to_resolve], keys=keys)
+    for r in heads:
+        if r.get("payload_ref_id"):
+            continue
+        out.append({**r, "payload": payloads.get(int(r["id"]))})
+    for r in to_resolve:
+        ref = int(r["payload_ref_id"])
+        out.append({**r, "payload": payloads.get(ref), "raw_id": ref})
+    return out
+
+
 def main(*, as_of: Optional[str] = None, source: str = "brapi") -> None:
     sb = get_supabase_admin_client()
     started_at = datetime.now(timezone.utc)
@@ -97,21 +161,34 @@ def main(*, as_of: Optional[str] = None, source: str = "brapi") -> None:
     rows_written = 0
 
     try:
-        raws = sb.select(
-            "fundamentals_raw",
-            f"select=id,ticker,as_of_date,source,payload&as_of_date=eq.{day}&source=eq.{source}&order=created_at.desc",
-        )
+        raws = _load_raw_rows(sb, day, source)
 
         out: List[Dict[str, Any]] = []
+        unchanged = 0
         for r in raws:
-            payload = r.get("payload") if isinstance(r, dict) else None
-            if not isinstance(payload, dict):
-                continue
-
             ticker = str(r.get("ticker") or "").strip().upper()
             if not ticker:
                 continue
 
+            carry = r.get("carry")
+            if isinstance(carry, dict):
+                # Payload inalterado e já materializado: copia sem re-extrair.
+                unchanged += 1
+                out.append(
+                    {
+                        "ticker": ticker,
+                        "date": day,
+                        "source": source,
+                        **{k: carry.get(k) for k in DAILY_FIELDS},
+                        "fundamentals_raw_id": carry.get("fundamentals_raw_id"),
+                    }
+                )
+                continue
+
+            payload = r.get("payload") if isinstance(r, dict) else None
+            if not isinstance(payload, dict):
+                continue
+
             fields = _extract_daily_fields(payload, source)
 
             out.append(
@@ -124,7 +201,8 @@ def main(*, as_of: Optional[str] = None, source: str = "brapi") -> None:
                     "market_cap": fields.get("market_cap"),
                     "eps": fields.get("eps"),
                     "pe": fields.get("pe"),
-                    "fundamentals_raw_id": r.get("id"),
+                    # Ponteiro: referencia a linha que contém o payload completo.
+                    "fundamentals_raw_id": r.get("raw_id") or r.get("id"),
                 }
             )
 
@@ -134,7 +212,10 @@ def main(*, as_of: Optional[str] = None, source: str = "brapi") -> None:
 
         sb.upsert("fundamentals_daily", out, on_conflict="ticker,date,source")
         rows_written = len(out)
-        print(f"✅ {rows_written} linha(s) materializadas em fundamentals_daily para {day}")
+        print(
+            f"✅ {rows_written} linha(s) materializadas em fundamentals_daily para {day} "
+            f"({unchanged} copiada(s) de payload inalterado)"
+        )
 
     except Exception as e:
         status = "error"
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 from datetime import datetime, timedelta, timezone
 
-from jobs.common import get_supabase_admin_client, list_active_tickers, log_job_run
+from jobs.common import get_supabase_admin_client, list_active_tickers, load_precos_diarios, log_job_run
 
 
 DESIRED_YIELD = 0.06  # 6% a.a.
@@ -16,17 +16,22 @@ def main() -> None:
     today = date.today().isoformat()
 
     tickers = list_active_tickers(sb)
-    # Schema atual (Supabase): prefer `precos.fechamento` (Brapi) e cai para `prices_daily.close` (legado)
-    prices: list[dict[str, object]] = []
-    try:
-        prices = sb.select("precos", f"select=data,ticker,fechamento&data=eq.{today}")
-        # Normalizar para o shape usado abaixo
-        prices = [
-            {"date": r.get("data"), "ticker": r.get("ticker"), "close": r.get("fechamento")}
-            for r in prices
-        ]
-    except Exception:
-        prices = []
+    # Preço canônico (jobs/reconcile_precos.py). Sem reconciliação para o dia, cai para
+    # `precos.fechamento` (Brapi) e depois `prices_daily.close` (legado).
+    prices: list[dict[str, object]] = [
+        {"date": today, "ticker": t, "close": p["fechamento"]}
+        for t, p in load_precos_diarios(sb, today).items()
+    ]
+    if not prices:
+        try:
+            prices = sb.select("precos", f"select=data,ticker,fechamento&data=eq.{today}")
+            # Normalizar para o shape usado abaixo
+            prices = [
+                {"date": r.get("data"), "ticker": r.get("ticker"), "close": r.get("fechamento")}
+                for r in prices
+            ]
+        except Exception:
+            prices = []
 
     if not prices:
         prices = sb.select("prices_daily", f"select=date,ticker,close&date=eq.{today}")
@@ -0,0 +1,173 @@
+"""Watermarks do sync incremental de proventos (última ex_date por ticker/fonte).
+
+Os jobs de dividendos pediam sempre o histórico completo (HG: `days_ago=1825`; Brapi:
+`dividends=true` devolve tudo) e re-gravavam milhares de eventos iguais todo dia.
+Com o watermark, o run diário só considera eventos com ex_date >= watermark - overlap;
+1x por semana (ou com `--deep`) roda a re-varredura completa para pegar correções.
+
+Estado em `dividends_sync_state` (sql/016_add_dividends_sync_state.sql). Sem a tabela,
+o watermark é derivado de max(ex_date) em `dividends` (e nada é persistido).
+
+Env:
+  DIVIDENDS_OVERLAP_DAYS (opcional; default=30)
+  DIVIDENDS_DEEP_SCAN_WEEKDAY (opcional; 0=segunda ... 6=domingo; default=6)
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from jobs.common import SupabaseRestClient
+
+
+STATE_TABLE = "dividends_sync_state"
+
+DEFAULT_OVERLAP_DAYS = 30
+DEFAULT_DEEP_SCAN_WEEKDAY = 6
+
+# Janelas (dias) usadas no run incremental do HG: tickers com a mesma janela vão
+# na mesma requisição multi-ticker.
+DAYS_AGO_BUCKETS = (7, 30, 90, 365)
+
+
+def overlap_days_from_env() -> int:
+    try:
+        return max(0, int(os.getenv("DIVIDENDS_OVERLAP_DAYS") or DEFAULT_OVERLAP_DAYS))
+    except ValueError:
+        return DEFAULT_OVERLAP_DAYS
+
+
+def is_deep_scan_day(today: Optional[date] = None) -> bool:
+    today = today or date.today()
+    try:
+        weekday = int(os.getenv("DIVIDENDS_DEEP_SCAN_WEEKDAY") or DEFAULT_DEEP_SCAN_WEEKDAY)
+    except ValueError:
+        weekday = DEFAULT_DEEP_SCAN_WEEKDAY
+    return today.weekday() == weekday
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _max_ex_dates_from_dividends(sb: SupabaseRestClient, tickers: List[str]) -> Dict[str, date]:
+    out: Dict[str, date] = {}
+    for chunk in _chunks(tickers, 100):
+        rows = sb.select_all(
+            "dividends",
+            f"select=ticker,ex_date&ticker=in.({','.join(chunk)})&order=ticker.asc,ex_date.desc",
+        )
+        for r in rows:
+            ticker = str(r.get("ticker") or "").strip().upper()
+            d = _parse_date(r.get("ex_date"))
+            if ticker and d and (ticker not in out or d > out[ticker]):
+                out[ticker] = d
+    return out
+
+
+def load_watermarks(sb: SupabaseRestClient, tickers: List[str], *, source: str) -> Dict[str, date]:
+    """Última ex_date conhecida por ticker para `source` (tickers sem histórico ficam de fora)."""
+    tickers = [t for t in dict.fromkeys(str(t).strip().upper() for t in tickers) if t]
+    if not tickers:
+        return {}
+
+    out: Dict[str, date] = {}
+    try:
+        for chunk in _chunks(tickers, 100):
+            rows = sb.select_all(
+                STATE_TABLE,
+                f"select=ticker,last_ex_date&source=eq.{source}&ticker=in.({','.join(chunk)})",
+            )
+            for r in rows:
+                ticker = str(r.get("ticker") or "").strip().upper()
+                d = _parse_date(r.get("last_ex_date"))
+                if ticker and d:
+                    out[ticker] = d
+    except Exception as e:
+        if "PGRST205" not in str(e) and STATE_TABLE not in str(e):
+            raise
+        print(f"[AVISO] {STATE_TABLE} indisponível; usando max(ex_date) de dividends.")
+        print("[DICA] Rode a migração no Supabase: sql/016_add_dividends_sync_state.sql")
+
+    missing = [t for t in tickers if t not in out]
+    if missing:
+        # Primeira execução (ou tabela ausente): semeia com o que já está em `dividends`.
+        out.update(_max_ex_dates_from_dividends(sb, missing))
+    return out
+
+
+def save_watermarks(
+    sb: SupabaseRestClient,
+    watermarks: Dict[str, date],
+    *,
+    source: str,
+    deep_scan: bool = False,
+) -> int:
+    """Persiste os watermarks; retorna quantas linhas foram gravadas (0 se a tabela não existir)."""
+    if not watermarks:
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    rows: List[Dict[str, Any]] = []
+    for ticker, d in sorted(watermarks.items()):
+        row: Dict[str, Any] = {
+            "ticker": ticker,
+            "source": source,
+            "last_ex_date": d.isoformat(),
+            "updated_at": now,
+        }
+        if deep_scan:
+            row["last_deep_scan_at"] = now
+        rows.append(row)
+    try:
+        for i in range(0, len(rows), 500):
+            sb.upsert(STATE_TABLE, rows[i : i + 500], on_conflict="ticker,source")
+    except Exception as e:
+        print(f"[AVISO] Não foi possível salvar watermarks em {STATE_TABLE}: {e}")
+        return 0
+    return len(rows)
+
+
+def window_start(watermark: Optional[date], *, overlap_days: int, today: Optional[date] = None) -> Optional[date]:
+    """Menor ex_date a considerar no run incremental (None = histórico completo)."""
+    if watermark is None:
+        return None
+    today = today or date.today()
+    return min(watermark, today) - timedelta(days=int(overlap_days))
+
+
+def days_ago_bucket(start: Optional[date], *, full_days: int, today: Optional[date] = None) -> int:
+    """Arredonda a janela necessária para um dos `DAYS_AGO_BUCKETS` (ou `full_days`)."""
+    if start is None:
+        return int(full_days)
+    today = today or date.today()
+    needed = max(1, (today - start).days)
+    for bucket in DAYS_AGO_BUCKETS:
+        if needed <= bucket:
+            return min(bucket, int(full_days))
+    return int(full_days)
+
+
+def advance_watermarks(
+    current: Dict[str, date],
+    rows: Iterable[Dict[str, Any]],
+) -> Dict[str, date]:
+    """Novos watermarks: max(atual, maior ex_date vista nas linhas) por ticker."""
+    out = dict(current)
+    for r in rows:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        d = _parse_date(r.get("ex_date"))
+        if ticker and d and (ticker not in out or d > out[ticker]):
+            out[ticker] = d
+    return out
@@ -8,7 +8,7 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Any, Dict, List
 
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
@@ -21,10 +21,33 @@ def normalize_cnpj(cnpj: str) -> str:
     return ''.join(c for c in str(cnpj or "") if c.isdigit())
 
 
+# CNPJs por requisição no filtro `in.(...)` (14 dígitos cada; mantém a URL bem abaixo de ~8 KB)
+CNPJ_CHUNK_SIZE = 150
+
+
+def _fetch_companies_by_cnpj(sb: SupabaseRestClient, cnpjs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """cnpj (só dígitos) -> linha de companies_cvm, em poucas requisições `cnpj=in.(...)`."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(cnpjs), CNPJ_CHUNK_SIZE):
+        chunk = cnpjs[i : i + CNPJ_CHUNK_SIZE]
+        rows = sb.select_all(
+            "companies_cvm",
+            f"select=cnpj,denominacao_social&cnpj=in.({','.join(chunk)})",
+        )
+        for r in rows:
+            cnpj = normalize_cnpj(r.get("cnpj"))
+            if cnpj and cnpj not in out:
+                out[cnpj] = r
+    return out
+
+
 def enrich_ticker_with_cvm(sb: SupabaseRestClient) -> Dict[str, Any]:
     """
     Enriquece ticker_mapping com dados da CVM
     
+    1 leitura de ticker_mapping + 1 leitura (em lotes) de companies_cvm, join em memória e
+    1 upsert em lote só das linhas cujo `nome` mudou.
+    
     Args:
         sb: Cliente Supabase
     
@@ -34,67 +57,69 @@ def enrich_ticker_with_cvm(sb: SupabaseRestClient) -> Dict[str, Any]:
     print("\n[*] Buscando tickers ativos no ticker_mapping...")
     
     # Buscar tickers com CNPJ
-    tickers = sb.select(
+    tickers = sb.select_all(
         "ticker_mapping",
         "select=ticker,cnpj,nome,ativo,verificado,tipo_acao,empresa_id&ativo=eq.true&cnpj=not.is.null"
     )
     
     print(f"[OK] {len(tickers)} tickers com CNPJ para enriquecer")
     
-    # Para cada ticker, buscar dados na CVM
-    enriched_count = 0
+    cnpjs = sorted({normalize_cnpj(t.get('cnpj')) for t in tickers} - {""})
+    companies = _fetch_companies_by_cnpj(sb, cnpjs)
+    print(f"[OK] {len(companies)}/{len(cnpjs)} CNPJ(s) encontrados em companies_cvm")
+    
     not_found_count = 0
+    unchanged_count = 0
+    now = datetime.now().isoformat()
+    rows_to_upsert: List[Dict[str, Any]] = []
     
     for ticker_data in tickers:
         ticker = ticker_data['ticker']
-        cnpj = normalize_cnpj(ticker_data['cnpj'])
+        cvm = companies.get(normalize_cnpj(ticker_data['cnpj']))
         
-        print(f"\n[*] {ticker} ({cnpj})...")
-        
-        # Buscar na tabela companies_cvm
-        cvm_data = sb.select(
-            "companies_cvm",
-            f"select=cnpj,denominacao_social&cnpj=eq.{cnpj}"
-        )
-        
-        if not cvm_data:
-            print(f"  [AVISO] Nao encontrado na CVM")
+        if not cvm:
+            print(f"  [AVISO] {ticker}: nao encontrado na CVM")
             not_found_count += 1
             continue
         
-        # Pegar primeiro resultado
-        cvm = cvm_data[0]
+        nome = cvm.get('denominacao_social') or ticker_data.get('nome')
+        if nome == ticker_data.get('nome'):
+            unchanged_count += 1
+            continue
         
         # Atualizar ticker_mapping com dados da CVM
-        update_row = {
+        rows_to_upsert.append({
             'ticker': ticker,
             'cnpj': ticker_data.get('cnpj'),
-            'nome': cvm.get('denominacao_social') or ticker_data.get('nome'),
+            'nome': nome,
             'ativo': ticker_data.get('ativo', True),
             'verificado': ticker_data.get('verificado', False),
             'tipo_acao': ticker_data.get('tipo_acao'),
             'empresa_id': ticker_data.get('empresa_id'),
-            'updated_at': datetime.now().isoformat(),
-        }
-
-        # UPSERT por ticker (preserva as colunas selecionadas acima)
+            'updated_at': now,
+        })
+        print(f"  [OK] {ticker}: {ticker_data.get('nome')} -> {nome}")
+    
+    # UPSERT em lote por ticker (preserva as colunas selecionadas acima)
+    enriched_count = 0
+    for i in range(0, len(rows_to_upsert), 500):
+        chunk = rows_to_upsert[i : i + 500]
         try:
-            sb.upsert("ticker_mapping", [update_row], on_conflict="ticker")
-            
-            enriched_count += 1
-            print(f"  [OK] Enriquecido: {cvm.get('denominacao_social')}")
-        
+            sb.upsert("ticker_mapping", chunk, on_conflict="ticker")
+            enriched_count += len(chunk)
         except Exception as e:
-            print(f"  [ERRO] Falha ao atualizar: {e}")
+            print(f"  [ERRO] Falha ao atualizar lote ({len(chunk)} tickers): {e}")
     
     print(f"\n" + "=" * 70)
     print(f"[OK] Enriquecidos: {enriched_count}")
+    print(f"[INFO] Ja atualizados: {unchanged_count}")
     print(f"[AVISO] Nao encontrados: {not_found_count}")
     print("=" * 70)
     
     return {
         'total': len(tickers),
         'enriched': enriched_count,
+        'unchanged': unchanged_count,
         'not_found': not_found_count
     }
 
@@ -124,6 +149,7 @@ def main():
         print("=" * 70)
         print(f"[INFO] Total tickers: {result['total']}")
         print(f"[OK] Enriquecidos: {result['enriched']}")
+        print(f"[INFO] Ja atualizados: {result['unchanged']}")
         print(f"[AVISO] Nao encontrados: {result['not_found']}")
         print("=" * 70)
         
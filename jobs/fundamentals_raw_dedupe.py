@@ -0,0 +1,209 @@
+"""Deduplicação por conteúdo dos payloads gravados em `fundamentals_raw`.
+
+Os jobs de sync gravam 1 linha por (ticker, as_of_date, source) todo dia, mesmo quando o
+provedor devolve exatamente o mesmo payload de ontem. Aqui cada payload ganha um hash
+(sha256 do JSON canônico: chaves ordenadas, sem campos voláteis como `fetched_at`) e é
+comparado com o último hash gravado do ticker/fonte:
+
+- mode="pointer" (default): grava uma linha ponteiro (payload `{"same_as_id": <id>}`,
+  `payload_ref_id=<id>`), mantendo 1 linha por dia sem duplicar o JSON;
+- mode="skip": não grava nada para o ticker no dia.
+
+Requer (Supabase): `sql/017_add_fundamentals_raw_payload_hash.sql`. Sem as colunas, o
+deduper se desativa e as linhas são gravadas como antes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import date, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from jobs.common import SupabaseRestClient
+from jobs.fundamentals_raw_reader import fetch_payloads_by_id
+
+
+# Campos que mudam a cada chamada sem representar mudança de conteúdo (em qualquer nível).
+VOLATILE_KEYS: FrozenSet[str] = frozenset(
+    {
+        "fetched_at",
+        "requested_at",
+        "requestedAt",
+        "took",
+        "execution_time",
+        "executionTime",
+    }
+)
+
+POINTER_KEY = "same_as_id"
+
+
+def _strip_volatile(value: Any, exclude: FrozenSet[str]) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v, exclude) for k, v in value.items() if k not in exclude}
+    if isinstance(value, list):
+        return [_strip_volatile(v, exclude) for v in value]
+    return value
+
+
+def canonical_json(payload: Any, *, exclude: Iterable[str] = VOLATILE_KEYS) -> str:
+    """JSON determinístico (chaves ordenadas, sem espaços) sem os campos em `exclude`."""
+    return json.dumps(
+        _strip_volatile(payload, frozenset(exclude)),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def payload_hash(payload: Any, *, exclude: Iterable[str] = VOLATILE_KEYS) -> str:
+    return hashlib.sha256(canonical_json(payload, exclude=exclude).encode("utf-8")).hexdigest()
+
+
+def is_pointer_row(row: Dict[str, Any]) -> bool:
+    return bool(row.get("payload_ref_id"))
+
+
+def _is_missing_column_error(message: str) -> bool:
+    return "payload_hash" in message or "payload_ref_id" in message or "PGRST204" in message or "42703" in message
+
+
+class RawPayloadDeduper:
+    """Prepara linhas de `fundamentals_raw` (hash + ponteiro/skip) antes do upsert.
+
+    Uso:
+        deduper = RawPayloadDeduper(sb, source="brapi", as_of="2026-10-18")
+        deduper.load(tickers)
+        rows = deduper.prepare(rows)   # linhas a gravar
+        sb.upsert("fundamentals_raw", rows, on_conflict="ticker,as_of_date,source")
+    """
+
+    def __init__(
+        self,
+        sb: SupabaseRestClient,
+        *,
+        source: str,
+        as_of: str,
+        mode: str = "pointer",
+        lookback_days: int = 30,
+        exclude: Iterable[str] = VOLATILE_KEYS,
+    ) -> None:
+        if mode not in ("pointer", "skip"):
+            raise ValueError(f"mode inválido: {mode} (use pointer|skip)")
+        self.sb = sb
+        self.source = source
+        self.as_of = as_of
+        self.mode = mode
+        self.lookback_days = int(lookback_days)
+        self.exclude = frozenset(exclude)
+
+        self.enabled = True
+        # ticker -> (hash, id da linha com o payload completo)
+        self.latest: Dict[str, Tuple[str, int]] = {}
+        self.unchanged = 0
+        self.changed = 0
+
+    def load(self, tickers: Iterable[str]) -> None:
+        """Carrega o último hash (antes de `as_of`) por ticker, numa janela de `lookback_days`."""
+        tickers = [t for t in dict.fromkeys(str(t).strip().upper() for t in tickers) if t]
+        if not tickers:
+            return
+        start = (date.fromisoformat(self.as_of) - timedelta(days=self.lookback_days)).isoformat()
+        try:
+            for i in range(0, len(tickers), 100):
+                chunk = tickers[i : i + 100]
+                rows = self.sb.select_all(
+                    "fundamentals_raw",
+                    "select=id,ticker,as_of_date,payload_hash,payload_ref_id"
+                    f"&source=eq.{self.source}&ticker=in.({','.join(chunk)})"
+                    f"&as_of_date=gte.{start}&as_of_date=lt.{self.as_of}"
+                    "&order=ticker.asc,as_of_date.desc",
+                )
+                for r in rows:
+                    ticker = str(r.get("ticker") or "").strip().upper()
+                    h = r.get("payload_hash")
+                    if not ticker or ticker in self.latest or not h:
+                        continue
+                    ref = r.get("payload_ref_id") or r.get("id")
+                    if ref:
+                        self.latest[ticker] = (str(h), int(ref))
+        except Exception as e:
+            if not _is_missing_column_error(str(e)):
+                raise
+            self.enabled = False
+            print("[AVISO] fundamentals_raw sem payload_hash; deduplicação desativada.")
+            print("[DICA] Rode a migração no Supabase: sql/017_add_fundamentals_raw_payload_hash.sql")
+
+    def prepare(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Adiciona `payload_hash` e troca payloads inalterados por ponteiro (ou os remove)."""
+        rows = list(rows)
+        if not self.enabled:
+            return rows
+
+        out: List[Dict[str, Any]] = []
+        for row in rows:
+            ticker = str(row.get("ticker") or "").strip().upper()
+            h = payload_hash(row.get("payload"), exclude=self.exclude)
+            prev = self.latest.get(ticker)
+            if prev is not None and prev[0] == h:
+                self.unchanged += 1
+                if self.mode == "skip":
+                    continue
+                out.append(
+                    {
+                        **{k: v for k, v in row.items() if k != "payload"},
+                        "payload": {POINTER_KEY: prev[1]},
+                        "payload_hash": h,
+                        "payload_ref_id": prev[1],
+                    }
+                )
+                continue
+            self.changed += 1
+            out.append({**row, "payload_hash": h, "payload_ref_id": None})
+        return out
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "dedupe desativado"
+        action = "ponteiro" if self.mode == "pointer" else "não gravados"
+        return f"{self.changed} alterado(s), {self.unchanged} inalterado(s) ({action})"
+
+
+def resolve_pointer_payloads(
+    sb: SupabaseRestClient,
+    ref_ids: Iterable[int],
+    *,
+    keys: Optional[Iterable[Any]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """Busca os payloads das linhas referenciadas por ponteiros (id -> payload; parcial com `keys`)."""
+    return fetch_payloads_by_id(sb, ref_ids, keys=keys)
+
+
+def add_dedupe_args(parser: Any) -> None:
+    """Flags comuns dos jobs de sync (argparse)."""
+    parser.add_argument(
+        "--dedupe",
+        type=str,
+        default="pointer",
+        choices=["pointer", "skip", "off"],
+        help="Payload igual ao último gravado: pointer (linha ponteiro), skip (não grava) ou off",
+    )
+
+
+def build_deduper(
+    sb: SupabaseRestClient,
+    *,
+    source: str,
+    as_of: str,
+    tickers: Iterable[str],
+    mode: Optional[str],
+    exclude: Iterable[str] = VOLATILE_KEYS,
+) -> Optional[RawPayloadDeduper]:
+    """Cria e carrega o deduper (None quando mode='off')."""
+    if not mode or mode == "off":
+        return None
+    deduper = RawPayloadDeduper(sb, source=source, as_of=as_of, mode=mode, exclude=exclude)
+    deduper.load(tickers)
+    return deduper
@@ -0,0 +1,102 @@
+"""Leitura de `fundamentals_raw` com projeção de caminhos JSON (PostgREST `payload->chave`).
+
+Os jobs de compute só usam algumas chaves de cada payload (ex.: Brapi `regularMarketPrice`,
+`marketCap`...), mas liam o JSON inteiro — no caso da CVM, centenas de linhas de
+demonstrativos por ticker. Aqui o `select` pede só os caminhos necessários
+(`regularMarketPrice:payload->regularMarketPrice`) e o resultado é remontado como um
+payload parcial, com as mesmas chaves do original, para que os extratores existentes
+funcionem sem mudança.
+
+`->` (e não `->>`) mantém o tipo JSON (números continuam números; listas/objetos vêm inteiros).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from jobs.common import SupabaseRestClient
+
+
+# Caminhos usados por `compute_fundamentals_daily._extract_daily_fields` / `compute_cvm_dfp_metrics_daily`.
+# Cada item é uma chave de topo ou um caminho ("statements", "DRE").
+PAYLOAD_PROJECTIONS: Dict[str, Tuple[Any, ...]] = {
+    "brapi": ("currency", "regularMarketPrice", "marketCap", "earningsPerShare", "priceEarnings"),
+    "hgbrasil": ("currency", "price", "market_cap"),
+    "fintz": ("indicadores",),
+    "cvm": ("cnpj", "year", "extracted", "statement_counts"),
+}
+
+
+def _path_of(key: Any) -> Tuple[str, ...]:
+    return tuple(key) if isinstance(key, (tuple, list)) else (str(key),)
+
+
+def _alias(path: Tuple[str, ...]) -> str:
+    return "p_" + "__".join(path)
+
+
+def payload_select(keys: Iterable[Any]) -> str:
+    """Fragmento de `select` PostgREST: `p_a:payload->a,p_b__c:payload->b->c`."""
+    parts: List[str] = []
+    for key in keys:
+        path = _path_of(key)
+        parts.append(f"{_alias(path)}:payload->" + "->".join(path))
+    return ",".join(parts)
+
+
+def rebuild_payload(row: Dict[str, Any], keys: Iterable[Any]) -> Dict[str, Any]:
+    """Remonta o payload parcial a partir das colunas projetadas (chaves ausentes ficam de fora)."""
+    payload: Dict[str, Any] = {}
+    for key in keys:
+        path = _path_of(key)
+        value = row.pop(_alias(path), None)
+        if value is None:
+            continue
+        cur = payload
+        for k in path[:-1]:
+            cur = cur.setdefault(k, {})
+        cur[path[-1]] = value
+    return payload
+
+
+def select_projected(
+    sb: SupabaseRestClient,
+    filters: str,
+    *,
+    columns: Sequence[str] = ("id", "ticker", "as_of_date"),
+    keys: Optional[Iterable[Any]] = None,
+    paged: bool = True,
+) -> List[Dict[str, Any]]:
+    """Seleciona linhas de `fundamentals_raw` com `payload` parcial (ou completo se `keys=None`).
+
+    `filters` é o resto da query PostgREST (ex.: `&source=eq.brapi&as_of_date=eq.2026-10-18`).
+    """
+    keys = list(keys) if keys is not None else None
+    select = ",".join(columns)
+    select += "," + (payload_select(keys) if keys else "payload")
+    query = f"select={select}{filters}"
+    rows = sb.select_all("fundamentals_raw", query) if paged else sb.select("fundamentals_raw", query)
+    if keys:
+        for r in rows:
+            r["payload"] = rebuild_payload(r, keys)
+    return rows
+
+
+def fetch_payloads_by_id(
+    sb: SupabaseRestClient,
+    ids: Iterable[int],
+    *,
+    keys: Optional[Iterable[Any]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """id -> payload (parcial com `keys`; completo se `keys=None`)."""
+    keys = list(keys) if keys is not None else None
+    unique = sorted({int(i) for i in ids if i})
+    out: Dict[int, Dict[str, Any]] = {}
+    for i in range(0, len(unique), 100):
+        chunk = unique[i : i + 100]
+        rows = select_projected(sb, f"&id=in.({','.join(map(str, chunk))})", columns=("id",), keys=keys)
+        for r in rows:
+            payload = r.get("payload")
+            if isinstance(payload, dict) and r.get("id") is not None:
+                out[int(r["id"])] = payload
+    return out
@@ -4,6 +4,14 @@ Objetivo: preencher `ticker_mapping.cnpj` quando estiver nulo, usando heurístic
 de matching entre o nome retornado pela Brapi (longName/shortName) e a
 `denominacao_social` da tabela `companies_cvm`.
 
+Matching: os candidatos de todos os nomes saem de uma vez de um índice TF-IDF de
+trigramas sobre `companies_cvm` (`integrations/name_matcher.py`); só o top-k de cada
+nome é re-pontuado (overlap de tokens + similaridade de edição; `rapidfuzz` opcional).
+
+Nomes: longName/shortName da Brapi para todos os tickers, buscados antes do matching em
+lotes multi-ticker (`/quote/A,B,C`), com cache por ticker no cache HTTP em disco (7 dias);
+`ticker_mapping.nome` é o fallback. O matcher roda uma vez sobre a lista completa.
+
 Importante:
 - Não marca `verificado=true` (apenas sugere o CNPJ).
 - Não sobrescreve mapeamentos já existentes.
@@ -16,11 +24,9 @@ from __future__ import annotations
 import os
 import re
 import sys
-import unicodedata
-from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from difflib import SequenceMatcher
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Iterable
 
@@ -28,7 +34,18 @@ ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 from integrations.brapi_integration import BrapiIntegration
+from integrations.http_utils import ResponseCache, get_response_cache
+from integrations.name_matcher import TrigramIndex, best_of, similarity
+from integrations.text_normalize import fold
 from jobs.common import SupabaseRestClient, get_supabase_admin_client, log_job_run
+from jobs.telemetry import phase
+
+
+# /quote aceita vários tickers separados por vírgula (mesmo lote de `sync_fundamentals_brapi`).
+QUOTE_BATCH_SIZE = 10
+
+# Razão social quase nunca muda: nome por ticker fica 7 dias no cache HTTP em disco.
+NAME_CACHE_TTL = 7 * 24 * 3600
 
 
 STOPWORDS = {
@@ -58,19 +75,16 @@ STOPWORDS = {
 }
 
 
-def _strip_accents(text: str) -> str:
-    normalized = unicodedata.normalize("NFKD", text or "")
-    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
-
-
 _NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
 
 
+@lru_cache(maxsize=100_000)
 def normalize_text(text: str) -> str:
-    text = _strip_accents(text).lower().strip()
+    text = fold(text)
     text = text.replace("&", " e ")
     text = _NON_ALNUM_RE.sub(" ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _SPACES_RE.sub(" ", text).strip()
     return text
 
 
@@ -112,10 +126,9 @@ def _paged_select(sb: SupabaseRestClient, table: str, select: str, extra_filters
     return rows
 
 
-def load_companies(sb: SupabaseRestClient) -> tuple[list[Company], dict[str, list[int]]]:
+def load_companies(sb: SupabaseRestClient) -> tuple[list[Company], TrigramIndex]:
     rows = _paged_select(sb, "companies_cvm", "cnpj,denominacao_social")
     companies: list[Company] = []
-    token_index: dict[str, list[int]] = {}
 
     for r in rows:
         cnpj = normalize_cnpj(r.get("cnpj") or "")
@@ -124,30 +137,11 @@ def load_companies(sb: SupabaseRestClient) -> tuple[list[Company], dict[str, lis
             continue
         name_norm = normalize_text(name)
         tokens = frozenset(tokenize(name))
-        company = Company(cnpj=cnpj, name=name, name_norm=name_norm, tokens=tokens)
-        idx = len(companies)
-        companies.append(company)
-        for tok in tokens:
-            token_index.setdefault(tok, []).append(idx)
-
-    return companies, token_index
-
+        companies.append(Company(cnpj=cnpj, name=name, name_norm=name_norm, tokens=tokens))
 
-def _candidate_indices(query_tokens: list[str], token_index: dict[str, list[int]]) -> list[int]:
-    if not query_tokens:
-        return []
-
-    counts: Counter[int] = Counter()
-    for tok in query_tokens:
-        for idx in token_index.get(tok, []):
-            counts[idx] += 1
-
-    if not counts:
-        return []
-
-    # pega os melhores candidatos por overlap de tokens (barato)
-    most_common = counts.most_common(400)
-    return [idx for idx, _ in most_common]
+    # Índice TF-IDF de trigramas (candidatos para todos os nomes em lote)
+    index = TrigramIndex([c.name_norm for c in companies])
+    return companies, index
 
 
 def _score(query_norm: str, query_tokens: set[str], company: Company) -> float:
@@ -158,38 +152,39 @@ def _score(query_norm: str, query_tokens: set[str], company: Company) -> float:
 
     inter = query_tokens.intersection(company.tokens)
     token_overlap = len(inter) / max(1, len(query_tokens))
-    seq = SequenceMatcher(None, query_norm, company.name_norm).ratio()
+    seq = similarity(query_norm, company.name_norm)
     return 0.6 * token_overlap + 0.4 * seq
 
 
+def match_names(
+    companies: list[Company],
+    index: TrigramIndex,
+    query_names: list[str],
+    *,
+    k: int = 10,
+) -> list[tuple[Company | None, float, float]]:
+    """(melhor empresa, score, segundo score) por nome, com candidatos do TF-IDF em lote.
+
+    Só os `k` candidatos de maior cosseno são re-pontuados pelo score original
+    (60% overlap de tokens + 40% similaridade de edição), mantendo os thresholds.
+    """
+    queries = [normalize_text(n) for n in query_names]
+    qsets = [set(tokenize(n)) for n in query_names]
+    results = best_of(
+        index,
+        queries,
+        k=k,
+        rescore=lambda qi, j: _score(queries[qi], qsets[qi], companies[j]),
+    )
+    return [(companies[j] if j is not None else None, best, second) for j, best, second in results]
+
+
 def best_match(
     companies: list[Company],
-    token_index: dict[str, list[int]],
+    index: TrigramIndex,
     query_name: str,
 ) -> tuple[Company | None, float, float]:
-    query_norm = normalize_text(query_name)
-    qtokens = tokenize(query_name)
-    qset = set(qtokens)
-    cand_idxs = _candidate_indices(qtokens, token_index)
-    if not cand_idxs:
-        return None, 0.0, 0.0
-
-    best: tuple[int, float] | None = None
-    second: float = 0.0
-
-    for idx in cand_idxs:
-        c = companies[idx]
-        sc = _score(query_norm, qset, c)
-        if best is None or sc > best[1]:
-            if best is not None:
-                second = max(second, best[1])
-            best = (idx, sc)
-        else:
-            second = max(second, sc)
-
-    if best is None:
-        return None, 0.0, 0.0
-    return companies[best[0]], best[1], second
+    return match_names(companies, index, [query_name])[0]
 
 
 def _pick_company_name(quote: dict[str, Any] | None, fallback: str | None) -> str:
@@ -201,9 +196,71 @@ def _pick_company_name(quote: dict[str, Any] | None, fallback: str | None) -> st
     return (fallback or "").strip()
 
 
+def _name_cache_key(ticker: str) -> str:
+    return ResponseCache.make_key("NAME", f"https://brapi.dev/api/quote/{ticker}")
+
+
+def _fetch_quote_names(brapi: BrapiIntegration, tickers: list[str]) -> dict[str, str]:
+    """ticker -> longName/shortName via /quote multi-ticker; lote com erro é dividido ao meio."""
+    if not tickers:
+        return {}
+    try:
+        data = brapi.get_quote(tickers)
+    except Exception:
+        if len(tickers) == 1:
+            return {}
+        mid = len(tickers) // 2
+        return {**_fetch_quote_names(brapi, tickers[:mid]), **_fetch_quote_names(brapi, tickers[mid:])}
+
+    out: dict[str, str] = {}
+    for quote in data.get("results") or []:
+        if not isinstance(quote, dict):
+            continue
+        symbol = str(quote.get("symbol") or "").strip().upper()
+        name = _pick_company_name(quote, None)
+        if symbol and name:
+            out[symbol] = name
+    return out
+
+
+def prefetch_quote_names(
+    brapi: BrapiIntegration,
+    tickers: list[str],
+    *,
+    batch_size: int = QUOTE_BATCH_SIZE,
+) -> dict[str, str]:
+    """Nomes da Brapi para todos os tickers: cache em disco primeiro, depois lotes de `batch_size`."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    cache = get_response_cache()
+    names: dict[str, str] = {}
+    missing: list[str] = []
+    for ticker in tickers:
+        cached = cache.get(_name_cache_key(ticker)) if cache else None
+        if isinstance(cached, str) and cached:
+            names[ticker] = cached
+        else:
+            missing.append(ticker)
+
+    requests_made = 0
+    for i in range(0, len(missing), batch_size):
+        fetched = _fetch_quote_names(brapi, missing[i : i + batch_size])
+        requests_made += 1
+        for ticker, name in fetched.items():
+            names[ticker] = name
+            if cache is not None:
+                cache.set(_name_cache_key(ticker), name, ttl=NAME_CACHE_TTL)
+
+    print(
+        f"[OK] Nomes Brapi: {len(names)}/{len(tickers)} "
+        f"({len(tickers) - len(missing)} do cache, {requests_made} lote(s) de até {batch_size})"
+    )
+    return names
+
+
 def run_job(sb: SupabaseRestClient) -> dict[str, int]:
     print("[INFO] Carregando companies_cvm...")
-    companies, token_index = load_companies(sb)
+    with phase("load_companies"):
+        companies, index = load_companies(sb)
     print(f"[OK] companies_cvm carregadas: {len(companies)}")
 
     print("[INFO] Buscando tickers sem CNPJ em ticker_mapping...")
@@ -236,42 +293,38 @@ def run_job(sb: SupabaseRestClient) -> dict[str, int]:
 
     rows_to_upsert: list[dict[str, Any]] = []
 
+    eligible: dict[str, str] = {}
     for t in tickers:
         ticker = str(t.get("ticker") or "").strip()
-        if not ticker:
-            continue
-
         # safety: não mexer em mapeamentos verificados
-        if bool(t.get("verificado")):
-            continue
-
-        can_query = api_key is not None or ticker in BrapiIntegration.FREE_TICKERS
-        quote: dict[str, Any] | None = None
-        if can_query:
-            try:
-                data = brapi.get_quote(ticker)
-                results = data.get("results") or []
-                if results and isinstance(results[0], dict):
-                    quote = results[0]
-            except Exception:
-                quote = None
-        else:
-            # Sem token (e não é um ticker gratuito): ainda dá para tentar pelo
-            # nome já armazenado em ticker_mapping (ex.: vindo do quote/list).
-            no_brapi_quote += 1
-
-        company_name = _pick_company_name(quote, t.get("nome"))
+        if ticker and not bool(t.get("verificado")):
+            eligible[ticker] = str(t.get("nome") or "").strip()
+
+    # 1) longName/shortName da Brapi para todos os elegíveis, em lotes multi-ticker (cache em disco)
+    queryable = [t for t in eligible if api_key is not None or t.upper() in BrapiIntegration.FREE_TICKERS]
+    # Sem token (e não é um ticker gratuito): ainda dá para tentar pelo nome já armazenado
+    # em ticker_mapping (ex.: vindo do quote/list).
+    no_brapi_quote = len(eligible) - len(queryable)
+    with phase("prefetch_quote_names"):
+        quote_names = prefetch_quote_names(brapi, queryable)
+
+    # 2) 1 nome por ticker: o da Brapi primeiro, o armazenado como fallback
+    names: list[tuple[str, str]] = []
+    for ticker, stored in eligible.items():
+        company_name = quote_names.get(ticker.upper()) or stored
         if not company_name:
             skipped_no_name += 1
             continue
+        names.append((ticker, company_name))
 
-        best, best_score, second_score = best_match(companies, token_index, company_name)
-        if not best:
-            skipped_low_score += 1
-            continue
+    # 3) matching em lote (TF-IDF + re-score do top-k), numa passada
+    with phase("match_names"):
+        print(f"[INFO] Matching de {len(names)} nome(s) contra {len(companies)} empresa(s)...")
+        matches = match_names(companies, index, [name for _, name in names]) if names else []
 
+    for (ticker, company_name), (best, best_score, second_score) in zip(names, matches):
         # thresholds simples: score alto + não muito ambíguo
-        if best_score < 0.78:
+        if not best or best_score < 0.78:
             skipped_low_score += 1
             continue
         if second_score and (best_score - second_score) < 0.04:
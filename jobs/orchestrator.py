@@ -0,0 +1,349 @@
+"""Job: Orquestrador do pipeline diário (DAG de jobs no mesmo processo).
+
+Antes, cada job rodava como um `python -m jobs.X` separado (GitHub Actions / .bat): cada
+processo reimportava pandas, relia settings e abria novas sessões TLS, e os syncs
+independentes (preços Brapi/HG, proventos, Fintz, CVM RI) rodavam um depois do outro.
+
+Aqui cada etapa declara suas dependências (`STAGES`); as etapas prontas rodam em
+paralelo (threads; os syncs são I/O) compartilhando:
+- 1 `SupabaseRestClient` (`jobs.common.set_shared_supabase_client`);
+- 1 pool HTTP para as integrações (`integrations.http_utils.enable_shared_pool`).
+
+O tempo total passa a ser o da cadeia mais longa, não a soma. Se uma etapa falha, só as
+dependentes dela são puladas; as demais seguem. Dependências "soft" (`soft_deps`, ex.: preços
+HG para o `reconcile_precos`, `ticker_mapping` para os syncs) só definem a ordem: a etapa
+espera a outra terminar, mas roda mesmo se ela falhar (fontes complementares e a atualização
+do universo não derrubam o resto do pipeline).
+
+Uso:
+  python -m jobs.orchestrator                    # pipeline completo
+  python -m jobs.orchestrator --dry-run          # só mostra o plano (ondas)
+  python -m jobs.orchestrator --only reconcile_precos,compute_signals
+  python -m jobs.orchestrator --from reconcile_precos   # retoma: etapa + dependentes
+  python -m jobs.orchestrator --concurrency 2
+  python -m jobs.orchestrator --profile=cpu             # perfil por etapa em data/profiles/
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from integrations.http_utils import enable_shared_pool
+from jobs import telemetry
+from jobs.common import SupabaseRestClient, load_settings, log_job_run, set_shared_supabase_client
+from jobs.profiling import PROFILE_MODES, profile_mode_from_env, profiled
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    module: str
+    deps: Tuple[str, ...] = ()
+    # Espera estas etapas terminarem, mas roda mesmo se falharem (fontes complementares)
+    soft_deps: Tuple[str, ...] = ()
+    # kwargs de `main()` (callable: avaliado na hora de rodar, ex.: ano corrente)
+    kwargs: Callable[[], Dict[str, Any]] = field(default=dict)
+
+
+# `ticker_mapping` (Brapi quote/list) só atualiza o universo: se falhar, os syncs seguem com
+# o `ticker_mapping` já gravado.
+STAGES: Tuple[Stage, ...] = (
+    Stage("ticker_mapping", "jobs.sync_ticker_mapping_brapi_list"),
+    Stage("map_cnpj", "jobs.map_cnpj_to_ticker", soft_deps=("ticker_mapping",)),
+    Stage("enrich_mapping", "jobs.enrich_ticker_mapping", deps=("map_cnpj",)),
+    Stage("precos_brapi", "jobs.sync_precos_brapi", soft_deps=("ticker_mapping",)),
+    Stage("precos_hgbrasil", "jobs.sync_precos_hgbrasil", soft_deps=("ticker_mapping",)),
+    Stage("dividendos_brapi", "jobs.sync_dividendos_brapi", soft_deps=("ticker_mapping",)),
+    Stage("dividendos_hgbrasil", "jobs.sync_dividends_hgbrasil_v2", soft_deps=("ticker_mapping",)),
+    Stage("fundamentals_brapi", "jobs.sync_fundamentals_brapi", soft_deps=("ticker_mapping",)),
+    Stage("fundamentals_fintz", "jobs.sync_fundamentals_fintz", soft_deps=("ticker_mapping",)),
+    Stage(
+        "cvm_ri",
+        "jobs.sync_cvm_ri",
+        deps=("map_cnpj",),
+        kwargs=lambda: {"years": [date.today().year - 1, date.today().year]},
+    ),
+    Stage("reconcile_precos", "jobs.reconcile_precos", deps=("precos_brapi",), soft_deps=("precos_hgbrasil",)),
+    Stage("compute_fundamentals", "jobs.compute_fundamentals_daily", deps=("fundamentals_brapi",)),
+    Stage(
+        "compute_dividend_metrics",
+        "jobs.compute_dividend_metrics_daily",
+        deps=("reconcile_precos",),
+        soft_deps=("dividendos_brapi", "dividendos_hgbrasil"),
+    ),
+    Stage("compute_signals", "jobs.compute_signals", deps=("compute_dividend_metrics", "compute_fundamentals")),
+)
+
+
+def _validate(stages: Sequence[Stage]) -> Dict[str, Stage]:
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        missing = [d for d in (*s.deps, *s.soft_deps) if d not in by_name]
+        if missing:
+            raise ValueError(f"Etapa {s.name}: dependências desconhecidas {missing}")
+    return by_name
+
+
+def descendants(stages: Sequence[Stage], roots: Iterable[str]) -> Set[str]:
+    """Etapas em `roots` e todas as que dependem delas (direta ou indiretamente)."""
+    out = set(roots)
+    changed = True
+    while changed:
+        changed = False
+        for s in stages:
+            if s.name not in out and any(d in out for d in (*s.deps, *s.soft_deps)):
+                out.add(s.name)
+                changed = True
+    return out
+
+
+def select_stages(
+    stages: Sequence[Stage],
+    *,
+    only: Optional[Iterable[str]] = None,
+    start_from: Optional[Iterable[str]] = None,
+) -> List[Stage]:
+    """Subconjunto a executar (`--only` / `--from`), na ordem declarada.
+
+    Dependências fora do subconjunto são consideradas já satisfeitas (retomada).
+    """
+    by_name = _validate(stages)
+    wanted: Optional[Set[str]] = None
+    for names in (only, start_from):
+        unknown = [n for n in (names or []) if n not in by_name]
+        if unknown:
+            raise ValueError(f"Etapas desconhecidas: {unknown} (disponíveis: {', '.join(by_name)})")
+    if only:
+        wanted = set(only)
+    if start_from:
+        chain = descendants(stages, start_from)
+        wanted = chain if wanted is None else wanted & chain
+    return [s for s in stages if wanted is None or s.name in wanted]
+
+
+def plan_waves(stages: Sequence[Stage]) -> List[List[str]]:
+    """Ondas topológicas: cada onda só depende das anteriores (o que pode rodar junto)."""
+    selected = {s.name for s in stages}
+    pending = {s.name: {d for d in (*s.deps, *s.soft_deps) if d in selected} for s in stages}
+    waves: List[List[str]] = []
+    done: Set[str] = set()
+    while pending:
+        ready = [n for n, deps in pending.items() if deps <= done]
+        if not ready:
+            raise ValueError(f"Ciclo de dependências entre: {', '.join(sorted(pending))}")
+        waves.append(ready)
+        done.update(ready)
+        for n in ready:
+            pending.pop(n)
+    return waves
+
+
+class _StageStdout:
+    """Prefixa cada linha impressa por uma etapa com `[nome]` (saídas paralelas legíveis)."""
+
+    def __init__(self, wrapped: Any) -> None:
+        self.wrapped = wrapped
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        # Bufferiza por thread e escreve só linhas completas (print() faz 2 writes).
+        prefix = f"[{self.local.stage}] " if getattr(self.local, "stage", None) else ""
+        buf = getattr(self.local, "buf", "") + text
+        *lines, rest = buf.split("\n")
+        self.local.buf = rest
+        if lines:
+            with self.lock:
+                self.wrapped.write("".join(f"{prefix}{ln}\n" for ln in lines))
+        return len(text)
+
+    def flush(self) -> None:
+        self.wrapped.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.wrapped, name)
+
+
+def _run_stage(stage: Stage, out: Optional[_StageStdout], profile: Optional[str] = None) -> float:
+    if out is not None:
+        out.local.stage = stage.name
+    # Telemetria própria da etapa (fases/HTTP vão para o job_run do job, não do orquestrador)
+    telemetry.begin()
+    t0 = time.perf_counter()
+    try:
+        module = importlib.import_module(stage.module)
+        with profiled(stage.name, profile):
+            module.main(**stage.kwargs())
+    finally:
+        if out is not None:
+            if getattr(out.local, "buf", ""):
+                out.write("\n")
+            out.local.stage = None
+    return time.perf_counter() - t0
+
+
+def run_pipeline(
+    stages: Sequence[Stage],
+    *,
+    concurrency: int = 4,
+    prefix_output: bool = True,
+    profile: Optional[str] = None,
+) -> Dict[str, str]:
+    """Executa as etapas respeitando dependências; retorna nome -> ok|erro|pulada."""
+    selected = {s.name for s in stages}
+    deps = {s.name: {d for d in s.deps if d in selected} for s in stages}
+    soft = {s.name: {d for d in s.soft_deps if d in selected} for s in stages}
+    by_name = {s.name: s for s in stages}
+    result: Dict[str, str] = {}
+    running: Dict[Future, str] = {}
+
+    if profile == "mem" and not tracemalloc.is_tracing():
+        # tracemalloc é global: liga 1x para todas as etapas (use --concurrency 1 para
+        # não misturar alocações de etapas simultâneas)
+        tracemalloc.start(25)
+
+    out: Optional[_StageStdout] = None
+    original_stdout = sys.stdout
+    if prefix_output:
+        out = _StageStdout(original_stdout)
+        sys.stdout = out
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(concurrency)), thread_name_prefix="stage") as pool:
+            while len(result) < len(stages):
+                # Dependentes (hard) de etapas com erro/puladas não rodam; soft só esperam
+                for name in [n for n in by_name if n not in result and n not in running.values()]:
+                    if any(result.get(d) in ("erro", "pulada") for d in deps[name]):
+                        result[name] = "pulada"
+                        print(f"[AVISO] {name}: pulada (dependência falhou)")
+
+                ready = [
+                    n
+                    for n in by_name
+                    if n not in result
+                    and n not in running.values()
+                    and all(result.get(d) == "ok" for d in deps[n])
+                    and all(d in result for d in soft[n])
+                ]
+                for name in ready:
+                    print(f"[*] Iniciando {name}")
+                    running[pool.submit(_run_stage, by_name[name], out, profile)] = name
+
+                if not running:
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        elapsed = future.result()
+                        telemetry.current().add_phase(name, elapsed)
+                        result[name] = "ok"
+                        print(f"[OK] {name} ({elapsed:.1f}s)")
+                    except BaseException as e:  # inclui SystemExit de jobs legados
+                        result[name] = "erro"
+                        print(f"[ERRO] {name}: {e}")
+    finally:
+        sys.stdout = original_stdout
+        if profile == "mem":
+            tracemalloc.stop()
+    return result
+
+
+def main(
+    *,
+    only: Optional[List[str]] = None,
+    start_from: Optional[List[str]] = None,
+    concurrency: int = 4,
+    dry_run: bool = False,
+    profile: Optional[str] = None,
+) -> None:
+    stages = select_stages(STAGES, only=only, start_from=start_from)
+    waves = plan_waves(stages)
+
+    print("=" * 70)
+    print(f"PIPELINE: {len(stages)} etapa(s) em {len(waves)} onda(s) (concorrência {concurrency})")
+    for i, wave in enumerate(waves, start=1):
+        print(f"  {i}. {', '.join(wave)}")
+    print("=" * 70)
+    if dry_run:
+        print("[INFO] --dry-run: nada executado.")
+        return
+
+    started_at = datetime.now(timezone.utc)
+    sb = SupabaseRestClient(load_settings(), pool_maxsize=max(10, 4 * int(concurrency)))
+    set_shared_supabase_client(sb)
+    enable_shared_pool(pool_maxsize=max(10, 4 * int(concurrency)))
+
+    status = "success"
+    message: Optional[str] = None
+    result: Dict[str, str] = {}
+    try:
+        result = run_pipeline(stages, concurrency=concurrency, profile=profile)
+        failed = [n for n, r in result.items() if r == "erro"]
+        skipped = [n for n, r in result.items() if r == "pulada"]
+        ok = [n for n, r in result.items() if r == "ok"]
+        if failed or skipped:
+            status = "error"
+            message = f"falharam: {', '.join(failed) or '-'}; puladas: {', '.join(skipped) or '-'}"
+        print(f"✅ {len(ok)}/{len(stages)} etapa(s) ok")
+        if message:
+            print(f"[ERRO] {message}")
+            print(f"[DICA] Retomar: python -m jobs.orchestrator --from {','.join(failed or skipped)}")
+    finally:
+        log_job_run(
+            sb,
+            job_name="orchestrator",
+            status=status,
+            rows_processed=sum(1 for r in result.values() if r == "ok"),
+            message=message,
+            started_at=started_at,
+            finished_at=datetime.now(timezone.utc),
+        )
+        set_shared_supabase_client(None)
+
+    if status != "success":
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline diário (DAG de jobs no mesmo processo)")
+    parser.add_argument("--only", type=str, default=None, help="Só estas etapas (separadas por vírgula)")
+    parser.add_argument(
+        "--from",
+        dest="start_from",
+        type=str,
+        default=None,
+        help="Retoma a partir destas etapas (elas + dependentes)",
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="Etapas simultâneas (default: 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o plano")
+    parser.add_argument("--list", action="store_true", help="Lista as etapas e dependências")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None, help="Perfil por etapa (default: $JOB_PROFILE)")
+    args = parser.parse_args()
+
+    if args.list:
+        for s in STAGES:
+            deps = [*s.deps, *(f"{d} (soft)" for d in s.soft_deps)]
+            print(f"{s.name:28s} {s.module:42s} <- {', '.join(deps) or '-'}")
+        raise SystemExit(0)
+
+    def _split(value: Optional[str]) -> Optional[List[str]]:
+        return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+    main(
+        only=_split(args.only),
+        start_from=_split(args.start_from),
+        concurrency=int(args.concurrency),
+        dry_run=bool(args.dry_run),
+        profile=args.profile or profile_mode_from_env(),
+    )
@@ -0,0 +1,176 @@
+"""Modo de profiling para qualquer job (`python -m jobs.X`), sem editar o job.
+
+Uso:
+  python -m jobs.profiling --profile=cpu jobs.sync_fundamentals_cvm_dfp --year 2024
+  python -m jobs.profiling --profile=mem jobs.compute_cvm_dfp_metrics_daily
+  JOB_PROFILE=cpu python -m jobs.profiling jobs.reconcile_precos
+  python -m jobs.orchestrator --profile=cpu            # 1 perfil por etapa
+
+O runner executa o módulo como `__main__` (mesmos argumentos/argparse do job) dentro de
+`profiled()`, que grava em `data/profiles/<job>/<timestamp>/`:
+
+- cpu: `cpu.prof` (cProfile; abrir com `snakeviz`/`pstats`), `cpu_top.txt` (top por tempo
+  acumulado) e `stacks.collapsed` (pilhas amostradas no formato "a;b;c N", entrada do
+  `flamegraph.pl` / speedscope);
+- mem: `tracemalloc_top.txt` (top-N alocações por linha + pico) e `tracemalloc.snapshot`.
+
+Para comparar duas execuções: `python scripts/diff_profiles.py <antes> <depois>`.
+
+Observação: cProfile/tracemalloc não enxergam processos filhos (ex.: workers do
+`sync_fundamentals_cvm_dfp`); use `CVM_PARSE_WORKERS=1` para perfilar o parse no processo.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+PROFILE_MODES = ("cpu", "mem")
+PROFILES_DIR = Path("data/profiles")
+TOP_N = 40
+
+
+def profile_mode_from_env() -> Optional[str]:
+    mode = (os.getenv("JOB_PROFILE") or "").strip().lower()
+    return mode if mode in PROFILE_MODES else None
+
+
+class StackSampler:
+    """Amostra a pilha de UMA thread a cada `interval` s (pilhas colapsadas para flamegraph)."""
+
+    def __init__(self, thread_id: int, *, interval: float = 0.005) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            parts: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if parts:
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _output_dir(job_name: str) -> Path:
+    out = PROFILES_DIR / job_name / datetime.now().strftime("%Y%m%d-%H%M%S")
+    out.mkdir(parents=True, exist_ok=True)
+    return out
+
+
+@contextmanager
+def profiled(job_name: str, mode: Optional[str]) -> Iterator[Optional[Path]]:
+    """Perfila o bloco (só a thread atual) e grava os arquivos; `mode=None` não faz nada."""
+    if not mode:
+        yield None
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"--profile inválido: {mode} (use {'|'.join(PROFILE_MODES)})")
+
+    out = _output_dir(job_name)
+    if mode == "cpu":
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident()).start()
+        profiler.enable()
+        try:
+            yield out
+        finally:
+            profiler.disable()
+            sampler.stop()
+            profiler.dump_stats(str(out / "cpu.prof"))
+            sampler.write(out / "stacks.collapsed")
+            buf = io.StringIO()
+            pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(TOP_N)
+            (out / "cpu_top.txt").write_text(buf.getvalue(), encoding="utf-8")
+            print(f"[INFO] Perfil de CPU salvo em {out}")
+        return
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    try:
+        yield out
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if not was_tracing:
+            tracemalloc.stop()
+        snapshot.dump(str(out / "tracemalloc.snapshot"))
+        snapshot = snapshot.filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        lines = [
+            f"job: {job_name}  duração: {time.perf_counter() - t0:.1f}s",
+            f"memória rastreada: atual {current / 1024 / 1024:.1f} MB, pico {peak / 1024 / 1024:.1f} MB",
+            "",
+            f"Top {TOP_N} alocações vivas por linha:",
+        ]
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            lines.append(f"  {stat.size / 1024:10.1f} KB {stat.count:8d} blocos  {stat.traceback}")
+        (out / "tracemalloc_top.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        print(f"[INFO] Perfil de memória salvo em {out}")
+
+
+def run_module(module: str, argv: List[str], *, mode: Optional[str]) -> None:
+    """Executa `python -m <module> <argv>` no processo atual, perfilado."""
+    job_name = module.rsplit(".", 1)[-1]
+    old_argv = sys.argv
+    sys.argv = [module, *argv]
+    try:
+        with profiled(job_name, mode):
+            runpy.run_module(module, run_name="__main__", alter_sys=True)
+    finally:
+        sys.argv = old_argv
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Executa um job com profiling (cpu: cProfile + pilhas; mem: tracemalloc)",
+        usage="python -m jobs.profiling [--profile cpu|mem] jobs.<job> [args do job...]",
+    )
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None, help="Default: $JOB_PROFILE")
+    parser.add_argument("module", help="Módulo do job (ex.: jobs.reconcile_precos)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Argumentos repassados ao job")
+    args = parser.parse_args()
+
+    mode = args.profile or profile_mode_from_env()
+    if not mode:
+        print("[AVISO] Sem --profile nem JOB_PROFILE: rodando sem profiling.")
+    run_module(args.module, list(args.args), mode=mode)
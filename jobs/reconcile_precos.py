@@ -0,0 +1,304 @@
+"""Job: Reconciliar preços multi-fonte em `precos_diarios` (1 fechamento por ticker/dia).
+
+`precos` recebe linhas de várias fontes (`sync_precos_brapi`, `sync_precos_hgbrasil`, ...)
+e o legado `sync_prices` escreve em `prices_daily`. Este job escolhe um único fechamento
+por ticker/dia para os jobs de compute lerem com 1 query indexada.
+
+Regras:
+- Prioridade de fontes: `MasterIntegrator.get_data_priority('prices')`; fontes fora da
+  lista vêm depois (ordem alfabética) e `prices_daily` (legado) por último.
+- Outlier: candidato com variação > `max_jump` vs. o último fechamento canônico é
+  rejeitado. Se TODOS forem outliers mas >=2 fontes concordarem entre si (ex.: split),
+  aceita o consenso.
+- Staleness: sem candidato no dia, repete o último fechamento canônico se ele tiver no
+  máximo `max_stale_days` dias (registrando `dias_defasagem`); senão o ticker fica sem preço.
+
+Uso:
+  python -m jobs.reconcile_precos [--date YYYY-MM-DD] [--max-jump 0.5] [--max-stale-days 5]
+
+Requer (Supabase): executar `sql/014_add_precos_diarios.sql`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from integrations.master_integrator import MasterIntegrator
+from jobs.common import SupabaseRestClient, get_supabase_admin_client, list_active_tickers, log_job_run
+
+
+LEGACY_SOURCE = "prices_daily"
+
+# Valores de `precos.fonte` que correspondem a uma integração da lista de prioridade.
+SOURCE_ALIASES = {"b3_cotahist": "b3"}
+
+# Tolerância para considerar duas fontes "de acordo" quando todas divergem do fechamento anterior.
+CONSENSUS_TOLERANCE = 0.02
+
+
+@dataclass(frozen=True)
+class Candidate:
+    ticker: str
+    fonte: str
+    fechamento: float
+
+
+def _safe_float(value: Any) -> Optional[float]:
+    try:
+        if value is None:
+            return None
+        return float(value)
+    except Exception:
+        return None
+
+
+def _source_rank(fonte: str, priority: List[str]) -> tuple[int, str]:
+    if fonte == LEGACY_SOURCE:
+        return (len(priority) + 1, fonte)
+    try:
+        return (priority.index(SOURCE_ALIASES.get(fonte, fonte)), fonte)
+    except ValueError:
+        return (len(priority), fonte)
+
+
+def _load_candidates(sb: SupabaseRestClient, day: str) -> Dict[str, List[Candidate]]:
+    by_ticker: Dict[str, List[Candidate]] = {}
+
+    rows = sb.select_all(
+        "precos",
+        f"select=ticker,fechamento,fonte&data=eq.{day}&order=ticker.asc,fonte.asc",
+    )
+    for r in rows:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        close = _safe_float(r.get("fechamento"))
+        if not ticker or close is None or close <= 0:
+            continue
+        fonte = str(r.get("fonte") or "").strip() or "desconhecida"
+        by_ticker.setdefault(ticker, []).append(Candidate(ticker=ticker, fonte=fonte, fechamento=close))
+
+    # Legado (schema antigo)
+    try:
+        legacy = sb.select_all("prices_daily", f"select=ticker,close&date=eq.{day}&order=ticker.asc")
+    except Exception:
+        legacy = []
+    for r in legacy:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        close = _safe_float(r.get("close"))
+        if not ticker or close is None or close <= 0:
+            continue
+        by_ticker.setdefault(ticker, []).append(Candidate(ticker=ticker, fonte=LEGACY_SOURCE, fechamento=close))
+
+    return by_ticker
+
+
+def _load_previous(sb: SupabaseRestClient, day: str, lookback_days: int) -> Dict[str, Dict[str, Any]]:
+    """Último fechamento canônico ANTES de `day` por ticker (janela de `lookback_days`)."""
+    start = (date.fromisoformat(day) - timedelta(days=int(lookback_days))).isoformat()
+    rows = sb.select_all(
+        "precos_diarios",
+        "select=ticker,data,fechamento,fonte,data_preco"
+        f"&data=gte.{start}&data=lt.{day}&order=data.desc,ticker.asc",
+    )
+    prev: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        ticker = str(r.get("ticker") or "").strip().upper()
+        if ticker and ticker not in prev:
+            prev[ticker] = r
+    return prev
+
+
+def _is_outlier(close: float, prev_close: Optional[float], max_jump: float) -> bool:
+    if prev_close is None or prev_close <= 0:
+        return False
+    return abs(close / prev_close - 1.0) > max_jump
+
+
+def reconcile_ticker(
+    ticker: str,
+    day: str,
+    candidates: List[Candidate],
+    previous: Optional[Dict[str, Any]],
+    *,
+    priority: List[str],
+    max_jump: float,
+    max_stale_days: int,
+) -> Optional[Dict[str, Any]]:
+    """Escolhe o fechamento canônico de um ticker (ou None se não houver preço confiável)."""
+    prev_close = _safe_float((previous or {}).get("fechamento"))
+    ordered = sorted(candidates, key=lambda c: _source_rank(c.fonte, priority))
+
+    chosen: Optional[Candidate] = None
+    statuses: Dict[int, str] = {}
+    for i, c in enumerate(ordered):
+        if _is_outlier(c.fechamento, prev_close, max_jump):
+            statuses[i] = "outlier"
+            continue
+        if chosen is None:
+            chosen = c
+            statuses[i] = "escolhido"
+        else:
+            statuses[i] = "preterido"
+
+    if chosen is None and len(ordered) >= 2:
+        # Todos divergem do anterior: aceita se houver consenso entre fontes (evento corporativo).
+        for i, c in enumerate(ordered):
+            agree = [
+                o
+                for o in ordered
+                if o is not c and abs(o.fechamento / c.fechamento - 1.0) <= CONSENSUS_TOLERANCE
+            ]
+            if agree:
+                chosen = c
+                statuses[i] = "escolhido_consenso"
+                break
+
+    candidatos = [
+        {"fonte": c.fonte, "fechamento": c.fechamento, "status": statuses.get(i, "preterido")}
+        for i, c in enumerate(ordered)
+    ]
+
+    if chosen is not None:
+        return {
+            "ticker": ticker,
+            "data": day,
+            "fechamento": chosen.fechamento,
+            "fonte": chosen.fonte,
+            "data_preco": day,
+            "dias_defasagem": 0,
+            "fechamento_anterior": prev_close,
+            "variacao_vs_anterior": (
+                round(chosen.fechamento / prev_close - 1.0, 6) if prev_close else None
+            ),
+            "candidatos": candidatos,
+        }
+
+    # Sem candidato válido: repete o último canônico se ainda for "fresco".
+    if previous is None or prev_close is None:
+        return None
+    price_day = str(previous.get("data_preco") or previous.get("data") or "")
+    try:
+        age = (date.fromisoformat(day) - date.fromisoformat(price_day)).days
+    except Exception:
+        return None
+    if age > int(max_stale_days):
+        return None
+
+    return {
+        "ticker": ticker,
+        "data": day,
+        "fechamento": prev_close,
+        "fonte": str(previous.get("fonte") or ""),
+        "data_preco": price_day,
+        "dias_defasagem": age,
+        "fechamento_anterior": prev_close,
+        "variacao_vs_anterior": 0.0,
+        "candidatos": candidatos,
+    }
+
+
+def main(
+    *,
+    as_of: Optional[str] = None,
+    max_jump: float = 0.5,
+    max_stale_days: int = 5,
+    lookback_days: int = 15,
+) -> None:
+    sb = get_supabase_admin_client()
+    started_at = datetime.now(timezone.utc)
+
+    day = as_of or date.today().isoformat()
+    priority = MasterIntegrator.get_data_priority("prices")
+
+    status = "success"
+    message: Optional[str] = None
+    rows_written = 0
+
+    try:
+        tickers = list_active_tickers(sb)
+        candidates = _load_candidates(sb, day)
+        previous = _load_previous(sb, day, lookback_days)
+
+        out: List[Dict[str, Any]] = []
+        stats = {"fresco": 0, "defasado": 0, "sem_preco": 0, "outliers": 0}
+        wins: Dict[str, int] = {}
+
+        for ticker in tickers:
+            row = reconcile_ticker(
+                ticker,
+                day,
+                candidates.get(ticker, []),
+                previous.get(ticker),
+                priority=priority,
+                max_jump=max_jump,
+                max_stale_days=max_stale_days,
+            )
+            for c in candidates.get(ticker, []):
+                if _is_outlier(c.fechamento, _safe_float((previous.get(ticker) or {}).get("fechamento")), max_jump):
+                    stats["outliers"] += 1
+            if row is None:
+                stats["sem_preco"] += 1
+                continue
+            if row["dias_defasagem"]:
+                stats["defasado"] += 1
+            else:
+                stats["fresco"] += 1
+                wins[row["fonte"]] = wins.get(row["fonte"], 0) + 1
+            out.append(row)
+
+        batch_size = 500
+        for i in range(0, len(out), batch_size):
+            sb.upsert("precos_diarios", out[i : i + batch_size], on_conflict="ticker,data")
+        rows_written = len(out)
+
+        print(f"✅ {rows_written} preço(s) canônicos em precos_diarios para {day}")
+        print(
+            f"[INFO] frescos={stats['fresco']} defasados={stats['defasado']} "
+            f"sem_preco={stats['sem_preco']} outliers_rejeitados={stats['outliers']}"
+        )
+        if wins:
+            print("[INFO] Fonte vencedora: " + ", ".join(f"{k}={v}" for k, v in sorted(wins.items())))
+
+    except Exception as e:
+        status = "error"
+        message = str(e)
+        print(f"[ERRO] Falha ao reconciliar preços: {e}")
+        if "PGRST205" in message and "precos_diarios" in message:
+            print("[DICA] Rode a migração no Supabase: sql/014_add_precos_diarios.sql")
+            return
+        raise
+
+    finally:
+        finished_at = datetime.now(timezone.utc)
+        log_job_run(
+            sb,
+            job_name="reconcile_precos",
+            status=status,
+            rows_processed=rows_written,
+            message=message,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconcilia precos (multi-fonte) em precos_diarios")
+    parser.add_argument("--date", type=str, default=None, help="Data YYYY-MM-DD (default: hoje)")
+    parser.add_argument(
+        "--max-jump",
+        type=float,
+        default=0.5,
+        help="Variação máxima vs. fechamento anterior antes de rejeitar como outlier (default: 0.5 = 50%%)",
+    )
+    parser.add_argument(
+        "--max-stale-days",
+        type=int,
+        default=5,
+        help="Máximo de dias para repetir o último fechamento quando não há preço no dia (default: 5)",
+    )
+    args = parser.parse_args()
+
+    main(as_of=args.date, max_jump=float(args.max_jump), max_stale_days=int(args.max_stale_days))
@@ -1,24 +1,113 @@
-"""Job: Sincronizar dados de RI via CVM (FCA) -> Supabase
+"""Job: Sincronizar dados de RI via CVM (FCA/FRE) -> Supabase
 
 Objetivo (MVP): persistir contatos/canais oficiais de Relações com Investidores,
-extraídos do Formulário Cadastral (FCA).
+extraídos do Formulário Cadastral (FCA). Com `--fre`, grava também a última entrega do
+Formulário de Referência por CNPJ (source `cvm_fre`, com o link do documento no payload).
+
+Vários anos (`--years 2023-2026`): os ZIPs são lidos em streaming, um por vez, e a versão
+mais recente (Data_Referencia, Versao) por CNPJ é resolvida entre todos os anos. Cada
+snapshot ganha `content_hash` (sha256 dos campos extraídos) e só os CNPJs cujo hash difere
+do último gravado (mesma fonte) são regravados, em lotes maiores e em paralelo — o refresh
+diário grava quase nada. `--no-diff` regrava tudo.
 
 Fonte oficial:
 - https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FCA/DADOS/
+- https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FRE/DADOS/
 
-Requer (Supabase): executar `sql/010_add_relacoes_investidores.sql`.
+Requer (Supabase): executar `sql/010_add_relacoes_investidores.sql`
+(e `sql/020_add_relacoes_investidores_content_hash.sql` para o diff por hash).
 """
 
 from __future__ import annotations
 
 from datetime import date, datetime, timezone
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from integrations.cvm_ri_integration import CVMRiIntegration, CvmRiSnapshot
+from jobs.common import BatchUpsertWriter, SupabaseRestClient, get_supabase_admin_client, log_job_run, parse_years
+from jobs.fundamentals_raw_dedupe import payload_hash
+from jobs.telemetry import phase
+
+
+TABLE = "relacoes_investidores"
+ON_CONFLICT = "cnpj,as_of_date,source"
+
+CONTACT_COLUMNS = (
+    "canal_divulgacao",
+    "dri_nome",
+    "dri_email",
+    "dri_telefone",
+    "dept_acionistas_contato",
+    "dept_acionistas_email",
+    "dept_acionistas_telefone",
+    "endereco_logradouro",
+    "endereco_complemento",
+    "endereco_bairro",
+    "endereco_cidade",
+    "endereco_uf",
+    "endereco_pais",
+    "endereco_cep",
+)
+
 
-from integrations.cvm_ri_integration import CVMRiIntegration
-from jobs.common import get_supabase_admin_client, log_job_run
+def _is_missing_hash_column(message: str) -> bool:
+    return "content_hash" in message or "PGRST204" in message or "42703" in message
 
 
-def main(*, year: int, limit: Optional[int] = None) -> None:
+def content_hash(snapshot: CvmRiSnapshot) -> str:
+    """Hash do conteúdo de RI (campos extraídos); o payload bruto e `fetched_at` ficam fora."""
+    return payload_hash({"source": snapshot.source, "extracted": snapshot.extracted})
+
+
+def load_stored_hashes(sb: SupabaseRestClient, sources: Sequence[str]) -> Optional[Dict[Tuple[str, str], str]]:
+    """(cnpj, source) -> `content_hash` do snapshot mais recente; None se a coluna não existe."""
+    try:
+        rows = sb.select_all(
+            TABLE,
+            "select=cnpj,source,as_of_date,content_hash"
+            f"&source=in.({','.join(sources)})"
+            "&order=source.asc,cnpj.asc,as_of_date.desc",
+        )
+    except Exception as e:
+        if not _is_missing_hash_column(str(e)):
+            raise
+        print(f"[AVISO] {TABLE} sem content_hash; diff desativado (todos os snapshots serão gravados).")
+        print("[DICA] Rode a migração no Supabase: sql/020_add_relacoes_investidores_content_hash.sql")
+        return None
+
+    latest: Dict[Tuple[str, str], str] = {}
+    for r in rows:
+        key = (str(r.get("cnpj") or ""), str(r.get("source") or ""))
+        if key not in latest:
+            # Linhas anteriores à migração (sem hash) contam como alteradas e são regravadas 1x
+            latest[key] = str(r.get("content_hash") or "")
+    return latest
+
+
+def _row(snapshot: CvmRiSnapshot, *, digest: Optional[str]) -> Dict[str, Any]:
+    e = snapshot.extracted
+    row: Dict[str, Any] = {
+        "cnpj": snapshot.cnpj,
+        "as_of_date": snapshot.as_of_date,
+        "source": snapshot.source,
+        **{col: e.get(col) for col in CONTACT_COLUMNS},
+        "payload": snapshot.payload,
+    }
+    if digest is not None:
+        row["content_hash"] = digest
+    return row
+
+
+def main(
+    *,
+    year: Optional[int] = None,
+    years: Optional[Sequence[int]] = None,
+    limit: Optional[int] = None,
+    include_fre: bool = False,
+    diff: bool = True,
+    chunk_size: int = 500,
+    workers: int = 4,
+) -> None:
     sb = get_supabase_admin_client()
     started_at = datetime.now(timezone.utc)
 
@@ -37,10 +126,21 @@ def main(*, year: int, limit: Optional[int] = None) -> None:
                 f"(detalhe: {e})"
             )
 
+        years = sorted(set(int(y) for y in (years or ([] if year is None else [year]))))
+        if not years:
+            raise ValueError("Informe --year ou --years")
+        label = str(years[0]) if len(years) == 1 else f"{years[0]}..{years[-1]}"
+
         cvm = CVMRiIntegration(timeout_seconds=180)
 
-        print(f"[*] Baixando e parseando FCA {year} (CVM)...")
-        snapshots = cvm.load_fca_snapshots(int(year))
+        print(f"[*] Baixando e parseando FCA {label} (CVM)...")
+        with phase("load_fca"):
+            snapshots = cvm.load_fca_snapshots_for_years(years)
+
+        if include_fre:
+            print(f"[*] Baixando e parseando FRE {label} (CVM)...")
+            with phase("load_fre"):
+                snapshots += cvm.load_fre_snapshots_for_years(years)
 
         if limit is not None:
             snapshots = snapshots[: int(limit)]
@@ -49,41 +149,33 @@ def main(*, year: int, limit: Optional[int] = None) -> None:
             print("[AVISO] Nenhum snapshot encontrado.")
             return
 
-        batch_size = 100
-        for i in range(0, len(snapshots), batch_size):
-            batch = snapshots[i : i + batch_size]
-
-            rows = []
-            for s in batch:
-                e = s.extracted
-                rows.append(
-                    {
-                        "cnpj": s.cnpj,
-                        "as_of_date": s.as_of_date,
-                        "source": s.source,
-                        "canal_divulgacao": e.get("canal_divulgacao"),
-                        "dri_nome": e.get("dri_nome"),
-                        "dri_email": e.get("dri_email"),
-                        "dri_telefone": e.get("dri_telefone"),
-                        "dept_acionistas_contato": e.get("dept_acionistas_contato"),
-                        "dept_acionistas_email": e.get("dept_acionistas_email"),
-                        "dept_acionistas_telefone": e.get("dept_acionistas_telefone"),
-                        "endereco_logradouro": e.get("endereco_logradouro"),
-                        "endereco_complemento": e.get("endereco_complemento"),
-                        "endereco_bairro": e.get("endereco_bairro"),
-                        "endereco_cidade": e.get("endereco_cidade"),
-                        "endereco_uf": e.get("endereco_uf"),
-                        "endereco_pais": e.get("endereco_pais"),
-                        "endereco_cep": e.get("endereco_cep"),
-                        "payload": s.payload,
-                    }
-                )
-
-            sb.upsert("relacoes_investidores", rows, on_conflict="cnpj,as_of_date,source")
-            rows_written += len(rows)
-            print(f"  Batch {i // batch_size + 1}: {len(rows)} salvos")
-
-        print(f"✅ {rows_written} registro(s) de RI salvos em relacoes_investidores")
+        stored: Optional[Dict[Tuple[str, str], str]] = None
+        if diff:
+            with phase("load_stored_hashes"):
+                stored = load_stored_hashes(sb, sorted({s.source for s in snapshots}))
+
+        rows: List[Dict[str, Any]] = []
+        unchanged = 0
+        for s in snapshots:
+            digest = content_hash(s) if stored is not None else None
+            if stored is not None and stored.get((s.cnpj, s.source)) == digest:
+                unchanged += 1
+                continue
+            rows.append(_row(s, digest=digest))
+
+        print(f"[INFO] {len(snapshots)} snapshot(s): {len(rows)} novo(s)/alterado(s), {unchanged} inalterado(s)")
+        if rows:
+            # `workers` threads do writer gravam lotes de `chunk_size` em paralelo
+            chunk_size = max(1, int(chunk_size))
+            with BatchUpsertWriter(sb, TABLE, on_conflict=ON_CONFLICT, batch_size=chunk_size, writers=workers) as writer:
+                for i in range(0, len(rows), chunk_size):
+                    writer.put(rows[i : i + chunk_size])
+            rows_written = writer.rows_written
+            if writer.errors:
+                raise RuntimeError(f"{writer.rows_failed} linha(s) não gravadas: {writer.last_error}")
+
+        print(f"✅ {rows_written} registro(s) de RI salvos em {TABLE} ({unchanged} inalterado(s) ignorado(s))")
+        message = f"{unchanged} inalterado(s)" if unchanged else None
 
     except Exception as e:
         status = "error"
@@ -107,19 +199,50 @@ def main(*, year: int, limit: Optional[int] = None) -> None:
 if __name__ == "__main__":
     import argparse
 
-    parser = argparse.ArgumentParser(description="Sincronizar RI (FCA) via CVM -> Supabase")
-    parser.add_argument(
+    parser = argparse.ArgumentParser(description="Sincronizar RI (FCA/FRE) via CVM -> Supabase")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
         "--year",
         type=int,
-        default=(date.today().year - 1),
+        default=None,
         help="Ano do FCA (default: ano anterior)",
     )
+    group.add_argument(
+        "--years",
+        type=str,
+        default=None,
+        help="Vários anos, versão mais recente por CNPJ entre eles (ex: 2023-2026)",
+    )
     parser.add_argument(
         "--limit",
         type=int,
         default=None,
         help="Limita quantidade de CNPJs para teste (opcional)",
     )
+    parser.add_argument(
+        "--fre",
+        action="store_true",
+        help="Inclui a última entrega do FRE por CNPJ (source cvm_fre)",
+    )
+    parser.add_argument(
+        "--no-diff",
+        action="store_true",
+        help="Regrava todos os snapshots (ignora o content_hash já gravado)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=500, help="Linhas por upsert (default: 500)")
+    parser.add_argument("--workers", type=int, default=4, help="Threads de escrita do BatchUpsertWriter (default: 4)")
 
     args = parser.parse_args()
-    main(year=int(args.year), limit=args.limit)
+    year = args.year
+    if year is None and not args.years:
+        year = date.today().year - 1
+
+    main(
+        year=year,
+        years=parse_years(args.years) if args.years else None,
+        limit=args.limit,
+        include_fre=bool(args.fre),
+        diff=not args.no_diff,
+        chunk_size=int(args.chunk_size),
+        workers=int(args.workers),
+    )
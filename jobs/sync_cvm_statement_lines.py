@@ -0,0 +1,140 @@
+"""Job: Carga das linhas de demonstrativos DFP (CVM) -> Supabase (tabela `cvm_statement_lines`).
+
+Diferente de `sync_fundamentals_cvm_dfp` (que guarda até N linhas por demonstrativo em
+`fundamentals_raw.payload.statements`), aqui TODAS as linhas do exercício corrente vão para
+uma tabela longa, consultável por código de conta (CD_CONTA), em upserts de lotes grandes
+direto dos DataFrames do ZIP anual.
+
+Uso:
+  python -m jobs.sync_cvm_statement_lines --year 2024
+  python -m jobs.sync_cvm_statement_lines --year 2024 --statements DRE,BPP,BPA,DFC_MI --only-mapped
+
+Requer (Supabase): executar `sql/018_add_cvm_statement_lines.sql`.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from integrations.cvm_integration import CVMIntegration
+from integrations.cvm_statements import DEFAULT_STATEMENTS, ON_CONFLICT, TABLE, iter_statement_line_rows
+from jobs.common import BatchUpsertWriter, SupabaseRestClient, get_supabase_admin_client, log_job_run
+
+
+def _load_mapped_cnpjs(sb: SupabaseRestClient) -> List[str]:
+    rows = sb.select_all("ticker_mapping", "select=cnpj&ativo=eq.true&cnpj=not.is.null")
+    cnpjs = {"".join(c for c in str(r.get("cnpj") or "") if c.isdigit()).zfill(14) for r in rows}
+    return sorted(c for c in cnpjs if c.strip("0"))
+
+
+def load_statement_lines(
+    sb: SupabaseRestClient,
+    demonstracoes: Dict[str, Any],
+    *,
+    year: int,
+    statements: Iterable[str] = DEFAULT_STATEMENTS,
+    cnpjs: Optional[Iterable[str]] = None,
+    batch_size: int = 2000,
+    doc_type: str = "DFP",
+) -> int:
+    """Upsert das linhas dos frames já carregados (`CVMIntegration.download_dfp/itr`). Retorna linhas gravadas."""
+    cnpjs = list(cnpjs) if cnpjs is not None else None
+    with BatchUpsertWriter(sb, TABLE, on_conflict=ON_CONFLICT, batch_size=batch_size) as writer:
+        for statement in statements:
+            df = demonstracoes.get(statement)
+            if df is None:
+                print(f"[AVISO] {statement} ausente no {doc_type} {year}; pulando.")
+                continue
+            parsed = 0
+            for rows in iter_statement_line_rows(
+                df, statement, fiscal_year=int(year), doc_type=doc_type, cnpjs=cnpjs, batch_size=batch_size
+            ):
+                parsed += len(rows)
+                writer.put(rows)
+            print(f"[OK] {statement}: {parsed} linha(s)")
+
+    if writer.errors:
+        raise RuntimeError(f"{writer.rows_failed} linha(s) não gravadas: {writer.last_error}")
+    return writer.rows_written
+
+
+def main(
+    *,
+    year: int,
+    statements: Optional[List[str]] = None,
+    only_mapped: bool = False,
+    batch_size: int = 2000,
+) -> None:
+    started_at = datetime.now(timezone.utc)
+    sb = get_supabase_admin_client()
+
+    status = "success"
+    message: Optional[str] = None
+    rows_written = 0
+
+    try:
+        cnpjs: Optional[List[str]] = None
+        if only_mapped:
+            cnpjs = _load_mapped_cnpjs(sb)
+            if not cnpjs:
+                print("[AVISO] ticker_mapping sem CNPJ; nada a carregar (rode sem --only-mapped).")
+                return
+            print(f"[INFO] Filtrando {len(cnpjs)} CNPJ(s) de ticker_mapping")
+
+        print(f"[*] Baixando DFP {year} da CVM (pode demorar)...")
+        demonstracoes = CVMIntegration().download_dfp(int(year))
+
+        rows_written = load_statement_lines(
+            sb,
+            demonstracoes,
+            year=int(year),
+            statements=statements or DEFAULT_STATEMENTS,
+            cnpjs=cnpjs,
+            batch_size=batch_size,
+        )
+        print(f"✅ {rows_written} linha(s) salvas em {TABLE} (DFP {year})")
+
+    except Exception as e:
+        status = "error"
+        message = str(e)
+        print(f"[ERRO] Falha na carga de {TABLE}: {e}")
+        if "PGRST205" in message and TABLE in message:
+            print("[DICA] Rode a migração no Supabase: sql/018_add_cvm_statement_lines.sql")
+            return
+        raise
+
+    finally:
+        finished_at = datetime.now(timezone.utc)
+        log_job_run(
+            sb,
+            job_name="sync_cvm_statement_lines",
+            status=status,
+            rows_processed=rows_written,
+            message=message,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Carga das linhas de demonstrativos DFP (CVM) -> cvm_statement_lines")
+    parser.add_argument("--year", type=int, required=True, help="Ano fiscal da DFP (ex: 2024)")
+    parser.add_argument(
+        "--statements",
+        type=str,
+        default=",".join(DEFAULT_STATEMENTS),
+        help="Demonstrativos separados por vírgula (default: DRE,BPP,BPA)",
+    )
+    parser.add_argument("--only-mapped", action="store_true", help="Só CNPJs presentes em ticker_mapping")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Linhas por upsert (default: 2000)")
+    args = parser.parse_args()
+
+    main(
+        year=int(args.year),
+        statements=[s.strip().upper() for s in str(args.statements).split(",") if s.strip()],
+        only_mapped=bool(args.only_mapped),
+        batch_size=int(args.batch_size),
+    )
@@ -1,22 +1,41 @@
 """
 Job: Sincronizar Dividendos via Brapi -> Supabase
 Busca histórico de dividendos da API Brapi e salva na tabela `dividends` do Supabase
+
+Sync incremental: a Brapi não filtra proventos por data (`dividends=true` devolve o
+histórico completo), então o ganho fica nos upserts: só eventos com
+ex_date >= watermark - overlap são gravados (ver `jobs/dividends_watermarks.py`).
+Na re-varredura semanal (ou `--deep`) todo o histórico é regravado.
+
+Uso:
+  python -m jobs.sync_dividendos_brapi [--deep] [--overlap-days 30]
 """
 
 from __future__ import annotations
 
 import sys
 from pathlib import Path
-from datetime import datetime, timezone
-from typing import List, Dict, Any
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Optional
 
 # Adicionar diretório raiz ao path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 from jobs.common import get_supabase_admin_client, log_job_run, load_universo_mvp_tickers
+from jobs.dividends_watermarks import (
+    advance_watermarks,
+    is_deep_scan_day,
+    load_watermarks,
+    overlap_days_from_env,
+    save_watermarks,
+    window_start,
+)
 import os
 
+
+WATERMARK_SOURCE = "brapi"
+
 from integrations.brapi_integration import BrapiIntegration
 
 
@@ -89,17 +108,25 @@ def sync_dividends_batch(
     sb,
     brapi: BrapiIntegration,
     tickers: List[str],
-    batch_size: int = 10
+    batch_size: int = 10,
+    min_ex_dates: Optional[Dict[str, date]] = None,
+    seen_rows: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, int]:
     """
     Sincroniza dividendos de um lote de tickers
-    
+
+    Args:
+        min_ex_dates: ticker -> menor ex_date a gravar (sync incremental; ausente = tudo)
+        seen_rows: se informado, recebe as linhas gravadas (para avançar os watermarks)
+
     Returns:
-        Dict com estatísticas {'success': N, 'errors': N, 'dividends_total': N}
+        Dict com estatísticas {'success': N, 'errors': N, 'dividends_total': N, 'skipped': N}
     """
     total_success = 0
     total_errors = 0
     total_dividends = 0
+    total_skipped = 0
+    min_ex_dates = min_ex_dates or {}
     
     # Processar em batches
     for i in range(0, len(tickers), batch_size):
@@ -154,6 +181,16 @@ def sync_dividends_batch(
                     print(f"  - {ticker}: Dividendos sem data valida")
                     total_success += 1
                     continue
+
+                min_ex = min_ex_dates.get(str(ticker).upper())
+                if min_ex is not None:
+                    fresh = [r for r in rows if r['ex_date'] >= min_ex.isoformat()]
+                    total_skipped += len(rows) - len(fresh)
+                    rows = fresh
+                    if not rows:
+                        print(f"  - {ticker}: Sem dividendos novos desde {min_ex.isoformat()}")
+                        total_success += 1
+                        continue
                 
                 # Salvar no Supabase
                 try:
@@ -167,6 +204,8 @@ def sync_dividends_batch(
                     print(f"  - {ticker}: {len(rows)} dividendo(s) salvos")
                     total_success += 1
                     total_dividends += len(rows)
+                    if seen_rows is not None:
+                        seen_rows.extend(rows)
                     
                 except Exception as e:
                     print(f"  - {ticker}: ERRO ao salvar - {e}")
@@ -179,11 +218,12 @@ def sync_dividends_batch(
     return {
         'success': total_success,
         'errors': total_errors,
-        'dividends_total': total_dividends
+        'dividends_total': total_dividends,
+        'skipped': total_skipped,
     }
 
 
-def main() -> None:
+def main(*, deep: Optional[bool] = None, overlap_days: Optional[int] = None) -> None:
     """Executa sincronização de dividendos Brapi -> Supabase"""
     print("=" * 70)
     print("SINCRONIZACAO DIVIDENDOS: BRAPI -> SUPABASE")
@@ -236,9 +276,30 @@ def main() -> None:
     message = None
     rows_processed = 0
     
+    today = date.today()
+    if deep is None:
+        deep = is_deep_scan_day(today)
+    if overlap_days is None:
+        overlap_days = overlap_days_from_env()
+
     try:
-        stats = sync_dividends_batch(sb, brapi, tickers, batch_size=10)
+        watermarks = {} if deep else load_watermarks(sb, tickers, source=WATERMARK_SOURCE)
+        min_ex_dates = {
+            t: window_start(d, overlap_days=int(overlap_days), today=today) for t, d in watermarks.items()
+        }
+        print(
+            f"[INFO] Varredura {'completa' if deep else 'incremental'}: "
+            f"{len(min_ex_dates)} ticker(s) com watermark (overlap={overlap_days}d)"
+        )
+
+        seen_rows: List[Dict[str, Any]] = []
+        stats = sync_dividends_batch(
+            sb, brapi, tickers, batch_size=10, min_ex_dates=min_ex_dates, seen_rows=seen_rows
+        )
         rows_processed = stats['dividends_total']
+        saved = save_watermarks(
+            sb, advance_watermarks(watermarks, seen_rows), source=WATERMARK_SOURCE, deep_scan=bool(deep)
+        )
         
         # Relatório final
         print("\n" + "=" * 70)
@@ -247,6 +308,8 @@ def main() -> None:
         print(f"[OK] Tickers processados: {stats['success']}")
         print(f"[ERRO] Erros: {stats['errors']}")
         print(f"[INFO] Total de dividendos salvos: {stats['dividends_total']}")
+        print(f"[INFO] Fora da janela incremental (não regravados): {stats['skipped']}")
+        print(f"[INFO] Watermarks atualizados: {saved}")
         
         if len(tickers) > 0:
             taxa_sucesso = (stats['success'] / len(tickers)) * 100
@@ -280,4 +343,16 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync de dividendos Brapi -> dividends (incremental)")
+    parser.add_argument("--deep", action="store_true", help="Força a regravação do histórico completo")
+    parser.add_argument(
+        "--overlap-days",
+        type=int,
+        default=None,
+        help="Dias de sobreposição antes do watermark (default: DIVIDENDS_OVERLAP_DAYS ou 30)",
+    )
+    args = parser.parse_args()
+
+    main(deep=True if args.deep else None, overlap_days=args.overlap_days)
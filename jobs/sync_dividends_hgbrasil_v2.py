@@ -12,12 +12,21 @@ Notas importantes:
     - interest_on_equity -> jcp
   (os demais são ignorados por enquanto, para não violar a constraint do schema.)
 
+Sync incremental:
+- Cada ticker tem um watermark (última ex_date conhecida; ver `jobs/dividends_watermarks.py`).
+  O run diário pede só `watermark - overlap` até hoje (janelas agrupadas em buckets de
+  `days_ago`, 1 requisição multi-ticker por bucket) e grava apenas eventos dessa janela.
+- Tickers sem histórico, o dia da re-varredura semanal e `--deep` usam a janela completa.
+
 Uso:
   python -m jobs.sync_dividends_hgbrasil_v2
+  python -m jobs.sync_dividends_hgbrasil_v2 --deep
+  python -m jobs.sync_dividends_hgbrasil_v2 --tickers PETR4,VALE3 --overlap-days 60
 
 Env:
   HGBRASIL_KEY (obrigatório)
-  HGBRASIL_DIVIDENDS_DAYS_AGO (opcional; default=1825 ~ 5 anos)
+  HGBRASIL_DIVIDENDS_DAYS_AGO (opcional; default=1825 ~ 5 anos; janela da varredura completa)
+  DIVIDENDS_OVERLAP_DAYS / DIVIDENDS_DEEP_SCAN_WEEKDAY (ver jobs/dividends_watermarks.py)
   UNIVERSE_MVP_PATH (opcional; default=data/universo_mvp.csv)
 """
 
@@ -35,6 +44,19 @@ from jobs.common import (
     load_universo_mvp_tickers,
     log_job_run,
 )
+from jobs.dividends_watermarks import (
+    advance_watermarks,
+    days_ago_bucket,
+    is_deep_scan_day,
+    load_watermarks,
+    overlap_days_from_env,
+    save_watermarks,
+    window_start,
+)
+from jobs.fundamentals_raw_dedupe import VOLATILE_KEYS, add_dedupe_args, build_deduper
+
+
+WATERMARK_SOURCE = "hgbrasil_dividends_v2"
 
 
 def _first_env(*names: str) -> str:
@@ -114,18 +136,37 @@ def _iter_dividend_rows(result_obj: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
     return out
 
 
+def _check_errors(resp: Dict[str, Any]) -> List[Dict[str, Any]]:
+    errors = resp.get("errors")
+    if isinstance(errors, list) and errors:
+        # Normalmente: [{code: 'UNAUTHORIZED_KEY', message: '...'}]
+        first = errors[0] if isinstance(errors[0], dict) else None
+        code = first.get("code") if first else None
+        msg = first.get("message") if first else None
+        raise RuntimeError(f"HG Brasil v2 dividends error ({code}): {msg or errors}")
+
+    results = resp.get("results")
+    if not isinstance(results, list):
+        raise RuntimeError("Resposta HG Brasil dividends v2 inesperada (results não é list).")
+    return [r for r in results if isinstance(r, dict)]
+
+
 def main(
     *,
     tickers: Optional[List[str]] = None,
     days_ago: Optional[int] = None,
     api_key: Optional[str] = None,
+    deep: Optional[bool] = None,
+    overlap_days: Optional[int] = None,
+    dedupe: Optional[str] = "pointer",
 ) -> None:
     started_at = datetime.now(timezone.utc)
     # Carregar .env.local (mesmo padrão dos jobs do projeto)
     load_dotenv(dotenv_path=".env.local", override=False)
     sb = get_supabase_admin_client()
 
-    as_of = date.today().isoformat()
+    today = date.today()
+    as_of = today.isoformat()
 
     if tickers is None:
         # Prefer universo MVP (se existir). Se não existir, não “chuta” universo grande.
@@ -145,6 +186,10 @@ def main(
 
     if days_ago is None:
         days_ago = int(os.getenv("HGBRASIL_DIVIDENDS_DAYS_AGO") or "1825")
+    if deep is None:
+        deep = is_deep_scan_day(today)
+    if overlap_days is None:
+        overlap_days = overlap_days_from_env()
 
     hg = HGBrasilIntegration(api_key=api_key)
 
@@ -154,47 +199,69 @@ def main(
     events_written = 0
 
     try:
-        # v2 aceita múltiplos tickers
-        v2_tickers = ",".join([f"B3:{t}" for t in tickers])
-        resp = hg.get_dividends_v2(v2_tickers, days_ago=int(days_ago))
-
-        errors = resp.get("errors")
-        if isinstance(errors, list) and errors:
-            # Normalmente: [{code: 'UNAUTHORIZED_KEY', message: '...'}]
-            first = errors[0] if isinstance(errors[0], dict) else None
-            code = first.get("code") if first else None
-            msg = first.get("message") if first else None
-            raise RuntimeError(f"HG Brasil v2 dividends error ({code}): {msg or errors}")
-
-        results = resp.get("results")
-        if not isinstance(results, list):
-            raise RuntimeError("Resposta HG Brasil dividends v2 inesperada (results não é list).")
+        watermarks = {} if deep else load_watermarks(sb, tickers, source=WATERMARK_SOURCE)
+
+        # ticker -> menor ex_date a gravar (None = tudo); buckets de days_ago -> tickers
+        starts: Dict[str, Optional[date]] = {}
+        buckets: Dict[int, List[str]] = {}
+        for t in tickers:
+            starts[t] = window_start(watermarks.get(t), overlap_days=int(overlap_days), today=today)
+            bucket = days_ago_bucket(starts[t], full_days=int(days_ago), today=today)
+            buckets.setdefault(bucket, []).append(t)
+
+        mode = "completa" if deep else "incremental"
+        print(
+            f"[INFO] Varredura {mode}: {len(tickers)} ticker(s) em {len(buckets)} requisição(ões) "
+            + "(" + ", ".join(f"days_ago={k}: {len(v)}" for k, v in sorted(buckets.items())) + ")"
+        )
 
         # Persistir raw por ticker em fundamentals_raw (source específico)
         raw_rows: List[Dict[str, Any]] = []
         dividend_rows: List[Dict[str, Any]] = []
-
-        for r in results:
-            if not isinstance(r, dict):
-                continue
-            symbol = str(r.get("symbol") or "").strip().upper()
-            if not symbol:
-                continue
-
-            raw_rows.append(
-                {
-                    "ticker": symbol,
-                    "as_of_date": as_of,
-                    "source": "hgbrasil_dividends_v2",
-                    "payload": {
-                        "days_ago": int(days_ago),
-                        "result": r,
-                        "metadata": resp.get("metadata"),
-                    },
-                }
-            )
-
-            dividend_rows.extend(list(_iter_dividend_rows(r)))
+        skipped = 0
+
+        for bucket_days, bucket_tickers in sorted(buckets.items()):
+            # v2 aceita múltiplos tickers
+            v2_tickers = ",".join([f"B3:{t}" for t in bucket_tickers])
+            resp = hg.get_dividends_v2(v2_tickers, days_ago=int(bucket_days))
+
+            for r in _check_errors(resp):
+                symbol = str(r.get("symbol") or "").strip().upper()
+                if not symbol:
+                    continue
+
+                raw_rows.append(
+                    {
+                        "ticker": symbol,
+                        "as_of_date": as_of,
+                        "source": "hgbrasil_dividends_v2",
+                        "payload": {
+                            "days_ago": int(bucket_days),
+                            "result": r,
+                            "metadata": resp.get("metadata"),
+                        },
+                    }
+                )
+
+                min_ex = starts.get(symbol)
+                for row in _iter_dividend_rows(r):
+                    if min_ex is not None and row["ex_date"] < min_ex.isoformat():
+                        skipped += 1
+                        continue
+                    dividend_rows.append(row)
+
+        # `metadata` da resposta muda a cada chamada: fora do hash.
+        deduper = build_deduper(
+            sb,
+            source="hgbrasil_dividends_v2",
+            as_of=as_of,
+            tickers=[r["ticker"] for r in raw_rows],
+            mode=dedupe,
+            exclude=VOLATILE_KEYS | {"metadata"},
+        )
+        if deduper is not None:
+            raw_rows = deduper.prepare(raw_rows)
+            print(f"[INFO] Dedupe raw: {deduper.summary()}")
 
         if raw_rows:
             sb.upsert("fundamentals_raw", raw_rows, on_conflict="ticker,as_of_date,source")
@@ -204,9 +271,14 @@ def main(
             sb.upsert("dividends", dividend_rows, on_conflict="ticker,ex_date,type,amount_per_share")
             events_written = len(dividend_rows)
 
+        # Regrava todos (inclusive os semeados de `dividends`): 1 upsert pequeno por run.
+        new_marks = advance_watermarks(watermarks, dividend_rows)
+        saved = save_watermarks(sb, new_marks, source=WATERMARK_SOURCE, deep_scan=bool(deep))
+
         print(
             f"✅ HG dividends v2: {rows_written} payload(s) raw salvos (fundamentals_raw) e "
-            f"{events_written} evento(s) salvos em dividends (days_ago={days_ago})"
+            f"{events_written} evento(s) salvos em dividends ({mode}; {skipped} fora da janela; "
+            f"{saved} watermark(s) atualizados)"
         )
 
     except Exception as e:
@@ -229,4 +301,23 @@ def main(
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync de proventos HG Brasil v2 -> dividends (incremental)")
+    parser.add_argument("--tickers", type=str, default=None, help="Tickers separados por vírgula (default: universo MVP)")
+    parser.add_argument("--deep", action="store_true", help="Força a varredura completa (ignora watermarks)")
+    parser.add_argument(
+        "--overlap-days",
+        type=int,
+        default=None,
+        help="Dias de sobreposição antes do watermark (default: DIVIDENDS_OVERLAP_DAYS ou 30)",
+    )
+    add_dedupe_args(parser)
+    args = parser.parse_args()
+
+    main(
+        tickers=[t for t in str(args.tickers).split(",") if t.strip()] if args.tickers else None,
+        deep=True if args.deep else None,
+        overlap_days=args.overlap_days,
+        dedupe=args.dedupe,
+    )
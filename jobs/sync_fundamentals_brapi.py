@@ -3,7 +3,10 @@
 Armazena o payload bruto (JSON) em `fundamentals_raw` para manter flexibilidade
 (e permitir evoluir o schema depois, ou adicionar outra fonte como Fintz).
 
-Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`.
+Payloads iguais ao último gravado viram linha ponteiro (ver `jobs/fundamentals_raw_dedupe.py`).
+
+Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`
+(e `sql/017_add_fundamentals_raw_payload_hash.sql` para a deduplicação).
 """
 
 from __future__ import annotations
@@ -14,6 +17,7 @@ from datetime import date, datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from jobs.common import get_supabase_admin_client, list_active_tickers, log_job_run
+from jobs.fundamentals_raw_dedupe import add_dedupe_args, build_deduper
 from integrations.brapi_integration import BrapiIntegration
 
 
@@ -39,6 +43,7 @@ def main(
     tickers: Optional[List[str]] = None,
     batch_size: int = 10,
     api_key: Optional[str] = None,
+    dedupe: Optional[str] = "pointer",
 ) -> None:
     started_at = datetime.now(timezone.utc)
     sb = get_supabase_admin_client()
@@ -72,6 +77,8 @@ def main(
     rows_written = 0
 
     try:
+        deduper = build_deduper(sb, source="brapi", as_of=as_of, tickers=tickers, mode=dedupe)
+
         batches = _chunk(tickers, batch_size)
         for i, batch in enumerate(batches, start=1):
             print(f"[*] Batch {i}/{len(batches)}: {', '.join(batch)}")
@@ -92,6 +99,8 @@ def main(
                     }
                 )
 
+            if deduper is not None:
+                rows = deduper.prepare(rows)
             if not rows:
                 continue
 
@@ -99,6 +108,8 @@ def main(
             rows_written += len(rows)
 
         print(f"✅ {rows_written} payload(s) de fundamentos salvos em fundamentals_raw para {as_of}")
+        if deduper is not None:
+            print(f"[INFO] Dedupe: {deduper.summary()}")
 
     except Exception as e:
         status = "error"
@@ -126,6 +137,7 @@ if __name__ == "__main__":
     parser.add_argument("--tickers", type=str, help="Lista de tickers separados por vírgula (opcional)")
     parser.add_argument("--batch-size", type=int, default=10, help="Tamanho do batch para chamadas na Brapi")
     parser.add_argument("--api-key", type=str, default=None, help="Token da Brapi (opcional)")
+    add_dedupe_args(parser)
 
     args = parser.parse_args()
 
@@ -133,4 +145,4 @@ if __name__ == "__main__":
     if args.tickers:
         tickers_arg = [t.strip() for t in str(args.tickers).split(",") if t.strip()]
 
-    main(tickers=tickers_arg, batch_size=int(args.batch_size), api_key=args.api_key)
+    main(tickers=tickers_arg, batch_size=int(args.batch_size), api_key=args.api_key, dedupe=args.dedupe)
@@ -1,51 +1,73 @@
-"""Job: Sincronizar fundamentos (DFP) via CVM -> Supabase
+"""Job: Sincronizar fundamentos (DFP/ITR) via CVM -> Supabase
 
 Este job baixa o ZIP de DFP (demonstrações anuais) da CVM e salva um snapshot
 por ticker em `fundamentals_raw`.
 
 Observações importantes:
 - A CVM distribui os dados em arquivos grandes (por ano) — não há endpoint por empresa.
-- Aqui fazemos: baixar 1 ano e filtrar as linhas por CNPJ para cada ticker.
+- Aqui fazemos: baixar 1 ano e separar as linhas por CNPJ (1 groupby) para os tickers mapeados.
 - O job existente `sync_fundamentals_cvm.py` continua focado no cadastro (companies_cvm).
 
+Vários anos (`--years 2015-2024`) e ITR (`--doc-types DFP,ITR`): cada ZIP (ano/documento)
+é baixado e parseado num processo separado (`ProcessPoolExecutor`; o parse pandas é CPU).
+O worker devolve só os frames já filtrados pelos CNPJs mapeados (colunas necessárias) e
+as métricas resolvidas em colunas; o processo principal monta os payloads e grava em lote
+à medida que os anos ficam prontos.
+
+- DFP: 1 payload por ticker/ano em `source=cvm` (as_of_date = última DT_REFER).
+- ITR: 1 payload por ticker/trimestre em `source=cvm_itr` (não se mistura com o anual
+  lido por `compute_cvm_dfp_metrics_daily`).
+
 Fonte oficial:
 - https://dados.cvm.gov.br/
 
-Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`.
+Com `--with-lines`, os mesmos DataFrames também são carregados (todas as linhas, sem o
+limite de `--max-rows`) em `cvm_statement_lines` (ver `jobs/sync_cvm_statement_lines.py`).
+
+Env:
+  CVM_PARSE_WORKERS (opcional; processos de parse; default=nº de CPUs)
+
+Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`
+(e `sql/018_add_cvm_statement_lines.sql` para `--with-lines`).
 """
 
 from __future__ import annotations
 
 import os
-
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from integrations.cvm_integration import CVMIntegration
-from jobs.common import get_supabase_admin_client, list_active_tickers, log_job_run
+from integrations.cvm_metric_resolver import MetricResolver
+from jobs.common import BatchUpsertWriter, get_supabase_admin_client, list_active_tickers, log_job_run, parse_years
+from jobs.telemetry import current as current_telemetry, phase
+from jobs.sync_cvm_statement_lines import load_statement_lines
 
 
-def _normalize_cnpj(cnpj: str) -> str:
-    digits = "".join(c for c in str(cnpj or "") if c.isdigit())
-    return digits.zfill(14) if digits else ""
+STATEMENTS = ("DRE", "BPP", "BPA")
 
+SOURCE_BY_DOC_TYPE = {"DFP": "cvm", "ITR": "cvm_itr"}
 
-def _df_filter_by_cnpj(df: Any, cnpj: str) -> Any:
-    """Filtra DataFrame CVM por CNPJ (normalizado) de forma robusta."""
-    if df is None:
-        return None
+# Colunas gravadas no payload (`statements`).
+PAYLOAD_COLUMNS = ["DT_REFER", "DENOM_CIA", "CD_CONTA", "DS_CONTA", "ORDEM_EXERC", "VL_CONTA", "VERSAO"]
 
-    cnpj_norm = _normalize_cnpj(cnpj)
-    if not cnpj_norm:
-        return None
+# Colunas devolvidas pelo worker (payload + `cvm_statement_lines`).
+WORKER_COLUMNS = PAYLOAD_COLUMNS + ["CNPJ_CIA", "ESCALA_MOEDA", "DT_INI_EXERC"]
 
-    try:
-        series = df["CNPJ_CIA"].astype(str)
-        # Normaliza CNPJ do CSV (remove não-dígitos e pad 14)
-        series = series.str.replace(r"\D+", "", regex=True).str.zfill(14)
-        return df[series == cnpj_norm]
-    except Exception:
-        return None
+EXTRACTED_METRICS = (
+    "patrimonio_liquido",
+    "divida_bruta",
+    "caixa_equivalentes",
+    "proventos_total_keywords",
+    "lucro_liquido",
+)
+
+
+def _normalize_cnpj(cnpj: str) -> str:
+    digits = "".join(c for c in str(cnpj or "") if c.isdigit())
+    return digits.zfill(14) if digits else ""
 
 
 def _safe_date(value: Any) -> Optional[str]:
@@ -66,71 +88,168 @@ def _safe_date(value: Any) -> Optional[str]:
     return text
 
 
-def _df_rows_for_company(df: Any, cnpj: str, *, max_rows: int = 500) -> List[Dict[str, Any]]:
-    """Converte um subconjunto do DataFrame em lista de dicts para JSON."""
-    if df is None:
-        return []
+def _parse_year(doc_type: str, year: int, cnpjs: List[str]) -> Dict[str, Any]:
+    """Worker: baixa/parseia o ZIP e devolve só o necessário para os CNPJs pedidos.
 
-    sub = _df_filter_by_cnpj(df, cnpj)
-    if sub is None:
-        return []
+    Retorno (compacto, barato de serializar entre processos):
+    - frames: demonstrativo -> DataFrame filtrado (CNPJ_CIA normalizado, `WORKER_COLUMNS`)
+    - metrics: colunas `cnpj/dt_refer/metric/value` do `MetricResolver`
+    - timings: segundos por fase no worker (somados à telemetria do job no processo pai)
+    """
+    t0 = time.perf_counter()
+    demonstracoes = CVMIntegration().download_demonstracoes(int(year), doc_type=doc_type, statements=list(STATEMENTS))
+    wanted = set(cnpjs)
 
-    try:
-        if len(sub) > max_rows:
-            sub = sub.head(max_rows)
-    except Exception:
-        pass
+    frames: Dict[str, Any] = {}
+    for statement in STATEMENTS:
+        df = demonstracoes.get(statement)
+        if df is None:
+            continue
+        key = df["CNPJ_CIA"].astype(str).str.replace(r"\D+", "", regex=True).str.zfill(14)
+        mask = key.isin(wanted)
+        cols = [c for c in WORKER_COLUMNS if c in df.columns]
+        frames[statement] = df.loc[mask, cols].assign(CNPJ_CIA=key[mask])
+
+    t1 = time.perf_counter()
+    long = MetricResolver().resolve_frames(frames)
+    return {
+        "doc_type": doc_type,
+        "year": int(year),
+        "frames": frames,
+        "metrics": long[["cnpj", "dt_refer", "metric", "value"]].to_dict(orient="list"),
+        "timings": {"download_parse_zip": t1 - t0, "resolve_metrics": time.perf_counter() - t1},
+    }
+
+
+def _payload_rows(sub: Any, *, max_rows: int) -> List[Dict[str, Any]]:
+    """Converte as linhas de uma empresa em lista de dicts para JSON."""
+    if sub is None or len(sub) == 0:
+        return []
+    if len(sub) > max_rows:
+        sub = sub.head(max_rows)
+    cols = [c for c in PAYLOAD_COLUMNS if c in sub.columns]
+    records = sub[cols].to_dict(orient="records")
+    # Normaliza DT_REFER (pandas Timestamp) para string
+    for r in records:
+        if "DT_REFER" in r:
+            r["DT_REFER"] = _safe_date(r.get("DT_REFER"))
+    return records
+
+
+def _build_raw_rows(
+    result: Dict[str, Any],
+    *,
+    tickers: List[str],
+    cnpj_by_ticker: Dict[str, str],
+    max_rows: int,
+) -> List[Dict[str, Any]]:
+    """Payloads `fundamentals_raw` de um ano (DFP: 1 por ticker; ITR: 1 por ticker/trimestre)."""
+    doc_type = result["doc_type"]
+    year = int(result["year"])
+    frames = result["frames"]
+
+    metrics_by_key: Dict[Tuple[str, str], Dict[str, float]] = {}
+    m = result["metrics"]
+    for cnpj, dt_refer, metric, value in zip(m["cnpj"], m["dt_refer"], m["metric"], m["value"]):
+        metrics_by_key.setdefault((cnpj, dt_refer), {})[metric] = float(value)
+
+    # 1 groupby por demonstrativo (em vez de filtrar o frame inteiro por ticker)
+    by_cnpj: Dict[str, Dict[str, Any]] = {}
+    for statement, df in frames.items():
+        for cnpj, sub in df.groupby("CNPJ_CIA", sort=False):
+            by_cnpj.setdefault(str(cnpj), {})[statement] = sub
+
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    out: List[Dict[str, Any]] = []
+    for ticker in tickers:
+        cnpj = cnpj_by_ticker.get(ticker, "")
+        if not cnpj:
+            continue
+        company = by_cnpj.get(cnpj) or {}
 
-    cols = [
-        c
-        for c in [
-            "DT_REFER",
-            "DENOM_CIA",
-            "CD_CONTA",
-            "DS_CONTA",
-            "ORDEM_EXERC",
-            "VL_CONTA",
-            "VERSAO",
-        ]
-        if c in getattr(sub, "columns", [])
-    ]
+        dates = sorted(
+            {str(_safe_date(v)) for sub in company.values() for v in sub["DT_REFER"].dropna().unique()}
+        )
+        if doc_type == "DFP":
+            # Define as_of_date como a última DT_REFER que aparecer nos dados filtrados
+            dates = [dates[-1] if dates else date(year, 12, 31).isoformat()]
+
+        for as_of in dates:
+            statements: Dict[str, List[Dict[str, Any]]] = {}
+            for statement in STATEMENTS:
+                sub = company.get(statement)
+                if sub is not None and doc_type != "DFP":
+                    sub = sub[sub["DT_REFER"].astype(str).str[:10] == as_of]
+                statements[statement] = _payload_rows(sub, max_rows=max_rows)
+
+            # Métricas resolvidas 1x para todas as empresas (por código de conta + fallback keyword)
+            metrics = metrics_by_key.get((cnpj, as_of)) or {}
+            extracted: Dict[str, Any] = {k: metrics.get(k) for k in EXTRACTED_METRICS}
+            d = extracted.get("divida_bruta")
+            c = extracted.get("caixa_equivalentes")
+            extracted["divida_liquida"] = None if d is None or c is None else float(d) - float(c)
 
-    try:
-        if cols:
-            sub = sub[cols]
-        records = sub.to_dict(orient="records")
-        # Normaliza DT_REFER (pandas Timestamp) para string
-        for r in records:
-            if "DT_REFER" in r:
-                r["DT_REFER"] = _safe_date(r.get("DT_REFER"))
-        return records
-    except Exception:
-        return []
+            payload: Dict[str, Any] = {
+                "ticker": ticker,
+                "cnpj": cnpj,
+                "year": year,
+                "statements": statements,
+                "extracted": extracted,
+                "statement_counts": {k: len(v) for k, v in statements.items()},
+                "fetched_at": fetched_at,
+            }
+            if doc_type != "DFP":
+                payload["doc_type"] = doc_type
+                payload["quarter"] = (int(as_of[5:7]) + 2) // 3
+
+            out.append(
+                {
+                    "ticker": ticker,
+                    "as_of_date": as_of,
+                    "source": SOURCE_BY_DOC_TYPE[doc_type],
+                    "payload": payload,
+                }
+            )
+    return out
+
+
+def _iter_results(jobs: List[Tuple[str, int]], cnpjs: List[str], *, workers: int) -> Iterable[Tuple[str, int, Any]]:
+    """(doc_type, ano, resultado ou exceção) na ordem em que os ZIPs ficam prontos."""
+    if workers <= 1 or len(jobs) <= 1:
+        for doc_type, year in jobs:
+            try:
+                yield doc_type, year, _parse_year(doc_type, year, cnpjs)
+            except Exception as e:
+                yield doc_type, year, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_parse_year, doc_type, year, cnpjs): (doc_type, year) for doc_type, year in jobs}
+        for future in as_completed(futures):
+            doc_type, year = futures[future]
+            try:
+                yield doc_type, year, future.result()
+            except Exception as e:
+                yield doc_type, year, e
 
 
-def _pick_latest_metric(rows: List[Dict[str, Any]], key: str) -> Optional[float]:
-    best_date = ""
-    best_val: Optional[float] = None
-    for r in rows:
-        d = str(r.get("DT_REFER") or "")
-        v = r.get(key)
-        try:
-            fv = float(v) if v is not None else None
-        except Exception:
-            fv = None
-        if fv is None:
-            continue
-        if d >= best_date:
-            best_date = d
-            best_val = fv
-    return best_val
+def _workers_from_env(n_jobs: int) -> int:
+    try:
+        workers = int(os.getenv("CVM_PARSE_WORKERS") or 0)
+    except ValueError:
+        workers = 0
+    return max(1, min(n_jobs, workers or (os.cpu_count() or 1)))
 
 
 def main(
     *,
-    year: int,
+    year: Optional[int] = None,
+    years: Optional[List[int]] = None,
+    doc_types: Iterable[str] = ("DFP",),
     tickers: Optional[List[str]] = None,
     max_rows_per_statement: int = 500,
+    with_lines: bool = False,
+    workers: Optional[int] = None,
 ) -> None:
     started_at = datetime.now(timezone.utc)
     sb = get_supabase_admin_client()
@@ -140,6 +259,14 @@ def main(
     rows_written = 0
 
     try:
+        years = sorted(set(years or ([] if year is None else [int(year)])))
+        doc_types = [str(d).strip().upper() for d in doc_types if str(d).strip()]
+        if not years:
+            raise ValueError("Informe --year ou --years")
+        invalid = [d for d in doc_types if d not in SOURCE_BY_DOC_TYPE]
+        if invalid or not doc_types:
+            raise ValueError(f"doc_types inválidos: {invalid} (use DFP|ITR)")
+
         if not tickers:
             # Prefer tickers que já têm CNPJ (destrava ingestões CVM: DFP/FRE/RI)
             try:
@@ -182,121 +309,63 @@ def main(
             for r in mapping_rows
             if isinstance(r, dict)
         }
+        missing = [t for t in tickers if not cnpj_by_ticker.get(t)]
+        if missing:
+            print(f"[AVISO] {len(missing)} ticker(s) sem CNPJ no ticker_mapping; pulando: {', '.join(missing[:20])}")
+        cnpjs = sorted({cnpj_by_ticker[t] for t in tickers if cnpj_by_ticker.get(t)})
+
+        jobs = [(doc_type, y) for y in years for doc_type in doc_types]
+        n_workers = max(1, min(len(jobs), int(workers))) if workers else _workers_from_env(len(jobs))
+        print(
+            f"[*] Baixando {'/'.join(doc_types)} {years[0]}..{years[-1]} da CVM "
+            f"({len(jobs)} arquivo(s), {n_workers} processo(s); pode demorar)..."
+        )
 
-        cvm = CVMIntegration()
-
-        print(f"[*] Baixando DFP {year} da CVM (pode demorar)...")
-        demonstracoes = cvm.download_dfp(int(year))
-        df_dre = demonstracoes.get("DRE")
-        df_bpp = demonstracoes.get("BPP")
-        df_bpa = demonstracoes.get("BPA")
-
-        if df_dre is None or df_bpp is None:
-            raise RuntimeError("DFP sem DRE/BPP (zip incompleto ou formato inesperado)")
-
-        for i, ticker in enumerate(tickers, start=1):
-            print(f"[*] {i}/{len(tickers)}: {ticker}")
-            cnpj = cnpj_by_ticker.get(ticker, "")
-            if not cnpj:
-                print("  [AVISO] Sem CNPJ no ticker_mapping; pulando.")
-                continue
-
-            # Extrai linhas (cruas) por empresa
-            dre_rows = _df_rows_for_company(df_dre, cnpj, max_rows=max_rows_per_statement)
-            bpp_rows = _df_rows_for_company(df_bpp, cnpj, max_rows=max_rows_per_statement)
-            bpa_rows = _df_rows_for_company(df_bpa, cnpj, max_rows=max_rows_per_statement)
-
-            # Métricas derivadas (opcional) usando utilitários da integração
-            extracted: Dict[str, Any] = {}
-            try:
-                # Patrimônio Líquido
-                bpp_sub = _df_filter_by_cnpj(df_bpp, cnpj)
-                pl_df = cvm.extrair_patrimonio_liquido(bpp_sub) if bpp_sub is not None else None
-                extracted["patrimonio_liquido"] = _pick_latest_metric(
-                    pl_df.to_dict(orient="records") if pl_df is not None else [],
-                    "PATRIMONIO_LIQUIDO",
-                )
-            except Exception:
-                extracted["patrimonio_liquido"] = None
-
-            try:
-                # Dívida bruta (heurística)
-                bpp_sub = _df_filter_by_cnpj(df_bpp, cnpj)
-                div_df = cvm.extrair_divida_bruta(bpp_sub) if bpp_sub is not None else None
-                extracted["divida_bruta"] = _pick_latest_metric(
-                    div_df.to_dict(orient="records") if div_df is not None else [],
-                    "DIVIDA_BRUTA",
-                )
-            except Exception:
-                extracted["divida_bruta"] = None
-
-            try:
-                # Caixa e equivalentes (heurística) — requer BPA
-                if df_bpa is None:
-                    extracted["caixa_equivalentes"] = None
-                else:
-                    bpa_sub = _df_filter_by_cnpj(df_bpa, cnpj)
-                    cx_df = cvm.extrair_caixa_equivalentes(bpa_sub) if bpa_sub is not None else None
-                    extracted["caixa_equivalentes"] = _pick_latest_metric(
-                        cx_df.to_dict(orient="records") if cx_df is not None else [],
-                        "CAIXA_EQUIVALENTES",
+        failed: List[str] = []
+        lines_written = 0
+        with BatchUpsertWriter(sb, "fundamentals_raw", on_conflict="ticker,as_of_date,source", batch_size=25) as writer:
+            for doc_type, y, result in _iter_results(jobs, cnpjs, workers=n_workers):
+                if isinstance(result, Exception):
+                    print(f"[ERRO] {doc_type} {y}: {result}")
+                    failed.append(f"{doc_type} {y}")
+                    continue
+                for name, seconds in (result.get("timings") or {}).items():
+                    current_telemetry().add_phase(name, seconds)
+
+                if result["frames"].get("DRE") is None or result["frames"].get("BPP") is None:
+                    print(f"[ERRO] {doc_type} {y} sem DRE/BPP (zip incompleto ou formato inesperado)")
+                    failed.append(f"{doc_type} {y}")
+                    continue
+
+                with phase("build_payloads"):
+                    rows = _build_raw_rows(
+                        result,
+                        tickers=tickers,
+                        cnpj_by_ticker=cnpj_by_ticker,
+                        max_rows=max_rows_per_statement,
                     )
-            except Exception:
-                extracted["caixa_equivalentes"] = None
+                writer.put(rows)
+                print(f"[OK] {doc_type} {y}: {len(rows)} payload(s)")
 
-            try:
-                # Dívida líquida (quando ambos existem)
-                d = extracted.get("divida_bruta")
-                c = extracted.get("caixa_equivalentes")
-                if d is None or c is None:
-                    extracted["divida_liquida"] = None
-                else:
-                    extracted["divida_liquida"] = float(d) - float(c)
-            except Exception:
-                extracted["divida_liquida"] = None
+                if with_lines:
+                    with phase("statement_lines"):
+                        lines_written += load_statement_lines(
+                            sb, result["frames"], year=y, statements=STATEMENTS, doc_type=doc_type
+                        )
 
-            try:
-                # Proventos encontrados por keyword (heurístico)
-                dre_sub = _df_filter_by_cnpj(df_dre, cnpj)
-                prov_df = cvm.extrair_dividendos(dre_sub) if dre_sub is not None else None
-                extracted["proventos_total_keywords"] = _pick_latest_metric(
-                    prov_df.to_dict(orient="records") if prov_df is not None else [],
-                    "PROVENTOS_TOTAL",
-                )
-            except Exception:
-                extracted["proventos_total_keywords"] = None
+        if writer.errors:
+            raise RuntimeError(f"{writer.rows_failed} payload(s) não gravados: {writer.last_error}")
+        rows_written = writer.rows_written
 
-            # Define as_of_date como a última DT_REFER que aparecer nos dados filtrados
-            latest_dates = [
-                str(r.get("DT_REFER") or "")
-                for r in (dre_rows + bpp_rows + bpa_rows)
-                if r.get("DT_REFER")
-            ]
-            as_of = max(latest_dates) if latest_dates else date(int(year), 12, 31).isoformat()
+        if with_lines:
+            print(f"[OK] {lines_written} linha(s) salvas em cvm_statement_lines")
+        print(f"✅ {rows_written} payload(s) DFP/ITR salvos em fundamentals_raw")
 
-            payload: Dict[str, Any] = {
-                "ticker": ticker,
-                "cnpj": cnpj,
-                "year": int(year),
-                "statements": {
-                    "DRE": dre_rows,
-                    "BPP": bpp_rows,
-                    "BPA": bpa_rows,
-                },
-                "extracted": extracted,
-                "fetched_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-            row = {
-                "ticker": ticker,
-                "as_of_date": as_of,
-                "source": "cvm",
-                "payload": payload,
-            }
-            sb.upsert("fundamentals_raw", [row], on_conflict="ticker,as_of_date,source")
-            rows_written += 1
-
-        print(f"✅ {rows_written} payload(s) DFP salvos em fundamentals_raw (source=cvm)")
+        if failed:
+            message = f"Falharam: {', '.join(failed)}"
+            print(f"[AVISO] {message}")
+            if len(failed) == len(jobs):
+                raise RuntimeError(message)
 
     except Exception as e:
         status = "error"
@@ -320,8 +389,17 @@ def main(
 if __name__ == "__main__":
     import argparse
 
-    parser = argparse.ArgumentParser(description="Sincronizar fundamentos (DFP) via CVM -> Supabase")
-    parser.add_argument("--year", type=int, required=True, help="Ano fiscal da DFP (ex: 2024)")
+    parser = argparse.ArgumentParser(description="Sincronizar fundamentos (DFP/ITR) via CVM -> Supabase")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--year", type=int, default=None, help="Ano fiscal da DFP (ex: 2024)")
+    group.add_argument("--years", type=str, default=None, help="Vários anos (ex: 2015-2024 ou 2019,2021-2023)")
+    parser.add_argument(
+        "--doc-types",
+        type=str,
+        default="DFP",
+        help="Documentos separados por vírgula: DFP (anual) e/ou ITR (trimestral). Default: DFP",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Processos de parse (default: CVM_PARSE_WORKERS ou nº de CPUs)")
     parser.add_argument("--tickers", type=str, default=None, help="Lista de tickers separados por vírgula (opcional)")
     parser.add_argument(
         "--max-rows",
@@ -329,6 +407,11 @@ if __name__ == "__main__":
         default=500,
         help="Máximo de linhas por demonstrativo para salvar no payload (default: 500)",
     )
+    parser.add_argument(
+        "--with-lines",
+        action="store_true",
+        help="Também carrega todas as linhas dos demonstrativos em cvm_statement_lines",
+    )
 
     args = parser.parse_args()
 
@@ -336,4 +419,12 @@ if __name__ == "__main__":
     if args.tickers:
         tickers_arg = [t.strip() for t in str(args.tickers).split(",") if t.strip()]
 
-    main(year=int(args.year), tickers=tickers_arg, max_rows_per_statement=int(args.max_rows))
+    main(
+        year=args.year,
+        years=parse_years(args.years) if args.years else None,
+        doc_types=[d for d in str(args.doc_types).split(",") if d.strip()],
+        tickers=tickers_arg,
+        max_rows_per_statement=int(args.max_rows),
+        with_lines=bool(args.with_lines),
+        workers=args.workers,
+    )
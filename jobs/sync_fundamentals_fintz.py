@@ -9,17 +9,38 @@ Nesta versão, usamos dois endpoints estáveis e fáceis de consumir:
 Docs:
 - https://docs.fintz.com.br/endpoints/bolsa/
 
+Modo pipeline (`--pipeline`):
+- As 2-3 chamadas de cada ticker (indicadores, itens contábeis, proventos) vão para um
+  pool de workers (concorrência entre chamadas e entre tickers), limitado pelo
+  `rateLimit.requestsPerMinute` da Fintz (ou `--rpm`).
+- Payloads prontos seguem para um writer em background que faz upsert em lotes.
+- Checkpoint em data/checkpoints/: uma execução que falhar continua de onde parou.
+
+Payloads iguais ao último gravado (ignorando `fetched_at`) viram linha ponteiro
+(ver `jobs/fundamentals_raw_dedupe.py`; `--dedupe skip|off` para mudar).
+
 Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`.
 """
 
 from __future__ import annotations
 
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from integrations.fintz_integration import FintzIntegration
-from jobs.common import get_supabase_admin_client, list_active_tickers, log_job_run
+from integrations.http_utils import TokenBucket
+from jobs.common import (
+    BatchUpsertWriter,
+    JobCheckpoint,
+    SupabaseRestClient,
+    get_supabase_admin_client,
+    list_active_tickers,
+    log_job_run,
+)
+from jobs.fundamentals_raw_dedupe import RawPayloadDeduper, add_dedupe_args, build_deduper
+from web.admin_integrations import get_rate_limit_per_minute
 
 
 def _first_env(*names: str) -> str:
@@ -30,6 +51,160 @@ def _first_env(*names: str) -> str:
     return ""
 
 
+def _build_row(
+    ticker: str,
+    as_of: str,
+    *,
+    indicadores: List[Dict[str, Any]],
+    itens: List[Dict[str, Any]],
+    proventos: List[Dict[str, Any]],
+    tipo_periodo: Optional[str],
+    tipo_demonstracao: Optional[str],
+    proventos_days: int,
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "ticker": ticker,
+        "indicadores": indicadores,
+        "itens_contabeis": itens,
+        "proventos": proventos,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+        "source_meta": {
+            "tipoPeriodo": tipo_periodo,
+            "tipoDemonstracao": tipo_demonstracao,
+            "proventosDays": int(proventos_days) if proventos_days else 0,
+        },
+    }
+
+    return {
+        "ticker": ticker,
+        "as_of_date": as_of,
+        "source": "fintz",
+        "payload": payload,
+    }
+
+
+def _run_pipeline(
+    sb: SupabaseRestClient,
+    fintz: FintzIntegration,
+    tickers: List[str],
+    *,
+    as_of: str,
+    tipo_periodo: Optional[str],
+    tipo_demonstracao: Optional[str],
+    proventos_days: int,
+    workers: int,
+    batch_size: int,
+    rpm: Optional[int],
+    resume: bool,
+    deduper: Optional[RawPayloadDeduper] = None,
+) -> int:
+    """Fan-out das chamadas por ticker num pool + upsert em lotes com checkpoint.
+
+    Retorna o número de linhas gravadas nesta execução. Levanta RuntimeError se algum
+    ticker ou lote falhar (o checkpoint preserva o que já foi gravado).
+    """
+    checkpoint = JobCheckpoint("sync_fundamentals_fintz", as_of)
+    if not resume:
+        checkpoint.clear()
+    pending = [t for t in tickers if t not in checkpoint.done]
+    if len(pending) < len(tickers):
+        print(f"[INFO] Checkpoint: {len(tickers) - len(pending)} ticker(s) já gravados hoje; retomando {len(pending)}")
+    if not pending:
+        checkpoint.clear()
+        return 0
+
+    if rpm is None:
+        rpm = get_rate_limit_per_minute("fintz")
+    limiter = TokenBucket(rpm) if rpm and rpm > 0 else None
+
+    def _limited(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if limiter is not None:
+            limiter.acquire()
+        return fn(*args, **kwargs)
+
+    start = None
+    if proventos_days and proventos_days > 0:
+        start = (date.fromisoformat(as_of) - timedelta(days=int(proventos_days))).isoformat()
+
+    parts_needed = 3 if start else 2
+    partial: Dict[str, Dict[str, Any]] = {t: {} for t in pending}
+    failed: Dict[str, str] = {}
+    done_count = 0
+
+    writer = BatchUpsertWriter(
+        sb,
+        "fundamentals_raw",
+        on_conflict="ticker,as_of_date,source",
+        batch_size=batch_size,
+        on_flush=lambda chunk: checkpoint.mark(r["ticker"] for r in chunk),
+    )
+    with writer, ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futures = {}
+        for ticker in pending:
+            futures[pool.submit(_limited, fintz.get_indicators_by_ticker, ticker)] = (ticker, "indicadores")
+            futures[
+                pool.submit(
+                    _limited,
+                    fintz.get_accounting_items_by_ticker,
+                    ticker,
+                    tipo_periodo=tipo_periodo,
+                    tipo_demonstracao=tipo_demonstracao,
+                )
+            ] = (ticker, "itens")
+            if start:
+                futures[
+                    pool.submit(_limited, fintz.get_proventos, ticker, data_inicio=start, data_fim=as_of)
+                ] = (ticker, "proventos")
+
+        for fut in as_completed(futures):
+            ticker, part = futures[fut]
+            if ticker in failed:
+                continue
+            try:
+                partial[ticker][part] = fut.result()
+            except Exception as e:
+                failed[ticker] = str(e)
+                partial.pop(ticker, None)
+                print(f"[ERRO] {ticker}: {part} falhou: {e}")
+                continue
+
+            parts = partial[ticker]
+            if len(parts) < parts_needed:
+                continue
+
+            rows = [
+                _build_row(
+                    ticker,
+                    as_of,
+                    indicadores=parts["indicadores"],
+                    itens=parts["itens"],
+                    proventos=parts.get("proventos") or [],
+                    tipo_periodo=tipo_periodo,
+                    tipo_demonstracao=tipo_demonstracao,
+                    proventos_days=proventos_days,
+                )
+            ]
+            if deduper is not None:
+                rows = deduper.prepare(rows)
+            if rows:
+                writer.put(rows)
+            else:
+                checkpoint.mark([ticker])
+            del partial[ticker]
+            done_count += 1
+            if done_count % 25 == 0 or done_count == len(pending):
+                print(f"[*] {done_count}/{len(pending)} ticker(s) buscados")
+
+    if failed or writer.errors:
+        raise RuntimeError(
+            f"{len(failed)} ticker(s) com erro na Fintz e {writer.rows_failed} linha(s) não gravadas; "
+            f"{writer.rows_written} gravadas. Rode novamente para retomar do checkpoint."
+        )
+
+    checkpoint.clear()
+    return writer.rows_written
+
+
 def main(
     *,
     tickers: Optional[List[str]] = None,
@@ -37,6 +212,12 @@ def main(
     tipo_periodo: Optional[str] = None,
     tipo_demonstracao: Optional[str] = None,
     proventos_days: int = 0,
+    pipeline: bool = False,
+    workers: int = 8,
+    batch_size: int = 50,
+    rpm: Optional[int] = None,
+    resume: bool = True,
+    dedupe: Optional[str] = "pointer",
 ) -> None:
     started_at = datetime.now(timezone.utc)
     sb = get_supabase_admin_client()
@@ -68,45 +249,59 @@ def main(
     rows_written = 0
 
     try:
-        for i, ticker in enumerate(tickers, start=1):
-            print(f"[*] {i}/{len(tickers)}: {ticker}")
-
-            indicadores = fintz.get_indicators_by_ticker(ticker)
-            itens = fintz.get_accounting_items_by_ticker(
-                ticker,
+        deduper = build_deduper(sb, source="fintz", as_of=as_of, tickers=tickers, mode=dedupe)
+
+        if pipeline:
+            rows_written = _run_pipeline(
+                sb,
+                fintz,
+                tickers,
+                as_of=as_of,
                 tipo_periodo=tipo_periodo,
                 tipo_demonstracao=tipo_demonstracao,
+                proventos_days=proventos_days,
+                workers=workers,
+                batch_size=batch_size,
+                rpm=rpm,
+                resume=resume,
+                deduper=deduper,
             )
-
-            proventos: List[Dict[str, Any]] = []
-            if proventos_days and proventos_days > 0:
-                start = (date.fromisoformat(as_of) - timedelta(days=int(proventos_days))).isoformat()
-                proventos = fintz.get_proventos(ticker, data_inicio=start, data_fim=as_of)
-
-            payload: Dict[str, Any] = {
-                "ticker": ticker,
-                "indicadores": indicadores,
-                "itens_contabeis": itens,
-                "proventos": proventos,
-                "fetched_at": datetime.now(timezone.utc).isoformat(),
-                "source_meta": {
-                    "tipoPeriodo": tipo_periodo,
-                    "tipoDemonstracao": tipo_demonstracao,
-                    "proventosDays": int(proventos_days) if proventos_days else 0,
-                },
-            }
-
-            row: Dict[str, Any] = {
-                "ticker": ticker,
-                "as_of_date": as_of,
-                "source": "fintz",
-                "payload": payload,
-            }
-
-            sb.upsert("fundamentals_raw", [row], on_conflict="ticker,as_of_date,source")
-            rows_written += 1
+        else:
+            for i, ticker in enumerate(tickers, start=1):
+                print(f"[*] {i}/{len(tickers)}: {ticker}")
+
+                indicadores = fintz.get_indicators_by_ticker(ticker)
+                itens = fintz.get_accounting_items_by_ticker(
+                    ticker,
+                    tipo_periodo=tipo_periodo,
+                    tipo_demonstracao=tipo_demonstracao,
+                )
+
+                proventos: List[Dict[str, Any]] = []
+                if proventos_days and proventos_days > 0:
+                    start = (date.fromisoformat(as_of) - timedelta(days=int(proventos_days))).isoformat()
+                    proventos = fintz.get_proventos(ticker, data_inicio=start, data_fim=as_of)
+
+                row = _build_row(
+                    ticker,
+                    as_of,
+                    indicadores=indicadores,
+                    itens=itens,
+                    proventos=proventos,
+                    tipo_periodo=tipo_periodo,
+                    tipo_demonstracao=tipo_demonstracao,
+                    proventos_days=proventos_days,
+                )
+
+                rows = deduper.prepare([row]) if deduper is not None else [row]
+                if not rows:
+                    continue
+                sb.upsert("fundamentals_raw", rows, on_conflict="ticker,as_of_date,source")
+                rows_written += 1
 
         print(f"✅ {rows_written} payload(s) de fundamentos salvos em fundamentals_raw para {as_of} (fintz)")
+        if deduper is not None:
+            print(f"[INFO] Dedupe: {deduper.summary()}")
 
     except Exception as e:
         status = "error"
@@ -152,6 +347,22 @@ if __name__ == "__main__":
         help="Se >0, busca proventos dos últimos N dias e salva junto no payload (opcional; default=0)",
     )
 
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Modo pipeline: chamadas concorrentes + upsert em lotes + checkpoint (recomendado para o universo todo)",
+    )
+    parser.add_argument("--workers", type=int, default=8, help="Workers do modo pipeline (default: 8)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Linhas por upsert no modo pipeline (default: 50)")
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="Limite de requests/min na Fintz (default: rateLimit da integração; 0 = sem limite)",
+    )
+    parser.add_argument("--no-resume", action="store_true", help="Ignora o checkpoint e reprocessa todos os tickers")
+    add_dedupe_args(parser)
+
     args = parser.parse_args()
 
     tickers_arg: Optional[List[str]] = None
@@ -164,4 +375,10 @@ if __name__ == "__main__":
         tipo_periodo=args.tipo_periodo,
         tipo_demonstracao=args.tipo_demonstracao,
         proventos_days=int(args.proventos_days or 0),
+        pipeline=bool(args.pipeline),
+        workers=int(args.workers),
+        batch_size=int(args.batch_size),
+        rpm=args.rpm,
+        resume=not bool(args.no_resume),
+        dedupe=args.dedupe,
     )
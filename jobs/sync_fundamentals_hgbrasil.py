@@ -6,7 +6,10 @@ Fonte:
 - HG Brasil Finance (stock_price)
 - Doc: https://hgbrasil.com/docs/finance/stocks
 
-Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`.
+Payloads iguais ao último gravado viram linha ponteiro (ver `jobs/fundamentals_raw_dedupe.py`).
+
+Requer (Supabase): executar `sql/007_add_fundamentals_raw.sql`
+(e `sql/017_add_fundamentals_raw_payload_hash.sql` para a deduplicação).
 """
 
 from __future__ import annotations
@@ -17,6 +20,7 @@ from typing import Any, Dict, List, Optional
 
 from integrations.hgbrasil_integration import HGBrasilIntegration
 from jobs.common import get_supabase_admin_client, list_active_tickers, log_job_run
+from jobs.fundamentals_raw_dedupe import add_dedupe_args, build_deduper
 
 
 def _first_env(*names: str) -> str:
@@ -52,6 +56,7 @@ def main(
     api_key: Optional[str] = None,
     include_dividends_v2: bool = False,
     dividends_days_ago: int = 365,
+    dedupe: Optional[str] = "pointer",
 ) -> None:
     started_at = datetime.now(timezone.utc)
     sb = get_supabase_admin_client()
@@ -100,6 +105,8 @@ def main(
     rows_written = 0
 
     try:
+        deduper = build_deduper(sb, source="hgbrasil", as_of=as_of, tickers=tickers, mode=dedupe)
+
         for i, ticker in enumerate(tickers, start=1):
             print(f"[*] {i}/{len(tickers)}: {ticker}")
             resp = hg.get_stock_price(ticker)
@@ -118,10 +125,15 @@ def main(
                 "source": "hgbrasil",
                 "payload": payload,
             }
-            sb.upsert("fundamentals_raw", [row], on_conflict="ticker,as_of_date,source")
+            rows = deduper.prepare([row]) if deduper is not None else [row]
+            if not rows:
+                continue
+            sb.upsert("fundamentals_raw", rows, on_conflict="ticker,as_of_date,source")
             rows_written += 1
 
         print(f"✅ {rows_written} payload(s) de fundamentos salvos em fundamentals_raw para {as_of} (hgbrasil)")
+        if deduper is not None:
+            print(f"[INFO] Dedupe: {deduper.summary()}")
 
     except Exception as e:
         status = "error"
@@ -161,6 +173,7 @@ if __name__ == "__main__":
         default=365,
         help="Usado com --include-dividends-v2. Busca proventos dos últimos N dias (default=365)",
     )
+    add_dedupe_args(parser)
 
     args = parser.parse_args()
 
@@ -173,4 +186,5 @@ if __name__ == "__main__":
         api_key=args.api_key,
         include_dividends_v2=bool(args.include_dividends_v2),
         dividends_days_ago=int(args.dividends_days_ago or 365),
+        dedupe=args.dedupe,
     )
@@ -0,0 +1,123 @@
+"""Job: Carga de preços históricos da B3 (COTAHIST) -> Supabase (tabela `precos`).
+
+Fonte oficial e gratuita: série histórica da B3 (ZIP anual/mensal/diário com registros
+fixos de 245 bytes). O arquivo é lido do disco em streaming, filtrado por BDI/mercado
+e pelos tickers de `ticker_mapping`, e gravado em lotes com `fonte='b3_cotahist'`.
+Nenhuma API paga é chamada.
+
+Uso:
+  python -m jobs.sync_precos_b3_cotahist --file data/b3/COTAHIST_A2024.ZIP
+  python -m jobs.sync_precos_b3_cotahist --file COTAHIST_D16102026.ZIP --bdi 02,12 --all-tickers
+
+Download manual: https://bvmf.bmfbovespa.com.br/InstDados/SerHist/COTAHIST_A2024.ZIP
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from integrations.b3_cotahist import DEFAULT_BDI_CODES, DEFAULT_MARKET_CODES, iter_cotahist_rows
+from jobs.common import BatchUpsertWriter, get_supabase_admin_client, log_job_run
+
+
+def _load_mapped_tickers(sb) -> List[str]:
+    rows = sb.select_all("ticker_mapping", "select=ticker&ativo=eq.true&order=ticker.asc")
+    tickers = [str(r.get("ticker") or "").strip().upper() for r in rows]
+    return [t for t in tickers if t]
+
+
+def main(
+    *,
+    file: str,
+    bdi_codes: Optional[List[str]] = None,
+    all_tickers: bool = False,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    batch_size: int = 1000,
+) -> None:
+    started_at = datetime.now(timezone.utc)
+    sb = get_supabase_admin_client()
+
+    path = Path(file)
+    status = "success"
+    message: Optional[str] = None
+    rows_written = 0
+
+    try:
+        if not path.exists():
+            raise FileNotFoundError(f"Arquivo COTAHIST não encontrado: {path}")
+
+        tickers: Optional[List[str]] = None
+        if not all_tickers:
+            tickers = _load_mapped_tickers(sb)
+            if not tickers:
+                print("[AVISO] ticker_mapping sem tickers ativos; nada a carregar (use --all-tickers).")
+                return
+            print(f"[INFO] Filtrando {len(tickers)} ticker(s) de ticker_mapping")
+
+        with BatchUpsertWriter(sb, "precos", on_conflict="ticker,data,fonte", batch_size=batch_size) as writer:
+            parsed = 0
+            for rows in iter_cotahist_rows(
+                path,
+                tickers=tickers,
+                bdi_codes=bdi_codes or DEFAULT_BDI_CODES,
+                market_codes=DEFAULT_MARKET_CODES,
+                start_date=start_date,
+                end_date=end_date,
+            ):
+                parsed += len(rows)
+                writer.put(rows)
+            print(f"[OK] {parsed} cotação(ões) extraídas de {path.name}")
+
+        rows_written = writer.rows_written
+        if writer.errors:
+            raise RuntimeError(f"{writer.rows_failed} linha(s) não gravadas: {writer.last_error}")
+
+        print(f"✅ {rows_written} preço(s) salvos em precos (fonte=b3_cotahist)")
+
+    except Exception as e:
+        status = "error"
+        message = str(e)
+        print(f"[ERRO] Falha na carga COTAHIST: {e}")
+        raise
+
+    finally:
+        finished_at = datetime.now(timezone.utc)
+        log_job_run(
+            sb,
+            job_name="sync_precos_b3_cotahist",
+            status=status,
+            rows_processed=rows_written,
+            message=message,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Carga de preços da série histórica B3 (COTAHIST) -> precos")
+    parser.add_argument("--file", type=str, required=True, help="ZIP (ou TXT) COTAHIST anual/mensal/diário")
+    parser.add_argument(
+        "--bdi",
+        type=str,
+        default=",".join(DEFAULT_BDI_CODES),
+        help="Códigos BDI separados por vírgula (default: 02 = lote padrão; 12 = FII)",
+    )
+    parser.add_argument("--all-tickers", action="store_true", help="Não filtrar por ticker_mapping")
+    parser.add_argument("--start", type=str, default=None, help="Data inicial YYYY-MM-DD (opcional)")
+    parser.add_argument("--end", type=str, default=None, help="Data final YYYY-MM-DD (opcional)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Linhas por upsert (default: 1000)")
+    args = parser.parse_args()
+
+    main(
+        file=args.file,
+        bdi_codes=[c.strip() for c in str(args.bdi).split(",") if c.strip()],
+        all_tickers=bool(args.all_tickers),
+        start_date=args.start,
+        end_date=args.end,
+        batch_size=int(args.batch_size),
+    )
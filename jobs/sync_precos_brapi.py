@@ -1,23 +1,43 @@
 """
 Job: Sincronizar Preços via Brapi → Supabase
 Busca cotações da API Brapi e salva na tabela `precos` do Supabase
+
+Modo padrão (concorrente):
+- Lotes de tickers buscados em paralelo (thread pool), cada provedor com seu
+  rate limiter (token bucket) a partir de `rateLimit.requestsPerMinute`
+  (web/admin_integrations.py).
+- Tickers que a Brapi não retornar caem para HG Brasil (stock_price) e depois
+  Fintz (cotações/histórico), se as chaves estiverem configuradas.
+- Upsert em background (fetch e escrita sobrepostos).
+
+Uso:
+  python -m jobs.sync_precos_brapi [--workers 4] [--batch-size 10] [--no-fallback] [--sequential]
+
+Env:
+  BRAPI_API_KEY, HGBRASIL_KEY (opcional), FINTZ_API_KEY (opcional)
 """
 
 from __future__ import annotations
 
 import sys
 from pathlib import Path
-from datetime import datetime, timezone, date
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone, date, timedelta
+from typing import List, Dict, Any, Optional
 
 # Adicionar diretório raiz ao path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from jobs.common import get_supabase_admin_client, log_job_run, load_universo_mvp_tickers
+from jobs.common import BatchUpsertWriter, get_supabase_admin_client, log_job_run, load_universo_mvp_tickers
 import os
 
 from integrations.brapi_integration import BrapiIntegration
+from integrations.fintz_integration import FintzIntegration
+from integrations.hgbrasil_integration import HGBrasilIntegration
+from integrations.http_utils import TokenBucket, get_response_cache
+from jobs.sync_precos_hgbrasil import _extract_hg_error, stock_price_to_row
+from web.admin_integrations import get_rate_limit_per_minute
 
 
 def list_active_tickers_from_mapping(sb) -> List[str]:
@@ -158,7 +178,172 @@ def sync_batch_to_supabase(
     return {'success': total_success, 'errors': total_errors}
 
 
-def main() -> None:
+def _fetch_brapi_batch(
+    brapi: BrapiIntegration,
+    limiter: TokenBucket,
+    batch: List[str],
+    data_sync: date,
+) -> List[Dict[str, Any]]:
+    """Busca 1 lote na Brapi (respeitando o limiter) e converte para linhas de `precos`."""
+    limiter.acquire()
+    response = brapi.get_quote(tickers=','.join(batch), fundamental=False, dividends=False)
+
+    rows: List[Dict[str, Any]] = []
+    for quote in (response or {}).get('results') or []:
+        ticker = quote.get('symbol')
+        if not ticker or quote.get('regularMarketPrice') is None:
+            continue
+        rows.append(convert_quote_to_supabase_row(ticker, quote, data_sync))
+    return rows
+
+
+def fintz_ohlc_to_rows(ticker: str, points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Converte o histórico OHLC da Fintz em linhas de `precos` (pontos inválidos são ignorados)."""
+    rows: List[Dict[str, Any]] = []
+    for point in points or []:
+        if not isinstance(point, dict):
+            continue
+        day = str(point.get('data') or point.get('date') or '').strip()[:10]
+        close = None
+        for key in ('precoFechamento', 'fechamento', 'close', 'preco_fechamento'):
+            if point.get(key) is not None:
+                close = point.get(key)
+                break
+        try:
+            fechamento = float(close)
+        except Exception:
+            continue
+        if not day or fechamento <= 0:
+            continue
+        rows.append({
+            'ticker': ticker,
+            'data': day,
+            'fechamento': fechamento,
+            'moeda': 'BRL',
+            'fonte': 'fintz',
+        })
+    return rows
+
+
+def _fintz_ohlc_to_row(ticker: str, points: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Último ponto válido do histórico OHLC da Fintz (preço mais recente)."""
+    rows = fintz_ohlc_to_rows(ticker, points)
+    return max(rows, key=lambda r: r['data']) if rows else None
+
+
+def sync_concurrent_to_supabase(
+    sb,
+    brapi: BrapiIntegration,
+    tickers: List[str],
+    data_sync: date,
+    *,
+    batch_size: int = 10,
+    workers: int = 4,
+    hg: Optional[HGBrasilIntegration] = None,
+    fintz: Optional[FintzIntegration] = None,
+) -> Dict[str, int]:
+    """
+    Versão concorrente de `sync_batch_to_supabase` (mesmo retorno).
+
+    - Brapi: lotes em paralelo, limitados por token bucket (rateLimit da integração)
+    - Fallback por ticker: HG Brasil -> Fintz (apenas para o que a Brapi não trouxe)
+    - Upsert em background via `BatchUpsertWriter`
+    """
+    limiters = {
+        name: TokenBucket(get_rate_limit_per_minute(name))
+        for name in ('brapi', 'hgbrasil', 'fintz')
+    }
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    found: set[str] = set()
+    by_source: Dict[str, int] = {}
+
+    def _collect(rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            found.add(row['ticker'])
+            by_source[row['fonte']] = by_source.get(row['fonte'], 0) + 1
+        writer.put(rows)
+
+    with BatchUpsertWriter(sb, "precos", on_conflict="ticker,data,fonte", batch_size=200) as writer:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {
+                pool.submit(_fetch_brapi_batch, brapi, limiters['brapi'], batch, data_sync): n
+                for n, batch in enumerate(batches, start=1)
+            }
+            for fut in as_completed(futures):
+                n = futures[fut]
+                try:
+                    rows = fut.result()
+                except Exception as e:
+                    print(f"[ERRO] Brapi batch {n}/{len(batches)}: {e}")
+                    continue
+                _collect(rows)
+                print(f"[OK] Brapi batch {n}/{len(batches)}: {len(rows)}/{len(batches[n - 1])}")
+
+            missing = [t for t in tickers if t not in found]
+
+            if missing and hg is not None:
+                print(f"\n[*] Fallback HG Brasil: {len(missing)} ticker(s)")
+                as_of = data_sync.isoformat()
+                blocked: list[str] = []
+
+                def _hg_one(ticker: str) -> Optional[Dict[str, Any]]:
+                    if blocked:
+                        return None
+                    limiters['hgbrasil'].acquire()
+                    resp = hg.get_stock_price(ticker)
+                    err = _extract_hg_error(resp)
+                    if err:
+                        # Erro de plano/chave: não adianta continuar.
+                        blocked.append(err)
+                        return None
+                    return stock_price_to_row(resp, ticker, as_of)
+
+                for fut in as_completed([pool.submit(_hg_one, t) for t in missing]):
+                    try:
+                        row = fut.result()
+                    except Exception:
+                        continue
+                    if row:
+                        _collect([row])
+                if blocked:
+                    print(f"[AVISO] HG Brasil indisponível: {blocked[0]}")
+                missing = [t for t in missing if t not in found]
+
+            if missing and fintz is not None:
+                print(f"\n[*] Fallback Fintz: {len(missing)} ticker(s)")
+                data_inicio = (data_sync - timedelta(days=7)).isoformat()
+
+                def _fintz_one(ticker: str) -> Optional[Dict[str, Any]]:
+                    limiters['fintz'].acquire()
+                    points = fintz.get_ohlc_history(ticker, data_inicio=data_inicio, data_fim=data_sync.isoformat())
+                    return _fintz_ohlc_to_row(ticker, points)
+
+                for fut in as_completed([pool.submit(_fintz_one, t) for t in missing]):
+                    try:
+                        row = fut.result()
+                    except Exception:
+                        continue
+                    if row:
+                        _collect([row])
+
+    if by_source:
+        print("[INFO] Por fonte: " + ", ".join(f"{k}={v}" for k, v in sorted(by_source.items())))
+    if writer.errors:
+        print(f"[ERRO] {writer.errors} lote(s) falharam no Supabase: {writer.last_error}")
+
+    return {
+        'success': writer.rows_written,
+        'errors': len(tickers) - len(found) + writer.rows_failed,
+    }
+
+
+def main(
+    *,
+    workers: int = 4,
+    batch_size: int = 10,
+    fallback: bool = True,
+    sequential: bool = False,
+) -> None:
     """Executa sincronização de preços Brapi -> Supabase"""
     print("=" * 70)
     print("SINCRONIZACAO BRAPI -> SUPABASE")
@@ -217,7 +402,25 @@ def main() -> None:
     rows_processed = 0
     
     try:
-        stats = sync_batch_to_supabase(sb, brapi, tickers, data_sync, batch_size=10)
+        if sequential:
+            stats = sync_batch_to_supabase(sb, brapi, tickers, data_sync, batch_size=batch_size)
+        else:
+            hg = fintz = None
+            if fallback:
+                hg_key = (os.getenv("HGBRASIL_KEY") or os.getenv("HG_BRASIL_KEY") or "").strip()
+                fintz_key = (os.getenv("FINTZ_API_KEY") or os.getenv("FINTZ_KEY") or "").strip()
+                hg = HGBrasilIntegration(api_key=hg_key) if hg_key else None
+                fintz = FintzIntegration(api_key=fintz_key) if fintz_key else None
+            stats = sync_concurrent_to_supabase(
+                sb,
+                brapi,
+                tickers,
+                data_sync,
+                batch_size=batch_size,
+                workers=workers,
+                hg=hg,
+                fintz=fintz,
+            )
         rows_processed = stats['success']
         
         # Relatório final
@@ -231,6 +434,11 @@ def main() -> None:
             taxa_sucesso = (stats['success'] / len(tickers)) * 100
             print(f"[INFO] Taxa de sucesso: {taxa_sucesso:.1f}%")
         
+        cache = get_response_cache()
+        if cache is not None:
+            cs = cache.stats()
+            print(f"[INFO] Cache HTTP: {cs['hits']} hit(s), {cs['misses']} miss(es)")
+        
         print("=" * 70)
         
         if stats['errors'] > 0:
@@ -259,4 +467,18 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync precos (Brapi + fallback HG/Fintz) -> Supabase")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BRAPI_WORKERS", "4")), help="Requests concorrentes (default: 4)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Tickers por request na Brapi (default: 10)")
+    parser.add_argument("--no-fallback", action="store_true", help="Não usar HG Brasil/Fintz para tickers faltantes")
+    parser.add_argument("--sequential", action="store_true", help="Modo antigo: lotes em sequência, só Brapi")
+    args = parser.parse_args()
+
+    main(
+        workers=int(args.workers),
+        batch_size=int(args.batch_size),
+        fallback=not bool(args.no_fallback),
+        sequential=bool(args.sequential),
+    )
@@ -6,22 +6,47 @@ Objetivo MVP:
 
 Uso:
   python -m jobs.sync_precos_hgbrasil
+  python -m jobs.sync_precos_hgbrasil --historical --start 2025-01-01 [--end 2025-12-31]
+
+Modo diário: 1 request multi-símbolo do v2/historical; se falhar, fallback para
+`stock_price` (1 request por ticker) em paralelo num event loop (httpx, `--workers`
+requests em voo dentro do rateLimit da HG Brasil).
+
+Modo histórico (`--historical`):
+- Agrupa o universo em requests multi-símbolo do v2/historical (limitados por
+  `--max-symbols` do plano e pelo tamanho da URL) e divide o período em janelas de
+  `--window-days` dias.
+- Os pares (grupo, janela) rodam em paralelo dentro do rateLimit da HG Brasil e as
+  séries vão direto para upserts em lote em `precos`.
+- Se um grupo for recusado, ele é dividido ao meio e reenviado; um símbolo isolado que
+  ainda falha (ticker desconhecido/deslistado) conta só como falha daquele símbolo.
+- Erros de chave/plano/cota interrompem o modo: os requests restantes não são enviados,
+  são contados como não consultados e o job termina com erro.
 
 Env:
   HGBRASIL_KEY (obrigatório)
   UNIVERSE_MVP_PATH (opcional; default=data/universo_mvp.csv)
+  HGBRASIL_MAX_SYMBOLS (opcional; símbolos por request no modo histórico, default=20)
 """
 
 from __future__ import annotations
 
 import os
-from datetime import date, datetime, timezone
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
+from urllib.parse import quote
 
 from dotenv import load_dotenv
 
 from integrations.hgbrasil_integration import HGBrasilIntegration
-from jobs.common import get_supabase_admin_client, load_universo_mvp_tickers, log_job_run
+from integrations.http_utils import TokenBucket, gather_bounded
+from jobs.common import BatchUpsertWriter, get_supabase_admin_client, load_universo_mvp_tickers, log_job_run
+from web.admin_integrations import get_rate_limit_per_minute
+
+# Margem segura para querystring (proxies/CDNs costumam cortar em ~2-8 KB).
+MAX_URL_LENGTH = 2000
 
 
 def _first_env(*names: str) -> str:
@@ -59,68 +84,320 @@ def _extract_hg_error(resp: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def _parse_historical_prices(resp: Dict[str, Any], as_of: str) -> list[Dict[str, Any]]:
-    """Tenta extrair preços diários do payload do endpoint v2/historical.
+# Trechos das mensagens de erro da HG que indicam chave/plano/cota (valem para todo request).
+_BLOCKING_ERROR_HINTS = ("key", "chave", "plan", "plano", "limit", "limite", "quota", "cota", "permiss")
 
-    Como a estrutura pode variar por plano/versão, este parser é tolerante.
+
+class HGBrasilBlockedError(RuntimeError):
+    """Erro de chave/plano/cota da HG Brasil.
+
+    `fatal=True` (chave inválida) vale para qualquer request; senão, num grupo de vários
+    símbolos a mensagem pode ser só o limite de símbolos do plano e o grupo é dividido.
     """
-    out: list[Dict[str, Any]] = []
+
+    def __init__(self, message: str, *, fatal: bool = False) -> None:
+        super().__init__(message)
+        self.fatal = fatal
+
+
+def _extract_hg_block(resp: Dict[str, Any]) -> Optional[HGBrasilBlockedError]:
+    """Erro de chave/plano/cota (não de um símbolo específico), se houver."""
+    if resp.get("valid_key") is False:
+        return HGBrasilBlockedError("HG Brasil: chave inválida (valid_key=false)", fatal=True)
+    err = _extract_hg_error(resp)
+    if err and any(hint in err.lower() for hint in _BLOCKING_ERROR_HINTS):
+        return HGBrasilBlockedError(err)
+    return None
+
+
+def stock_price_to_row(resp: Dict[str, Any], ticker: str, as_of: str) -> Optional[Dict[str, Any]]:
+    """Converte a resposta de `stock_price` em linha da tabela `precos` (ou None)."""
+    payload = _extract_symbol_payload(resp, ticker)
+    if not payload:
+        return None
+
+    try:
+        fechamento = float(payload.get("price"))
+    except Exception:
+        return None
+
+    if fechamento <= 0:
+        return None
+
+    volume = payload.get("volume")
+    change_percent = payload.get("change_percent")
+
+    return {
+        "ticker": ticker,
+        "data": as_of,
+        "fechamento": fechamento,
+        "volume": int(volume) if volume not in (None, "") else None,
+        "variacao_percentual": float(change_percent) if change_percent not in (None, "") else None,
+        "moeda": "BRL",
+        "fonte": "hgbrasil",
+    }
+
+
+async def fetch_stock_prices_async(
+    hg: HGBrasilIntegration,
+    tickers: List[str],
+    as_of: str,
+    *,
+    concurrency: int = 4,
+    limiter: Optional[TokenBucket] = None,
+) -> List[Dict[str, Any]]:
+    """Fallback `stock_price`: 1 request por ticker, com até `concurrency` em voo.
+
+    O 1o ticker vai sozinho: se o plano/chave não permite, falha com 1 request só.
+    Qualquer erro (HTTP ou `error=true` da HG) interrompe, como no loop síncrono.
+    """
+    try:
+        responses = await gather_bounded([lambda: hg.get_stock_price_async(tickers[0])], limiter=limiter)
+        if not isinstance(responses[0], Exception) and not _extract_hg_error(responses[0]):
+            responses += await gather_bounded(
+                [lambda t=t: hg.get_stock_price_async(t) for t in tickers[1:]],
+                limit=concurrency,
+                limiter=limiter,
+            )
+    finally:
+        await hg.aclose()
+
+    rows: List[Dict[str, Any]] = []
+    for ticker, resp in zip(tickers, responses):
+        if isinstance(resp, Exception):
+            raise RuntimeError(f"{ticker}: {resp}") from resp
+        err = _extract_hg_error(resp)
+        if err:
+            # Se o plano não permite, não adianta continuar.
+            raise RuntimeError(err)
+        row = stock_price_to_row(resp, ticker, as_of)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def _series_point_to_row(symbol: str, point: Any, default_day: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not isinstance(point, dict):
+        return None
+
+    # Campo de data pode vir como date/time/period.
+    day = str(point.get("date") or point.get("day") or point.get("time") or "").strip()
+    if day and "T" in day:
+        day = day.split("T")[0]
+    if not day:
+        day = default_day or ""
+    if not day:
+        return None
+
+    # Campo de preço pode variar.
+    price_value = point.get("close")
+    if price_value is None:
+        price_value = point.get("price")
+    if price_value is None:
+        price_value = point.get("value")
+
+    try:
+        close = float(price_value)
+    except Exception:
+        return None
+
+    if close <= 0:
+        return None
+
+    return {
+        "ticker": symbol,
+        "data": day,
+        "fechamento": close,
+        "moeda": "BRL",
+        "fonte": "hgbrasil",
+    }
+
+
+def _iter_historical_series(resp: Dict[str, Any]):
     results = resp.get("results")
     if not isinstance(results, list):
-        return out
+        return
 
     for r in results:
         if not isinstance(r, dict):
             continue
         symbol = str(r.get("symbol") or r.get("ticker") or "").strip().upper()
+        if symbol.startswith("B3:"):
+            symbol = symbol[3:]
         if not symbol:
             continue
 
         series = r.get("series")
         if not isinstance(series, list) or not series:
             continue
+        yield symbol, series
 
-        # Pegar o último ponto da série.
-        last = series[-1]
-        if not isinstance(last, dict):
-            continue
 
-        # Campo de data pode vir como date/time/period.
-        day = str(last.get("date") or last.get("day") or last.get("time") or "").strip()
-        if day and "T" in day:
-            day = day.split("T")[0]
-        if not day:
-            day = as_of
+def parse_historical_series(resp: Dict[str, Any]) -> list[Dict[str, Any]]:
+    """Extrai TODOS os pontos diários do payload do v2/historical (linhas de `precos`).
 
-        # Campo de preço pode variar.
-        price_value = last.get("close")
-        if price_value is None:
-            price_value = last.get("price")
-        if price_value is None:
-            price_value = last.get("value")
+    Pontos sem data são ignorados (não há como posicioná-los na série).
+    """
+    out: list[Dict[str, Any]] = []
+    for symbol, series in _iter_historical_series(resp):
+        for point in series:
+            row = _series_point_to_row(symbol, point, None)
+            if row:
+                out.append(row)
+    return out
 
-        try:
-            close = float(price_value)
-        except Exception:
-            continue
 
-        if close <= 0:
-            continue
+def _parse_historical_prices(resp: Dict[str, Any], as_of: str) -> list[Dict[str, Any]]:
+    """Tenta extrair preços diários do payload do endpoint v2/historical.
+
+    Como a estrutura pode variar por plano/versão, este parser é tolerante.
+    Usa apenas o último ponto de cada série (preço do dia).
+    """
+    out: list[Dict[str, Any]] = []
+    for symbol, series in _iter_historical_series(resp):
+        row = _series_point_to_row(symbol, series[-1], as_of)
+        if row:
+            out.append(row)
+    return out
 
-        out.append(
-            {
-                "ticker": symbol,
-                "data": day,
-                "fechamento": close,
-                "moeda": "BRL",
-                "fonte": "hgbrasil",
-            }
-        )
 
+def chunk_symbols(
+    tickers: List[str],
+    *,
+    max_symbols: int,
+    max_url_length: int = MAX_URL_LENGTH,
+    base_length: int = 200,
+) -> List[List[str]]:
+    """Agrupa tickers em listas de `symbols` (B3:XXXX) respeitando limite do plano e da URL.
+
+    `base_length` reserva espaço para o resto da URL (host, path, key, datas).
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = base_length
+    for t in tickers:
+        piece = len(quote(f"B3:{t},", safe=""))
+        if current and (len(current) >= max_symbols or size + piece > max_url_length):
+            chunks.append(current)
+            current, size = [], base_length
+        current.append(t)
+        size += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def date_windows(start: date, end: date, window_days: int) -> List[tuple[date, date]]:
+    """Divide [start, end] em janelas de até `window_days` dias (inclusive)."""
+    out: List[tuple[date, date]] = []
+    step = max(1, int(window_days))
+    d = start
+    while d <= end:
+        w_end = min(end, d + timedelta(days=step - 1))
+        out.append((d, w_end))
+        d = w_end + timedelta(days=1)
     return out
 
 
-def main(*, tickers: Optional[List[str]] = None, api_key: Optional[str] = None) -> None:
+def sync_historical(
+    sb,
+    hg: HGBrasilIntegration,
+    tickers: List[str],
+    *,
+    start: date,
+    end: date,
+    window_days: int = 30,
+    max_symbols: int = 20,
+    workers: int = 4,
+) -> Dict[str, int]:
+    """Modo histórico: requests multi-símbolo x janelas de datas, concorrentes, com upsert em lote."""
+    limiter = TokenBucket(get_rate_limit_per_minute("hgbrasil"))
+    windows = date_windows(start, end, window_days)
+    tasks = [(chunk, w) for w in windows for chunk in chunk_symbols(tickers, max_symbols=max_symbols)]
+    print(f"[INFO] {len(tasks)} request(s): {len(windows)} janela(s) x grupos de até {max_symbols} símbolo(s)")
+
+    blocked: List[str] = []
+    lock = threading.Lock()
+    stats = {"requests": 0, "points": 0, "splits": 0, "failed_symbols": 0, "skipped_symbols": 0}
+
+    def _run(chunk: List[str], window: tuple[date, date]) -> tuple[List[str], tuple[date, date], Any]:
+        if blocked:
+            return chunk, window, None
+        limiter.acquire()
+        resp = hg.get_historical_v2(
+            symbols=",".join(f"B3:{t}" for t in chunk),
+            sample_by="1d",
+            start_date=window[0].isoformat(),
+            end_date=window[1].isoformat(),
+        )
+        with lock:
+            stats["requests"] += 1
+        block = _extract_hg_block(resp)
+        if block:
+            raise block
+        err = _extract_hg_error(resp)
+        if err:
+            raise RuntimeError(err)
+        return chunk, window, resp
+
+    with BatchUpsertWriter(sb, "precos", on_conflict="ticker,data,fonte", batch_size=1000) as writer:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            pending = {pool.submit(_run, c, w): (c, w) for c, w in tasks}
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    chunk, window = pending.pop(fut)
+                    try:
+                        _, _, resp = fut.result()
+                    except Exception as e:
+                        if isinstance(e, HGBrasilBlockedError) and (len(chunk) == 1 or e.fatal):
+                            # Chave/plano/cota: os requests que faltam também seriam recusados.
+                            stats["skipped_symbols"] += len(chunk)
+                            if not blocked:
+                                blocked.append(str(e))
+                        elif len(chunk) > 1 and not blocked:
+                            # Grupo recusado (símbolo inválido, limite de símbolos/URL?): divide e reenvia.
+                            half = len(chunk) // 2
+                            stats["splits"] += 1
+                            for part in (chunk[:half], chunk[half:]):
+                                pending[pool.submit(_run, part, window)] = (part, window)
+                        else:
+                            stats["failed_symbols"] += len(chunk)
+                            print(f"[ERRO] v2/historical {','.join(chunk)} {window[0]}..{window[1]}: {e}")
+                        continue
+                    if resp is None:
+                        stats["skipped_symbols"] += len(chunk)
+                        continue
+                    rows = parse_historical_series(resp)
+                    stats["points"] += len(rows)
+                    writer.put(rows)
+
+    if blocked:
+        print(
+            f"[AVISO] HG Brasil recusou a chave/plano; modo histórico interrompido "
+            f"({stats['skipped_symbols']} símbolo(s)/janela não consultados): {blocked[0]}"
+        )
+    return {
+        "rows_written": writer.rows_written,
+        "rows_failed": writer.rows_failed,
+        "requests": stats["requests"],
+        "splits": stats["splits"],
+        "failed_symbols": stats["failed_symbols"],
+        "skipped_symbols": stats["skipped_symbols"],
+    }
+
+
+def main(
+    *,
+    tickers: Optional[List[str]] = None,
+    api_key: Optional[str] = None,
+    historical: bool = False,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    window_days: int = 30,
+    max_symbols: Optional[int] = None,
+    workers: int = 4,
+) -> None:
     # Carregar .env.local (mesmo padrão dos jobs do projeto)
     load_dotenv(dotenv_path=".env.local", override=False)
 
@@ -151,6 +428,34 @@ def main(*, tickers: Optional[List[str]] = None, api_key: Optional[str] = None)
     rows_written = 0
 
     try:
+        if historical:
+            end_d = date.fromisoformat(end) if end else date.today()
+            start_d = date.fromisoformat(start) if start else end_d - timedelta(days=30)
+            if max_symbols is None:
+                max_symbols = int(_first_env("HGBRASIL_MAX_SYMBOLS") or 20)
+            result = sync_historical(
+                sb,
+                hg,
+                tickers,
+                start=start_d,
+                end=end_d,
+                window_days=window_days,
+                max_symbols=max_symbols,
+                workers=workers,
+            )
+            rows_written = result["rows_written"]
+            print(
+                f"✅ {rows_written} preço(s) históricos salvos em precos ({start_d}..{end_d}, fonte=hgbrasil) "
+                f"em {result['requests']} request(s)"
+            )
+            if result["rows_failed"] or result["failed_symbols"] or result["skipped_symbols"]:
+                raise RuntimeError(
+                    f"{result['failed_symbols']} símbolo(s)/janela com erro na HG, "
+                    f"{result['skipped_symbols']} não consultados e "
+                    f"{result['rows_failed']} linha(s) não gravadas"
+                )
+            return
+
         rows: List[Dict[str, Any]] = []
 
         # 1) Tentativa barata: 1 chamada para vários símbolos (v2/historical)
@@ -168,41 +473,20 @@ def main(*, tickers: Optional[List[str]] = None, api_key: Optional[str] = None)
         except Exception as e:
             print(f"[AVISO] v2/historical falhou; fallback para stock_price. Motivo: {e}")
 
-        # 2) Fallback: 1 chamada por ticker
+        # 2) Fallback: 1 chamada por ticker, concorrentes num event loop
         if not rows:
-            for i, ticker in enumerate(tickers, start=1):
-                print(f"[*] {i}/{len(tickers)}: {ticker}")
-                resp = hg.get_stock_price(ticker)
-                err = _extract_hg_error(resp)
-                if err:
-                    # Se o plano não permite, não adianta continuar iterando.
-                    raise RuntimeError(err)
-                payload = _extract_symbol_payload(resp, ticker)
-                if not payload:
-                    continue
-
-                price = payload.get("price")
-                try:
-                    fechamento = float(price)
-                except Exception:
-                    continue
-
-                if fechamento <= 0:
-                    continue
-
-                volume = payload.get("volume")
-                change_percent = payload.get("change_percent")
-
-                row: Dict[str, Any] = {
-                    "ticker": ticker,
-                    "data": as_of,
-                    "fechamento": fechamento,
-                    "volume": int(volume) if volume not in (None, "") else None,
-                    "variacao_percentual": float(change_percent) if change_percent not in (None, "") else None,
-                    "moeda": "BRL",
-                    "fonte": "hgbrasil",
-                }
-                rows.append(row)
+            import asyncio
+
+            print(f"[*] stock_price para {len(tickers)} ticker(s) ({workers} em paralelo)...")
+            rows = asyncio.run(
+                fetch_stock_prices_async(
+                    hg,
+                    tickers,
+                    as_of,
+                    concurrency=workers,
+                    limiter=TokenBucket(get_rate_limit_per_minute("hgbrasil")),
+                )
+            )
 
         if rows:
             sb.upsert("precos", rows, on_conflict="ticker,data,fonte")
@@ -235,4 +519,29 @@ def main(*, tickers: Optional[List[str]] = None, api_key: Optional[str] = None)
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync precos via HG Brasil -> Supabase")
+    parser.add_argument("--tickers", type=str, default=None, help="Tickers separados por vírgula (default: universo MVP)")
+    parser.add_argument("--historical", action="store_true", help="Modo histórico (v2/historical multi-símbolo)")
+    parser.add_argument("--start", type=str, default=None, help="Data inicial YYYY-MM-DD (default: end - 30 dias)")
+    parser.add_argument("--end", type=str, default=None, help="Data final YYYY-MM-DD (default: hoje)")
+    parser.add_argument("--window-days", type=int, default=30, help="Dias por request no modo histórico (default: 30)")
+    parser.add_argument(
+        "--max-symbols",
+        type=int,
+        default=None,
+        help="Símbolos por request no modo histórico (default: env HGBRASIL_MAX_SYMBOLS ou 20)",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Requests concorrentes (histórico e fallback stock_price; default: 4)")
+    args = parser.parse_args()
+
+    main(
+        tickers=[t for t in str(args.tickers).split(",") if t.strip()] if args.tickers else None,
+        historical=bool(args.historical),
+        start=args.start,
+        end=args.end,
+        window_days=int(args.window_days),
+        max_symbols=args.max_symbols,
+        workers=int(args.workers),
+    )
@@ -0,0 +1,141 @@
+"""Telemetria de performance por execução de job (gravada em `job_runs.metrics`).
+
+O que é medido:
+- fases: `with phase("download_dfp"): ...` acumula segundos/chamadas por nome;
+- HTTP (por host): requests, erros, retries (urllib3/httpx), 429, bytes e histograma de
+  latência — via hook nas sessões de `SupabaseRestClient` e `http_utils.build_retry_session`;
+- pico de RSS do processo e linhas/s.
+
+`log_job_run()` chama `collect()` + `print_summary()` no fim de cada job, então os jobs só
+precisam marcar as fases que interessam. Os números HTTP são a diferença entre o início e o
+fim da telemetria do job: num processo com vários jobs em paralelo (`jobs/orchestrator.py`)
+eles incluem as requests dos jobs concorrentes; o total do pipeline fica no job_run do
+orquestrador.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from integrations.http_utils import LATENCY_BUCKETS_MS, diff_http_stats, get_http_stats
+
+
+class JobTelemetry:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.http_baseline = get_http_stats().snapshot()
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            p = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            p["seconds"] += seconds
+            p["calls"] += 1
+
+
+_LOCAL = threading.local()
+_PROCESS = JobTelemetry()
+
+
+def current() -> JobTelemetry:
+    """Telemetria da thread (ver `begin`) ou a do processo (jobs rodando via `python -m`)."""
+    return getattr(_LOCAL, "telemetry", None) or _PROCESS
+
+
+def begin() -> JobTelemetry:
+    """Inicia uma telemetria nova para a thread atual (1 por etapa no orquestrador)."""
+    _LOCAL.telemetry = JobTelemetry()
+    return _LOCAL.telemetry
+
+
+def reset() -> None:
+    """Recomeça a telemetria corrente (chamado após gravar o job_run)."""
+    global _PROCESS
+    if getattr(_LOCAL, "telemetry", None) is not None:
+        _LOCAL.telemetry = JobTelemetry()
+    else:
+        _PROCESS = JobTelemetry()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Cronometra um trecho do job (acumula se o mesmo nome se repetir)."""
+    telemetry = current()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        telemetry.add_phase(name, time.perf_counter() - t0)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo (MB); None se indisponível na plataforma."""
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB; macOS, bytes.
+        return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+    except ImportError:
+        pass
+    try:  # Windows: psutil é opcional
+        import psutil
+
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def collect(rows_processed: Optional[int] = None, telemetry: Optional[JobTelemetry] = None) -> Dict[str, Any]:
+    """Métricas do job até agora (JSON-serializável)."""
+    telemetry = telemetry or current()
+    duration = time.perf_counter() - telemetry.started
+    http = diff_http_stats(get_http_stats().snapshot(), telemetry.http_baseline)
+    labels = [f"<={le}" for le in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+    for h in http.values():
+        h["latency_ms_avg"] = round(h["latency_ms_total"] / h["requests"], 1) if h["requests"] else None
+        h["latency_ms_max"] = round(h["latency_ms_max"], 1)
+        h["latency_ms_hist"] = {label: n for label, n in zip(labels, h.pop("latency_hist")) if n}
+        h.pop("latency_ms_total", None)
+    return {
+        "duration_s": round(duration, 3),
+        "rows_per_s": round(rows_processed / duration, 2) if rows_processed and duration > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": {
+            name: {"seconds": round(p["seconds"], 3), "calls": int(p["calls"])}
+            for name, p in telemetry.phases.items()
+        },
+        "http": http,
+    }
+
+
+def format_summary(job_name: str, metrics: Dict[str, Any]) -> str:
+    lines = [
+        f"[INFO] Telemetria {job_name}: {metrics.get('duration_s')}s"
+        f" | pico RSS {metrics.get('peak_rss_mb') or '-'} MB"
+        f" | {metrics.get('rows_per_s') or '-'} linhas/s"
+    ]
+    phases = metrics.get("phases") or {}
+    if phases:
+        lines.append(f"  {'fase':32s} {'seg':>9s} {'chamadas':>9s}")
+        for name, p in sorted(phases.items(), key=lambda kv: -kv[1]["seconds"]):
+            lines.append(f"  {name[:32]:32s} {p['seconds']:9.2f} {p['calls']:9d}")
+    http = metrics.get("http") or {}
+    if http:
+        lines.append(f"  {'host':32s} {'req':>6s} {'erro':>5s} {'retry':>5s} {'429':>5s} {'KB in':>9s} {'ms méd':>7s} {'ms máx':>8s}")
+        for host, h in sorted(http.items(), key=lambda kv: -kv[1]["requests"]):
+            lines.append(
+                f"  {host[:32]:32s} {h['requests']:6d} {h['errors']:5d} {h['retries']:5d} {h['status_429']:5d}"
+                f" {h['bytes_in'] / 1024:9.1f} {h['latency_ms_avg'] or 0:7.1f} {h['latency_ms_max']:8.1f}"
+            )
+    return "\n".join(lines)
+
+
+def print_summary(job_name: str, metrics: Dict[str, Any]) -> None:
+    print(format_summary(job_name, metrics))
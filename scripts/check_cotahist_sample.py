@@ -0,0 +1,102 @@
+"""Checagem do leitor COTAHIST (`integrations.b3_cotahist`) com o arquivo de amostra.
+
+Lê `data/samples/COTAHIST_SAMPLE.TXT` com vários `chunk_records` (inclusive 1, em que o
+bloco cabe na primeira leitura) e em variantes do mesmo conteúdo — terminador LF, sem
+terminador, dentro de um ZIP — e confere que todas produzem exatamente as mesmas linhas.
+
+Uso:
+  python scripts/check_cotahist_sample.py
+  python scripts/check_cotahist_sample.py --file caminho/COTAHIST_A2024.ZIP --chunks 1,7,5000
+
+Sai com código 1 se alguma combinação divergir da leitura de referência (`chunk_records` padrão).
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from integrations.b3_cotahist import iter_cotahist_rows  # noqa: E402
+
+SAMPLE_PATH = ROOT_DIR / "data" / "samples" / "COTAHIST_SAMPLE.TXT"
+DEFAULT_CHUNKS = (1, 2, 3, 7)
+
+
+def _read_all(path: Path, chunk_records: Optional[int] = None) -> List[Tuple[str, str, float]]:
+    kwargs = {} if chunk_records is None else {"chunk_records": chunk_records}
+    rows: List[Tuple[str, str, float]] = []
+    for batch in iter_cotahist_rows(path, **kwargs):
+        rows.extend((r["ticker"], r["data"], r["fechamento"]) for r in batch)
+    return rows
+
+
+def _variants(path: Path, workdir: Path) -> Dict[str, Path]:
+    """Mesmo conteúdo com terminadores diferentes (só para arquivos TXT)."""
+    out = {"original": path}
+    if zipfile.is_zipfile(path):
+        return out
+    raw = path.read_bytes()
+    records = [r for r in raw.replace(b"\r\n", b"\n").split(b"\n") if r]
+    for name, data in (
+        ("lf", b"\n".join(records) + b"\n"),
+        ("lf_sem_final", b"\n".join(records)),
+        ("sem_terminador", b"".join(records)),
+    ):
+        target = workdir / f"{name}.TXT"
+        target.write_bytes(data)
+        out[name] = target
+    zipped = workdir / "amostra.zip"
+    with zipfile.ZipFile(zipped, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr(path.name, raw)
+    out["zip"] = zipped
+    return out
+
+
+def main(*, path: Path = SAMPLE_PATH, chunks: Tuple[int, ...] = DEFAULT_CHUNKS) -> int:
+    if not path.exists():
+        print(f"[ERRO] Arquivo não encontrado: {path}")
+        return 2
+
+    expected = _read_all(path)
+    if not expected:
+        print(f"[ERRO] Nenhuma linha lida de {path} (leitura de referência)")
+        return 1
+    print(f"[INFO] {path.name}: {len(expected)} linha(s) na leitura de referência")
+
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, variant in _variants(path, Path(tmp)).items():
+            for n in chunks:
+                got = _read_all(variant, n)
+                status = "ok" if got == expected else "DIVERGE"
+                print(f"  {name:16s} chunk_records={n:<8d} {len(got):6d} linha(s)  {status}")
+                if got != expected:
+                    problems.append(f"{name} com chunk_records={n}: {len(got)} linha(s), esperado {len(expected)}")
+
+    if problems:
+        for p in problems:
+            print(f"[ERRO] {p}")
+        return 1
+    print("✅ Leitor COTAHIST consistente para todos os tamanhos de bloco")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere o leitor COTAHIST com vários tamanhos de bloco")
+    parser.add_argument("--file", type=Path, default=SAMPLE_PATH, help="TXT/ZIP COTAHIST (default: amostra)")
+    parser.add_argument(
+        "--chunks",
+        type=str,
+        default=",".join(str(n) for n in DEFAULT_CHUNKS),
+        help="Valores de chunk_records separados por vírgula (default: 1,2,3,7)",
+    )
+    args = parser.parse_args()
+
+    sys.exit(main(path=args.file, chunks=tuple(int(n) for n in args.chunks.split(",") if n.strip())))
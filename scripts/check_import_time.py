@@ -0,0 +1,158 @@
+"""Auditoria do tempo de importação dos entry points (`python -X importtime`).
+
+Para cada módulo, roda `python -X importtime -c "import <módulo>"` num processo limpo e:
+- falha se o módulo carregar dependências proibidas na importação (ex.: `pandas` em
+  `integrations.cvm_integration`, `database.models` em `web.home_server`) — checagem
+  determinística, independe da máquina;
+- compara o tempo cumulativo (melhor de `--repeat`) com `benchmarks/import_time.json`.
+
+Uso:
+  python scripts/check_import_time.py                   # compara com a baseline
+  python scripts/check_import_time.py --save-baseline   # grava a nova referência
+  python scripts/check_import_time.py --modules jobs.common,web.home_server --repeat 5
+
+Sai com código 1 em import proibido ou se algum módulo ficar mais lento que a baseline
+× (1 + `--tolerance`) + `--slack-ms`. A baseline é dependente de máquina: regrave-a ao
+trocar o runner.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+BASELINE_PATH = ROOT_DIR / "benchmarks" / "import_time.json"
+
+# Módulo -> dependências que NÃO podem ser carregadas só por importá-lo.
+CHECKS: Dict[str, Tuple[str, ...]] = {
+    "jobs.common": ("pandas", "requests", "dotenv", "asyncio"),
+    "jobs.telemetry": ("pandas", "requests"),
+    "jobs.orchestrator": ("pandas", "requests", "dotenv"),
+    "integrations.http_utils": ("requests", "urllib3", "asyncio", "httpx"),
+    "integrations.cvm_integration": ("pandas", "requests"),
+    "integrations.master_integrator": ("pandas",),
+    "jobs.reconcile_precos": ("pandas",),
+    "web.home_server": ("pandas", "requests", "database.models", "web.admin_integrations", "web.companies"),
+}
+
+
+def measure(module: str) -> Tuple[float, Set[str]]:
+    """(ms cumulativos do import, módulos carregados) num interpretador novo."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = (proc.stderr or "").strip().splitlines()[-1:] or ["?"]
+        raise RuntimeError(f"falha ao importar {module}: {tail[0]}")
+
+    cumulative_us: Optional[int] = None
+    loaded: Set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # cabeçalho
+        name = parts[2].strip()
+        loaded.add(name)
+        if name == module and parts[2].startswith(" ") and not parts[2][1:].startswith(" "):
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"{module}: linha de importtime não encontrada")
+    return cumulative_us / 1000.0, loaded
+
+
+def _forbidden(loaded: Set[str], names: Tuple[str, ...]) -> List[str]:
+    return [n for n in names if n in loaded]
+
+
+def main(
+    *,
+    modules: Optional[List[str]] = None,
+    repeat: int = 3,
+    baseline_path: Path = BASELINE_PATH,
+    save_baseline: bool = False,
+    tolerance: float = 0.5,
+    slack_ms: float = 20.0,
+) -> int:
+    selected = modules or list(CHECKS)
+    unknown = set(selected) - set(CHECKS)
+    if unknown:
+        print(f"[ERRO] Módulos sem regra em CHECKS: {', '.join(sorted(unknown))}")
+        return 2
+
+    problems: List[str] = []
+    results: Dict[str, float] = {}
+    print(f"  {'módulo':34s} {'ms':>8s}  imports proibidos")
+    for module in selected:
+        try:
+            runs = [measure(module) for _ in range(max(1, repeat))]
+        except RuntimeError as e:
+            print(f"[ERRO] {e}")
+            return 2
+        results[module] = round(min(ms for ms, _ in runs), 1)
+        bad = _forbidden(runs[0][1], CHECKS[module])
+        print(f"  {module:34s} {results[module]:8.1f}  {', '.join(bad) or '-'}")
+        if bad:
+            problems.append(f"{module} importa {', '.join(bad)} na carga (mova para dentro da função)")
+
+    if save_baseline:
+        if problems:
+            for p in problems:
+                print(f"[ERRO] {p}")
+            print("[ERRO] Baseline não gravada: corrija os imports proibidos antes.")
+            return 1
+        report = {"env": {"python": platform.python_version(), "machine": platform.machine()}, "modules": results}
+        baseline_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"✅ Baseline gravada em {baseline_path}")
+        return 0
+
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        for module, ms in results.items():
+            ref = (baseline.get("modules") or {}).get(module)
+            if ref is None:
+                continue
+            ceiling = ref * (1.0 + tolerance) + slack_ms
+            if ms > ceiling:
+                problems.append(f"{module}: {ms:.1f} ms > {ceiling:.1f} ms (baseline {ref:.1f})")
+    else:
+        print(f"[AVISO] Sem baseline em {baseline_path}; só os imports proibidos foram checados.")
+
+    if problems:
+        for p in problems:
+            print(f"[ERRO] Regressão: {p}")
+        return 1
+    print(f"✅ Sem regressões de importação (tolerância {tolerance:.0%} + {slack_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audita o tempo de importação dos jobs e servidores web")
+    parser.add_argument("--modules", type=str, default=None, help="Módulos (separados por vírgula)")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por módulo (vale a melhor)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como nova baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Aumento relativo máximo (default: 0.5)")
+    parser.add_argument("--slack-ms", type=float, default=20.0, help="Folga absoluta em ms (default: 20)")
+    args = parser.parse_args()
+
+    sys.exit(
+        main(
+            modules=[m.strip() for m in args.modules.split(",") if m.strip()] if args.modules else None,
+            repeat=args.repeat,
+            baseline_path=args.baseline,
+            save_baseline=bool(args.save_baseline),
+            tolerance=args.tolerance,
+            slack_ms=args.slack_ms,
+        )
+    )
@@ -0,0 +1,107 @@
+"""Compara dois perfis gravados por `jobs/profiling.py` (antes x depois).
+
+Uso:
+  python scripts/diff_profiles.py data/profiles/sync_fundamentals_cvm_dfp/20261001-120000 \
+      data/profiles/sync_fundamentals_cvm_dfp/20261018-120000
+  python scripts/diff_profiles.py antes/cpu.prof depois/cpu.prof --match _extract_from_statement_rows
+  python scripts/diff_profiles.py antes/ depois/ --sort tottime --top 30
+
+- CPU (`cpu.prof`): tempo próprio (tottime) e acumulado (cumtime) por função, ordenado
+  pela maior variação absoluta — regressões em hot paths aparecem no topo.
+- Memória (`tracemalloc.snapshot`): `Snapshot.compare_to` por linha (KB e blocos).
+"""
+
+from __future__ import annotations
+
+import argparse
+import pstats
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+FuncKey = Tuple[str, int, str]
+
+
+def _resolve(path: Path) -> Tuple[str, Path]:
+    """(tipo, arquivo) a partir de um arquivo ou diretório de perfil."""
+    if path.is_dir():
+        for name, kind in (("cpu.prof", "cpu"), ("tracemalloc.snapshot", "mem")):
+            if (path / name).exists():
+                return kind, path / name
+        raise SystemExit(f"[ERRO] {path}: sem cpu.prof nem tracemalloc.snapshot")
+    if path.suffix == ".prof":
+        return "cpu", path
+    if path.suffix == ".snapshot":
+        return "mem", path
+    raise SystemExit(f"[ERRO] {path}: formato desconhecido (esperado .prof ou .snapshot)")
+
+
+def _func_label(key: FuncKey) -> str:
+    filename, line, func = key
+    return f"{func} ({Path(filename).name}:{line})" if line else func
+
+
+def _load_cpu(path: Path) -> Tuple[Dict[FuncKey, Tuple[int, float, float]], float]:
+    stats = pstats.Stats(str(path))
+    out = {key: (nc, tt, ct) for key, (cc, nc, tt, ct, _callers) in stats.stats.items()}  # type: ignore[attr-defined]
+    return out, float(stats.total_tt)  # type: ignore[attr-defined]
+
+
+def diff_cpu(before: Path, after: Path, *, top: int, sort: str, match: Optional[str]) -> None:
+    a, total_a = _load_cpu(before)
+    b, total_b = _load_cpu(after)
+    idx = 2 if sort == "cumtime" else 1
+    rows = []
+    for key in set(a) | set(b):
+        label = _func_label(key)
+        if match and match not in label:
+            continue
+        ca, cb = a.get(key, (0, 0.0, 0.0)), b.get(key, (0, 0.0, 0.0))
+        rows.append((cb[idx] - ca[idx], label, ca, cb))
+    rows.sort(key=lambda r: abs(r[0]), reverse=True)
+
+    print(f"Total: {total_a:.3f}s -> {total_b:.3f}s ({total_b - total_a:+.3f}s)")
+    print(f"{'Δ ' + sort:>12s} {'antes':>10s} {'depois':>10s} {'chamadas':>17s}  função")
+    for delta, label, ca, cb in rows[:top]:
+        calls = f"{ca[0]}->{cb[0]}"
+        print(f"{delta:+12.4f} {ca[idx]:10.4f} {cb[idx]:10.4f} {calls:>17s}  {label}")
+
+
+def diff_mem(before: Path, after: Path, *, top: int, match: Optional[str]) -> None:
+    snap_a = tracemalloc.Snapshot.load(str(before))
+    snap_b = tracemalloc.Snapshot.load(str(after))
+    stats = snap_b.compare_to(snap_a, "lineno")
+    if match:
+        stats = [s for s in stats if match in str(s.traceback)]
+    total_a = sum(s.size for s in snap_a.statistics("filename"))
+    total_b = sum(s.size for s in snap_b.statistics("filename"))
+    print(f"Memória viva: {total_a / 1024 / 1024:.1f} MB -> {total_b / 1024 / 1024:.1f} MB")
+    print(f"{'Δ KB':>12s} {'depois KB':>12s} {'Δ blocos':>10s}  linha")
+    for s in stats[:top]:
+        print(f"{s.size_diff / 1024:+12.1f} {s.size / 1024:12.1f} {s.count_diff:+10d}  {s.traceback}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff de perfis (cProfile ou tracemalloc) de jobs")
+    parser.add_argument("before", type=Path, help="Perfil de referência (diretório ou arquivo)")
+    parser.add_argument("after", type=Path, help="Perfil novo (diretório ou arquivo)")
+    parser.add_argument("--top", type=int, default=25, help="Linhas exibidas (default: 25)")
+    parser.add_argument("--sort", choices=("cumtime", "tottime"), default="cumtime", help="Só CPU")
+    parser.add_argument("--match", type=str, default=None, help="Filtra funções/linhas por substring")
+    args = parser.parse_args(argv)
+
+    kind_a, path_a = _resolve(args.before)
+    kind_b, path_b = _resolve(args.after)
+    if kind_a != kind_b:
+        print(f"[ERRO] Perfis de tipos diferentes: {kind_a} x {kind_b}")
+        return 2
+    if kind_a == "cpu":
+        diff_cpu(path_a, path_b, top=args.top, sort=args.sort, match=args.match)
+    else:
+        diff_mem(path_a, path_b, top=args.top, match=args.match)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+-- Migração 014: Tabela precos_diarios (preço canônico por ticker/dia)
+-- Objetivo: consolidar as várias fontes de `precos` (brapi, hgbrasil, ...) e o legado
+--           `prices_daily` em UM fechamento por ticker/dia, registrando a fonte vencedora.
+-- Preenchida por: jobs/reconcile_precos.py
+-- Data: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS public.precos_diarios (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  ticker TEXT NOT NULL,
+  data DATE NOT NULL,
+
+  fechamento NUMERIC NOT NULL,
+  fonte TEXT NOT NULL,
+
+  -- Data do preço efetivamente usado (pode ser < data quando o preço foi repetido por staleness)
+  data_preco DATE NOT NULL,
+  dias_defasagem INTEGER NOT NULL DEFAULT 0,
+
+  fechamento_anterior NUMERIC,
+  variacao_vs_anterior NUMERIC,
+
+  -- Candidatos avaliados: [{fonte, fechamento, status}] (status: escolhido | escolhido_consenso | preterido | outlier)
+  candidatos JSONB,
+
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS precos_diarios_ticker_data_uidx
+  ON public.precos_diarios (ticker, data);
+
+CREATE INDEX IF NOT EXISTS idx_precos_diarios_data
+  ON public.precos_diarios (data DESC);
+
+ALTER TABLE public.precos_diarios ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Leitura publica de precos_diarios" ON public.precos_diarios;
+DROP POLICY IF EXISTS "precos_diarios_insert_service_role" ON public.precos_diarios;
+DROP POLICY IF EXISTS "precos_diarios_update_service_role" ON public.precos_diarios;
+DROP POLICY IF EXISTS "precos_diarios_delete_service_role" ON public.precos_diarios;
+
+CREATE POLICY "Leitura publica de precos_diarios"
+ON public.precos_diarios FOR SELECT
+USING (true);
+
+CREATE POLICY "precos_diarios_insert_service_role"
+ON public.precos_diarios FOR INSERT
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "precos_diarios_update_service_role"
+ON public.precos_diarios FOR UPDATE
+USING (auth.role() = 'service_role')
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "precos_diarios_delete_service_role"
+ON public.precos_diarios FOR DELETE
+USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE public.precos_diarios IS
+'Fechamento canônico por ticker/dia, reconciliado a partir de precos (multi-fonte) e prices_daily (legado).';
+
+COMMENT ON COLUMN public.precos_diarios.fonte IS
+'Fonte vencedora (ordem de MasterIntegrator.get_data_priority(''prices'')).';
+
+COMMENT ON COLUMN public.precos_diarios.dias_defasagem IS
+'0 quando há preço do próprio dia; >0 quando o último fechamento válido foi repetido (staleness).';
@@ -0,0 +1,24 @@
+-- Migração 015: RPC de cobertura de preços (datas existentes por ticker)
+-- Objetivo: o backfill histórico (jobs/backfill_precos_historico.py) descobre as lacunas
+--           com UMA consulta agregada (usa o índice precos(ticker, data desc)) em vez de
+--           paginar centenas de milhares de linhas via PostgREST.
+-- Data: 2026-10-18
+
+CREATE OR REPLACE FUNCTION public.precos_cobertura(
+  p_inicio DATE,
+  p_fim DATE,
+  p_tickers TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (ticker TEXT, datas DATE[])
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT p.ticker, array_agg(DISTINCT p.data ORDER BY p.data) AS datas
+  FROM public.precos p
+  WHERE p.data BETWEEN p_inicio AND p_fim
+    AND (p_tickers IS NULL OR p.ticker = ANY (p_tickers))
+  GROUP BY p.ticker;
+$$;
+
+COMMENT ON FUNCTION public.precos_cobertura(DATE, DATE, TEXT[]) IS
+'Datas com preço (qualquer fonte) por ticker no intervalo. Usado pelo backfill histórico.';
@@ -0,0 +1,44 @@
+-- Migração 016: Estado do sync incremental de proventos (watermark por ticker/fonte)
+-- Objetivo: os jobs de dividendos (HG Brasil v2 / Brapi) pedem só uma janela curta após a
+--           última ex_date conhecida, com re-varredura completa semanal.
+-- Preenchida por: jobs/sync_dividends_hgbrasil_v2.py, jobs/sync_dividendos_brapi.py
+-- Data: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS public.dividends_sync_state (
+  ticker TEXT NOT NULL,
+  source TEXT NOT NULL,
+
+  -- Maior ex_date já vista para o ticker nesta fonte
+  last_ex_date DATE,
+  last_deep_scan_at TIMESTAMPTZ,
+
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (ticker, source)
+);
+
+ALTER TABLE public.dividends_sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Leitura publica de dividends_sync_state" ON public.dividends_sync_state;
+DROP POLICY IF EXISTS "dividends_sync_state_insert_service_role" ON public.dividends_sync_state;
+DROP POLICY IF EXISTS "dividends_sync_state_update_service_role" ON public.dividends_sync_state;
+DROP POLICY IF EXISTS "dividends_sync_state_delete_service_role" ON public.dividends_sync_state;
+
+CREATE POLICY "Leitura publica de dividends_sync_state"
+ON public.dividends_sync_state FOR SELECT
+USING (true);
+
+CREATE POLICY "dividends_sync_state_insert_service_role"
+ON public.dividends_sync_state FOR INSERT
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "dividends_sync_state_update_service_role"
+ON public.dividends_sync_state FOR UPDATE
+USING (auth.role() = 'service_role')
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "dividends_sync_state_delete_service_role"
+ON public.dividends_sync_state FOR DELETE
+USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE public.dividends_sync_state IS
+'Watermark (última ex_date) por ticker/fonte para o sync incremental de proventos.';
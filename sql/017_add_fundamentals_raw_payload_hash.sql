@@ -0,0 +1,20 @@
+-- Migração 017: Deduplicação de payloads em fundamentals_raw (hash de conteúdo)
+-- Objetivo: evitar 1 payload completo por dia quando o provedor devolve o mesmo conteúdo.
+--   payload_hash   = sha256 do JSON canônico (chaves ordenadas, sem campos voláteis como fetched_at)
+--   payload_ref_id = quando preenchido, a linha é um "ponteiro": o payload completo está na linha
+--                    referenciada (payload da linha ponteiro = {"same_as_id": <id>})
+-- Preenchida por: jobs/fundamentals_raw_dedupe.py (sync_fundamentals_*, sync_dividends_hgbrasil_v2)
+-- Data: 2026-10-18
+
+ALTER TABLE public.fundamentals_raw
+  ADD COLUMN IF NOT EXISTS payload_hash TEXT,
+  ADD COLUMN IF NOT EXISTS payload_ref_id BIGINT;
+
+CREATE INDEX IF NOT EXISTS idx_fundamentals_raw_source_ticker_date
+  ON public.fundamentals_raw (source, ticker, as_of_date DESC);
+
+COMMENT ON COLUMN public.fundamentals_raw.payload_hash IS
+'sha256 do payload canônico (sem campos voláteis). Igual ao do dia anterior => payload inalterado.';
+
+COMMENT ON COLUMN public.fundamentals_raw.payload_ref_id IS
+'Linha ponteiro: id da linha de fundamentals_raw que contém o payload completo (mesmo payload_hash).';
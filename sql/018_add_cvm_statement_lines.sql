@@ -0,0 +1,66 @@
+-- Migração 018: Tabela cvm_statement_lines (linhas dos demonstrativos DFP/ITR em formato longo)
+-- Objetivo: substituir os blobs `fundamentals_raw.payload.statements` (limitados a N linhas)
+--           por 1 linha por conta, consultável por código (CD_CONTA) com índice.
+-- Preenchida por: jobs/sync_cvm_statement_lines.py
+-- Data: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS public.cvm_statement_lines (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  cnpj TEXT NOT NULL,             -- 14 dígitos, sem pontuação
+  dt_refer DATE NOT NULL,
+  statement TEXT NOT NULL,        -- DRE | BPP | BPA | DFC_MD | DFC_MI | DMPL | DVA
+  cd_conta TEXT NOT NULL,         -- ex.: 2.03, 3.11, 1.01.01
+  versao INTEGER NOT NULL DEFAULT 1,
+
+  ds_conta TEXT,
+  vl_conta NUMERIC,
+  escala_moeda TEXT,              -- MIL | UNIDADE
+  denom_cia TEXT,
+  fiscal_year INTEGER,
+  doc_type TEXT NOT NULL DEFAULT 'DFP',
+
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS cvm_statement_lines_key_uidx
+  ON public.cvm_statement_lines (cnpj, dt_refer, statement, cd_conta, versao);
+
+-- Consultas por prefixo de conta (cd_conta=like.2.03*) em todas as empresas
+CREATE INDEX IF NOT EXISTS idx_cvm_statement_lines_cd_conta_prefix
+  ON public.cvm_statement_lines (cd_conta text_pattern_ops, dt_refer DESC);
+
+CREATE INDEX IF NOT EXISTS idx_cvm_statement_lines_statement_cd_conta
+  ON public.cvm_statement_lines (statement, cd_conta text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_cvm_statement_lines_fiscal_year
+  ON public.cvm_statement_lines (fiscal_year);
+
+ALTER TABLE public.cvm_statement_lines ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Leitura publica de cvm_statement_lines" ON public.cvm_statement_lines;
+DROP POLICY IF EXISTS "cvm_statement_lines_insert_service_role" ON public.cvm_statement_lines;
+DROP POLICY IF EXISTS "cvm_statement_lines_update_service_role" ON public.cvm_statement_lines;
+DROP POLICY IF EXISTS "cvm_statement_lines_delete_service_role" ON public.cvm_statement_lines;
+
+CREATE POLICY "Leitura publica de cvm_statement_lines"
+ON public.cvm_statement_lines FOR SELECT
+USING (true);
+
+CREATE POLICY "cvm_statement_lines_insert_service_role"
+ON public.cvm_statement_lines FOR INSERT
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "cvm_statement_lines_update_service_role"
+ON public.cvm_statement_lines FOR UPDATE
+USING (auth.role() = 'service_role')
+WITH CHECK (auth.role() = 'service_role');
+
+CREATE POLICY "cvm_statement_lines_delete_service_role"
+ON public.cvm_statement_lines FOR DELETE
+USING (auth.role() = 'service_role');
+
+COMMENT ON TABLE public.cvm_statement_lines IS
+'Linhas dos demonstrativos CVM (DFP consolidado) em formato longo: 1 linha por empresa/data/demonstrativo/conta/versão.';
+
+COMMENT ON COLUMN public.cvm_statement_lines.vl_conta IS
+'Valor como publicado (ver escala_moeda: MIL = milhares de R$).';
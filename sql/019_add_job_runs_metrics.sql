@@ -0,0 +1,15 @@
+-- Migração 019: Telemetria de performance por execução em job_runs
+-- Objetivo: saber para onde foi o tempo de um job lento (rede, upserts no Supabase, parsing).
+--   metrics = JSON com:
+--     duration_s, rows_per_s, peak_rss_mb
+--     phases: {"<fase>": {"seconds": .., "calls": ..}}              (jobs.telemetry.phase)
+--     http:   {"<host>": {requests, errors, retries, status_429, bytes_in, bytes_out,
+--                         latency_ms_avg, latency_ms_max, latency_ms_hist}}
+-- Preenchida por: jobs/common.py::log_job_run (sem a coluna, o job_run é gravado sem metrics)
+-- Data: 2026-10-18
+
+ALTER TABLE public.job_runs
+  ADD COLUMN IF NOT EXISTS metrics JSONB;
+
+COMMENT ON COLUMN public.job_runs.metrics IS
+'Telemetria da execução (fases, HTTP por host, pico de RSS, linhas/s). Ver jobs/telemetry.py.';
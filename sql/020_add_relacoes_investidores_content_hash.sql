@@ -0,0 +1,15 @@
+-- Migração 020: Hash de conteúdo em relacoes_investidores (sync de RI incremental)
+-- Objetivo: o sync diário de RI (FCA/FRE) só regravar CNPJs cujos contatos mudaram.
+--   content_hash = sha256 do JSON canônico dos campos extraídos (contatos/canal/endereço no FCA;
+--                  versão/link do documento no FRE), sem o payload bruto nem fetched_at
+-- Preenchida por: jobs/sync_cvm_ri.py (sem a coluna, o job grava todos os snapshots como antes)
+-- Data: 2026-10-19
+
+ALTER TABLE public.relacoes_investidores
+  ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_relacoes_investidores_source_cnpj_date
+  ON public.relacoes_investidores (source, cnpj, as_of_date DESC);
+
+COMMENT ON COLUMN public.relacoes_investidores.content_hash IS
+'sha256 dos campos extraídos (canônico). Igual ao do último snapshot do CNPJ/fonte => nada a gravar.';
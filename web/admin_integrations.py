@@ -18,7 +18,6 @@ from typing import Any
 
 # Diretório onde ficam as configs (gitignored)
 INTEGRATIONS_DIR = Path(__file__).parent.parent / "data" / "integrations"
-INTEGRATIONS_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def _config_path(integration_name: str) -> Path:
@@ -39,6 +38,7 @@ def load_integration_config(integration_name: str) -> dict[str, Any] | None:
 
 def save_integration_config(integration_name: str, config: dict[str, Any]) -> None:
     """Salva configuração de uma integração (cápsula isolada)."""
+    INTEGRATIONS_DIR.mkdir(parents=True, exist_ok=True)
     path = _config_path(integration_name)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(config, f, ensure_ascii=False, indent=2)
@@ -158,3 +158,22 @@ def handle_b3_get() -> dict[str, Any]:
 def handle_b3_post(config: dict[str, Any]) -> None:
     save_integration_config("b3", config)
 
+
+_DEFAULT_HANDLERS = {
+    "brapi": handle_brapi_get,
+    "fintz": handle_fintz_get,
+    "hgbrasil": handle_hgbrasil_get,
+    "cvm": handle_cvm_get,
+    "b3": handle_b3_get,
+}
+
+
+def get_rate_limit_per_minute(integration_name: str, default: int = 60) -> int:
+    """Lê `rateLimit.requestsPerMinute` da config da integração (ou do default do handler)."""
+    handler = _DEFAULT_HANDLERS.get(integration_name)
+    config = handler() if handler else load_integration_config(integration_name)
+    try:
+        rpm = int(((config or {}).get("rateLimit") or {}).get("requestsPerMinute") or 0)
+    except Exception:
+        rpm = 0
+    return rpm if rpm > 0 else int(default)
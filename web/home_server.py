@@ -6,24 +6,20 @@ from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Any
 
 from jobs.common import TICKERS, get_supabase_admin_client, list_active_tickers, load_settings
-from web.admin_integrations import (
-    handle_brapi_get,
-    handle_brapi_post,
-    handle_fintz_get,
-    handle_fintz_post,
-    handle_hgbrasil_get,
-    handle_hgbrasil_post,
-    handle_cvm_get,
-    handle_cvm_post,
-    handle_b3_get,
-    handle_b3_post,
-)
-from web.companies import (
-    handle_empresas_list,
-    handle_empresa_detail,
-    handle_acoes_list,
-    handle_stats,
-)
+
+
+def _admin() -> Any:
+    """Handlers de admin, importados na 1ª requisição (não pesam na subida do servidor)."""
+    import web.admin_integrations as admin
+
+    return admin
+
+
+def _companies() -> Any:
+    """Handlers de empresas: `web.companies` puxa `database.models` (SQLite), só sob demanda."""
+    import web.companies as companies
+
+    return companies
 
 
 def _mock_rows() -> list[dict[str, Any]]:
@@ -381,39 +377,39 @@ class Handler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
-            self.wfile.write(json.dumps(handle_brapi_get(), ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(json.dumps(_admin().handle_brapi_get(), ensure_ascii=False).encode("utf-8"))
             return
 
         if self.path == "/api/admin/integrations/fintz":
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
-            self.wfile.write(json.dumps(handle_fintz_get(), ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(json.dumps(_admin().handle_fintz_get(), ensure_ascii=False).encode("utf-8"))
             return
 
         if self.path == "/api/admin/integrations/hgbrasil":
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
-            self.wfile.write(json.dumps(handle_hgbrasil_get(), ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(json.dumps(_admin().handle_hgbrasil_get(), ensure_ascii=False).encode("utf-8"))
             return
 
         if self.path == "/api/admin/integrations/cvm":
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
-            self.wfile.write(json.dumps(handle_cvm_get(), ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(json.dumps(_admin().handle_cvm_get(), ensure_ascii=False).encode("utf-8"))
             return
 
         if self.path == "/api/admin/integrations/b3":
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
-            self.wfile.write(json.dumps(handle_b3_get(), ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(json.dumps(_admin().handle_b3_get(), ensure_ascii=False).encode("utf-8"))
             return
         # Empresas: listagem e consulta
         if self.path == "/api/empresas":
-            result = handle_empresas_list()
+            result = _companies().handle_empresas_list()
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -422,7 +418,7 @@ class Handler(BaseHTTPRequestHandler):
 
         if self.path.startswith("/api/empresas/"):
             cnpj = self.path.split("/")[-1]
-            result = handle_empresa_detail(cnpj)
+            result = _companies().handle_empresa_detail(cnpj)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -430,7 +426,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/acoes":
-            result = handle_acoes_list()
+            result = _companies().handle_acoes_list()
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -438,7 +434,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/stats":
-            result = handle_stats()
+            result = _companies().handle_stats()
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -455,7 +451,7 @@ class Handler(BaseHTTPRequestHandler):
         data = json.loads(body) if body else {}
 
         if self.path == "/api/admin/integrations/brapi":
-            handle_brapi_post(data)
+            _admin().handle_brapi_post(data)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -463,7 +459,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/admin/integrations/fintz":
-            handle_fintz_post(data)
+            _admin().handle_fintz_post(data)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -471,7 +467,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/admin/integrations/hgbrasil":
-            handle_hgbrasil_post(data)
+            _admin().handle_hgbrasil_post(data)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -479,7 +475,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/admin/integrations/cvm":
-            handle_cvm_post(data)
+            _admin().handle_cvm_post(data)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()
@@ -487,7 +483,7 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         if self.path == "/api/admin/integrations/b3":
-            handle_b3_post(data)
+            _admin().handle_b3_post(data)
             self.send_response(200)
             self.send_header("Content-Type", "application/json; charset=utf-8")
             self.end_headers()